@@ -100,7 +100,8 @@ def main():
             existing_records = db.search_copy_records(
                 source_repo='Intrising/test-Lantech',
                 target_repo=copy['target_repo'],
-                source_issue_number=source_num
+                source_issue_number=source_num,
+                include_labels=False
             )
 
             # 檢查是否有成功的記錄
@@ -122,6 +123,7 @@ def main():
     added_count = 0
     failed_count = 0
     skipped_count = 0
+    new_records = []
 
     # 只處理最近的 200 筆（避免過度使用 API）
     records_to_add = missing_records[:200]
@@ -143,10 +145,10 @@ def main():
             # 獲取來源 issue 資訊
             source_issue = gh.get_repo('Intrising/test-Lantech').get_issue(source_num)
 
-            # 創建記錄
+            # 收集記錄，最後在單一交易中批量寫入
             record_id = f'Intrising/test-Lantech#{source_num}->{target_repo}@{datetime.now().timestamp()}'
 
-            db.create_copy_record({
+            new_records.append({
                 'record_id': record_id,
                 'source_repo': 'Intrising/test-Lantech',
                 'source_issue_number': source_num,
@@ -160,7 +162,6 @@ def main():
                 'images_count': 0
             })
 
-            added_count += 1
             print('✓')
 
             # 每 10 筆休息一下，避免 API 限制
@@ -181,6 +182,9 @@ def main():
             failed_count += 1
             print(f'✗ 錯誤: {e}')
 
+    # 批量寫入資料庫
+    added_count = db.create_copy_records_bulk(new_records)
+
     # 總結
     print()
     print('=' * 60)
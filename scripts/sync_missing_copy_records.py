@@ -71,7 +71,7 @@ def main():
 
     # 檢查資料庫中缺失的記錄
     missing_count = 0
-    added_count = 0
+    new_records = []
 
     for source_num in sorted(all_copies.keys()):
         for copy in all_copies[source_num]:
@@ -79,7 +79,8 @@ def main():
             existing_records = db.search_copy_records(
                 source_repo='Intrising/test-Lantech',
                 target_repo=copy['target_repo'],
-                source_issue_number=source_num
+                source_issue_number=source_num,
+                include_labels=False
             )
 
             # 檢查是否有成功的記錄
@@ -93,10 +94,10 @@ def main():
                     # 獲取來源 issue 資訊
                     source_issue = gh.get_repo('Intrising/test-Lantech').get_issue(source_num)
 
-                    # 創建記錄
+                    # 收集記錄，最後在單一交易中批量寫入
                     record_id = f'Intrising/test-Lantech#{source_num}->{copy["target_repo"]}@{datetime.now().timestamp()}'
 
-                    db.create_copy_record({
+                    new_records.append({
                         'record_id': record_id,
                         'source_repo': 'Intrising/test-Lantech',
                         'source_issue_number': source_num,
@@ -111,12 +112,13 @@ def main():
                         'created_at': source_issue.created_at.isoformat()
                     })
 
-                    added_count += 1
-                    print(f'  ✓ 已添加')
+                    print(f'  ✓ 已準備')
 
                 except Exception as e:
                     print(f'  ✗ 添加失敗: {e}')
 
+    added_count = db.create_copy_records_bulk(new_records)
+
     print(f'\n完成！')
     print(f'  缺失記錄: {missing_count}')
     print(f'  成功添加: {added_count}')
@@ -5,17 +5,361 @@
 """
 
 import sqlite3
+import atexit
+import copy
 import json
+import zlib
 import logging
+import time
 from datetime import datetime
 from typing import Dict, List, Optional
+from collections import Counter
 from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 import threading
+import queue
+from itertools import product
+
+try:
+    import orjson
+except ImportError:  # 未安裝時退回標準庫 json
+    orjson = None
+
+# webhook 事件列表只顯示我們處理的事件類型
+ALLOWED_EVENT_TYPES = frozenset(('pull_request', 'issues', 'issue_comment'))
+
+
+def _filtered_select_statements(table: str, columns: str, filters: tuple, suffix: str = "") -> Dict[tuple, str]:
+    """
+    為每種篩選組合預先生成固定文字的 SELECT 語句
+
+    每個組合只用到實際啟用的條件，保留索引可用性；語句文字固定，
+    可重用連接上的預編譯語句快取。
+
+    Args:
+        table: 表名
+        columns: 查詢的欄位
+        filters: 可選篩選欄位（依序）
+        suffix: 附加在 ORDER BY 之後的子句（如 "LIMIT ?"）
+
+    Returns:
+        以各篩選是否啟用的布林元組為鍵的 SQL 語句字典
+    """
+    statements = {}
+    for mask in product((False, True), repeat=len(filters)):
+        conditions = [f"{column} = ?" for column, enabled in zip(filters, mask) if enabled]
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        statements[mask] = f"SELECT {columns} FROM {table} {where} ORDER BY created_at DESC {suffix}".rstrip()
+    return statements
 
 
 class TaskDatabase:
     """PR 審查任務資料庫"""
 
+    # 每寫入 N 筆 webhook 事件後刷新一次查詢規劃器統計
+    OPTIMIZE_INTERVAL = 10000
+
+    # webhook 事件延遲寫入（write-behind）佇列：容量、每批最大筆數與收集一批的最長等待時間（秒）
+    WEBHOOK_QUEUE_SIZE = 10000
+    WEBHOOK_BATCH_SIZE = 100
+    WEBHOOK_FLUSH_INTERVAL = 0.05
+
+    # 背景寫入遇到暫時性錯誤（如資料庫被鎖定）時的重試次數與每次重試前的等待時間（秒，逐次遞增）
+    WEBHOOK_WRITE_RETRIES = 3
+    WEBHOOK_RETRY_DELAY = 0.5
+
+    # webhook 統計計數表的全量重算間隔（秒），作為觸發器計數的安全網
+    WEBHOOK_STATS_REBUILD_INTERVAL = 7 * 24 * 3600
+
+    # webhook delivery ID 的保留時間與過期清理間隔（秒）
+    DELIVERY_RETENTION = 24 * 3600
+    DELIVERY_PURGE_INTERVAL = 3600
+
+    # 作者歷史查詢失敗時返回的空統計（只讀模板，返回前複製）
+    _EMPTY_PR_STATS = {
+        'total_prs': 0,
+        'avg_score': None,
+        'min_score': None,
+        'max_score': None,
+        'scored_prs': 0,
+        'trend': None,
+        'recent_scores': []
+    }
+
+    _EMPTY_ISSUE_STATS = {
+        'total_issues': 0,
+        'avg_overall': None,
+        'avg_format': None,
+        'avg_content': None,
+        'avg_clarity': None,
+        'avg_actionability': None,
+        'min_score': None,
+        'max_score': None,
+        'trend': None,
+        'recent_scores': [],
+        'by_content_type': {}
+    }
+
+    # 記憶體映射 I/O 上限（位元組）：約為預期資料庫大小的一半，最多 256MB
+    MMAP_SIZE = 256 * 1024 * 1024
+
+    # 每個連接的頁面快取大小（負值單位為 KiB，即 64MB；按需分配）
+    CACHE_SIZE_KIB = 64 * 1024
+
+    # 資料庫頁面大小（新建資料庫或 compact() 時套用）
+    PAGE_SIZE = 8192
+
+    # 資料庫結構版本（PRAGMA user_version）；新增欄位遷移時遞增
+    SCHEMA_VERSION = 1
+
+    # 任務與複製記錄允許更新的欄位
+    _TASK_UPDATABLE_FIELDS = (
+        'status', 'progress', 'message', 'pr_title',
+        'pr_author', 'pr_url', 'error_message', 'score', 'review_comment_url'
+    )
+
+    _COPY_RECORD_UPDATABLE_FIELDS = (
+        'target_issue_number', 'target_issue_url', 'status',
+        'error_message', 'images_count'
+    )
+
+    # 固定文字的更新語句：每個欄位以「是否更新」旗標參數決定寫入新值或保留原值，
+    # 無論更新哪些欄位都是同一條語句，可重用連接上已預編譯的語句
+    _TASK_UPDATE_ASSIGNMENTS = (
+        ", ".join(f"{field} = CASE WHEN ? THEN ? ELSE {field} END" for field in _TASK_UPDATABLE_FIELDS)
+        + ", updated_at = ?, completed_at = CASE WHEN ? THEN ? ELSE completed_at END"
+    )
+
+    _SQL_UPDATE_TASK = f"UPDATE review_tasks SET {_TASK_UPDATE_ASSIGNMENTS} WHERE task_id = ?"
+
+    # 創建任務：任務已存在時在同一條語句內按 update_task 的規則更新
+    _SQL_UPSERT_TASK = f"""
+        INSERT INTO review_tasks (
+            task_id, pr_number, repo, pr_title, pr_author,
+            pr_url, status, progress, message, created_at, updated_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(task_id) DO UPDATE SET {_TASK_UPDATE_ASSIGNMENTS}
+    """
+
+    # 批量創建任務：已存在的任務直接跳過
+    _SQL_INSERT_TASK_IGNORE = """
+        INSERT OR IGNORE INTO review_tasks (
+            task_id, pr_number, repo, pr_title, pr_author,
+            pr_url, status, progress, message, created_at, updated_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    _SQL_UPSERT_TASK_CONTENT = """
+        INSERT INTO review_task_content (task_id, review_content)
+        VALUES (?, ?)
+        ON CONFLICT(task_id) DO UPDATE SET review_content = excluded.review_content
+    """
+
+    _COPY_RECORD_INSERT_COLUMNS = """
+            record_id, source_repo, source_issue_number,
+            source_issue_title, source_issue_url, source_labels,
+            target_repo, target_issue_number, target_issue_url,
+            status, error_message, images_count, created_at, completed_at
+    """
+
+    # 創建複製記錄：違反唯一約束（重複複製）時不插入
+    _SQL_INSERT_COPY_RECORD = f"""
+        INSERT INTO issue_copy_records ({_COPY_RECORD_INSERT_COLUMNS})
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT DO NOTHING
+    """
+
+    _SQL_INSERT_COPY_RECORD_IGNORE = f"""
+        INSERT OR IGNORE INTO issue_copy_records ({_COPY_RECORD_INSERT_COLUMNS})
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    _SQL_INSERT_COMMENT_SYNC = """
+        INSERT INTO comment_sync_records (
+            sync_id, source_repo, source_issue_number, source_issue_url,
+            comment_author, comment_body,
+            synced_count, total_targets, status, error_message, created_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    _SQL_INSERT_COMMENT_SYNC_TARGET = """
+        INSERT INTO comment_sync_targets (sync_id, repo_name)
+        VALUES (?, ?)
+    """
+
+    _SQL_INSERT_WEBHOOK_EVENT = """
+        INSERT INTO webhook_events (
+            event_id, event_type, repo_name, pr_number, issue_number,
+            action, sender, processed_by, status,
+            error_message, created_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    _SQL_INSERT_WEBHOOK_PAYLOAD = """
+        INSERT INTO webhook_event_payloads (event_id, payload)
+        VALUES (?, ?)
+    """
+
+    _SQL_INSERT_SCORE = """
+        INSERT INTO issue_scores
+        (score_id, repo_name, issue_number, comment_id, event_type, content_type,
+         title, body, author, issue_url, status, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    # 批量寫入使用的版本：主鍵已存在的記錄直接跳過
+    _SQL_INSERT_COMMENT_SYNC_IGNORE = _SQL_INSERT_COMMENT_SYNC.replace('INSERT INTO', 'INSERT OR IGNORE INTO', 1)
+    _SQL_INSERT_WEBHOOK_EVENT_IGNORE = _SQL_INSERT_WEBHOOK_EVENT.replace('INSERT INTO', 'INSERT OR IGNORE INTO', 1)
+    _SQL_INSERT_WEBHOOK_PAYLOAD_IGNORE = _SQL_INSERT_WEBHOOK_PAYLOAD.replace('INSERT INTO', 'INSERT OR IGNORE INTO', 1)
+    _SQL_INSERT_SCORE_IGNORE = _SQL_INSERT_SCORE.replace('INSERT INTO', 'INSERT OR IGNORE INTO', 1)
+
+    _SQL_UPDATE_COPY_RECORD = (
+        "UPDATE issue_copy_records SET "
+        + ", ".join(f"{field} = CASE WHEN ? THEN ? ELSE {field} END" for field in _COPY_RECORD_UPDATABLE_FIELDS)
+        + ", completed_at = CASE WHEN ? THEN ? ELSE completed_at END"
+        + " WHERE record_id = ?"
+    )
+
+    # 不含 source_labels 的複製記錄欄位（不需要 labels 時免去 JSON 解析）
+    _COPY_RECORD_COLUMNS_NO_LABELS = """
+        record_id, source_repo, source_issue_number, source_issue_title, source_issue_url,
+        target_repo, target_issue_number, target_issue_url, status, error_message,
+        images_count, created_at, completed_at
+    """
+
+    # review_tasks 的列表欄位（審查內容存放於 review_task_content，列表不讀取）
+    _TASK_COLUMNS = """
+        task_id, pr_number, repo, pr_title, pr_author, pr_url, status, progress, message,
+        created_at, updated_at, completed_at, error_message, score, review_comment_url,
+        user_feedback, review_comment_id
+    """
+
+    # 輪詢任務進度時只需要的欄位
+    _TASK_STATUS_COLUMNS = "task_id, status, progress, message, updated_at, completed_at, score"
+
+    # 搜索語句（依篩選組合預先生成）
+    _SQL_SEARCH_TASKS = _filtered_select_statements(
+        'review_tasks', _TASK_COLUMNS, ('repo', 'pr_number', 'pr_author')
+    )
+
+    _SEARCH_COPY_RECORD_FILTERS = ('source_repo', 'target_repo', 'source_issue_number')
+    _SQL_SEARCH_COPY_RECORDS = {
+        True: _filtered_select_statements('issue_copy_records', '*', _SEARCH_COPY_RECORD_FILTERS),
+        False: _filtered_select_statements(
+            'issue_copy_records', _COPY_RECORD_COLUMNS_NO_LABELS, _SEARCH_COPY_RECORD_FILTERS
+        )
+    }
+
+    # webhook 事件列表語句（以「是否指定類型、是否指定狀態」為鍵）：
+    # 指定類型時只用等值條件走 idx_webhook_type；未指定時才限定處理的事件類型，
+    # 條件文字與 idx_webhook_hot 部分索引一致
+    _WEBHOOK_EVENT_LIST_COLUMNS = """
+        event_id, event_type, repo_name, pr_number, issue_number,
+        action, sender, processed_by, status, error_message, created_at
+    """
+    _SQL_WEBHOOK_EVENTS = _filtered_select_statements(
+        'webhook_events', _WEBHOOK_EVENT_LIST_COLUMNS, ('event_type', 'status'), "LIMIT ?"
+    )
+    _SQL_WEBHOOK_EVENTS[(False, False)] = f"""
+        SELECT {_WEBHOOK_EVENT_LIST_COLUMNS} FROM webhook_events
+        WHERE event_type IN ('pull_request', 'issues', 'issue_comment')
+        ORDER BY created_at DESC LIMIT ?
+    """
+    _SQL_WEBHOOK_EVENTS[(False, True)] = f"""
+        SELECT {_WEBHOOK_EVENT_LIST_COLUMNS} FROM webhook_events
+        WHERE event_type IN ('pull_request', 'issues', 'issue_comment') AND status = ?
+        ORDER BY created_at DESC LIMIT ?
+    """
+
+    # 評分記錄列表語句（依篩選組合預先生成）
+    _SQL_SCORE_RECORDS = _filtered_select_statements(
+        'issue_scores', '*', ('status', 'repo_name'), "LIMIT ?"
+    )
+
+    # 評分統計語句（以是否按 repository 過濾為鍵）：一次分組查詢取得總數、按狀態與按內容類型的計數，
+    # 以及平均分數所需的總和（排除已忽略的；平均分數只計算已完成的）
+    _SQL_SCORE_STATS_SELECT = """
+        SELECT status, content_type, COUNT(*),
+               SUM(CASE WHEN status = 'completed' THEN overall_score END),
+               COUNT(CASE WHEN status = 'completed' THEN overall_score END)
+        FROM issue_scores
+    """
+    _SQL_SCORE_STATS = {
+        False: _SQL_SCORE_STATS_SELECT + "WHERE ignored = 0 GROUP BY status, content_type",
+        True: _SQL_SCORE_STATS_SELECT + "WHERE ignored = 0 AND repo_name = ? GROUP BY status, content_type"
+    }
+
+    # 唯讀連接池的最大連接數
+    READER_POOL_SIZE = 4
+
+    # 作者/專案統計結果的快取有效期（秒）；本實例有寫入時會提前失效
+    STATS_CACHE_TTL = 60
+
+    # 任務狀態計數的快取有效期（秒）
+    TASK_STATS_CACHE_TTL = 1
+
+    # 探測其他進程寫入（PRAGMA data_version）的最短間隔（秒），期間內的統計讀取共用上次的探測結果
+    STATS_VERSION_PROBE_INTERVAL = 0.5
+
+    # 從審查內容中提取常見問題的關鍵詞（關鍵詞一律以小寫比對）
+    ISSUE_PATTERNS = {
+        '程式碼品質': ['代碼質量', '代码质量', '程式碼品質', 'code quality'],
+        '命名規範': ['命名', 'naming', '變數名', '变量名'],
+        '錯誤處理': ['錯誤處理', '错误处理', 'error handling', '例外處理'],
+        '效能問題': ['效能', '性能', 'performance', '優化', '优化'],
+        '安全問題': ['安全', 'security', '漏洞', '风险'],
+        '測試覆蓋': ['測試', '测试', 'test', 'coverage'],
+        '註解不足': ['註解', '注释', 'comment', '文檔', '文档'],
+        '重複程式碼': ['重複', '重复', 'duplicate', 'DRY']
+    }
+
+    # 常見問題計數的 SQL：每個問題類型一個 COUNT 欄位，以 instr() 比對其任一關鍵詞。
+    # 有/無倉庫過濾的兩種語句在類別定義時固定，語句快取的鍵保持穩定
+    _ISSUE_COUNT_COLUMNS = ', '.join(
+        'COUNT(CASE WHEN ' + ' OR '.join(['instr(content, ?) > 0'] * len(keywords)) + ' THEN 1 END)'
+        for keywords in ISSUE_PATTERNS.values()
+    )
+    _ISSUE_KEYWORD_PARAMS = [keyword.lower() for keywords in ISSUE_PATTERNS.values() for keyword in keywords]
+
+    _SQL_ISSUES_BY_AUTHOR = f"""
+        SELECT {_ISSUE_COUNT_COLUMNS}
+        FROM (
+            SELECT lower(c.review_content) AS content
+            FROM review_tasks t
+            CROSS JOIN review_task_content c ON c.task_id = t.task_id
+            WHERE t.pr_author = ? AND t.status = 'completed' AND c.review_content IS NOT NULL
+            ORDER BY t.created_at DESC
+            LIMIT 10
+        )
+    """
+
+    _SQL_ISSUES_BY_AUTHOR_REPO = f"""
+        SELECT {_ISSUE_COUNT_COLUMNS}
+        FROM (
+            SELECT lower(c.review_content) AS content
+            FROM review_tasks t
+            CROSS JOIN review_task_content c ON c.task_id = t.task_id
+            WHERE t.pr_author = ? AND t.status = 'completed' AND c.review_content IS NOT NULL
+                  AND t.repo = ?
+            ORDER BY t.created_at DESC
+            LIMIT 10
+        )
+    """
+
+    # 高分審查中代表最佳實踐的正面評價關鍵詞
+    POSITIVE_PATTERNS = [
+        '程式碼清晰', '代碼清晰', 'clean code', 'well structured',
+        '良好的', '優秀的', '完整的測試', 'comprehensive test',
+        '詳細的註解', 'well documented', '命名清晰', 'clear naming',
+        '錯誤處理完善', 'proper error handling'
+    ]
+
+    # 正面關鍵詞的 SQL 比對條件（供最佳實踐表的觸發器與回填使用，關鍵詞以字面值嵌入）
+    POSITIVE_PATTERN_CONDITION = ' OR '.join(
+        "instr(lower(review_content), '{}') > 0".format(pattern.lower().replace("'", "''"))
+        for pattern in POSITIVE_PATTERNS
+    )
+
     def __init__(self, db_path: str = "/var/lib/github-monitor/tasks.db"):
         """
         初始化資料庫
@@ -25,17 +369,58 @@ class TaskDatabase:
         """
         self.db_path = db_path
         self.logger = logging.getLogger("TaskDatabase")
-        self.lock = threading.Lock()
+        # 寫入連接的互斥鎖（可重入，允許在持有寫入連接時嵌套調用其他寫入方法）
+        self.lock = threading.RLock()
+        self._writer = None
+        self._writer_depth = 0
+        self._writer_changes = 0
+        self._readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._reader_count_lock = threading.Lock()
+        self._webhook_inserts = 0
+        self._webhook_stats_rebuilt_at = time.monotonic()
+        self._deliveries_purged_at = time.monotonic()
+        self._stats_cache = {}
+        self._update_score_sql_cache = {}  # 更新欄位集合 -> (UPDATE 語句, 參數欄位順序)
+        # webhook 事件寫入佇列與背景寫入線程（首次記錄事件時才啟動）
+        self._webhook_queue = queue.Queue(maxsize=self.WEBHOOK_QUEUE_SIZE)
+        self._webhook_writer = None
+        self._webhook_writer_lock = threading.Lock()
+        self._webhook_writer_closed = False
+        self._webhook_write_failures = 0  # 背景寫入最終失敗而遺失的事件數（顯示於 get_webhook_stats）
+        self._data_version = 0  # 每次經由本實例寫入資料後遞增，用於使統計快取失效
+        # 探測其他進程提交的專用連接（PRAGMA data_version 只在同一連接上可比較）
+        self._version_conn = None
+        self._version_lock = threading.Lock()
+        self._external_version = (float('-inf'), 0)  # (探測時間, PRAGMA data_version)
+        # 並行執行互相獨立的讀取查詢（每個工作線程使用自己的連接，WAL 下讀取互不阻塞）
+        self._io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="TaskDatabaseIO")
 
         # 初始化資料庫
         self._init_database()
 
+        # 進程結束時刷新查詢規劃器統計並關閉連接
+        atexit.register(self.close)
+
     def _init_database(self):
         """創建資料表（如果不存在）"""
         try:
             with self._get_connection() as conn:
+                # 頁面大小與增量回收只能在建立第一個表之前設定（舊資料庫需經 compact() 轉換）
+                if conn.execute("PRAGMA page_count").fetchone()[0] == 0:
+                    conn.execute(f"PRAGMA page_size = {self.PAGE_SIZE}")
+                    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
+                # WAL 模式寫入資料庫文件後持續有效，只需在初始化時設定一次（記憶體資料庫不支援 WAL）
+                if self.db_path != ':memory:':
+                    conn.execute("PRAGMA journal_mode=WAL")
+
                 cursor = conn.cursor()
 
+                # 資料庫結構版本，用於跳過已完成的欄位遷移
+                cursor.execute("PRAGMA user_version")
+                schema_version = cursor.fetchone()[0]
+
                 # 創建任務表
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS review_tasks (
@@ -52,48 +437,28 @@ class TaskDatabase:
                         updated_at TEXT NOT NULL,
                         completed_at TEXT,
                         error_message TEXT,
-                        review_content TEXT,
+                        review_content TEXT,  -- 已搬移至 review_task_content，保留欄位以相容舊資料庫
                         score INTEGER,
                         review_comment_url TEXT
                     )
                 """)
 
-                # 為現有記錄添加 score 欄位（如果表已存在）
-                try:
-                    cursor.execute("ALTER TABLE review_tasks ADD COLUMN score INTEGER")
-                    self.logger.info("已為 review_tasks 表添加 score 欄位")
-                except Exception as e:
-                    # 欄位可能已存在，忽略錯誤
-                    pass
-
-                # 為現有記錄添加 review_comment_url 欄位（如果表已存在）
-                try:
-                    cursor.execute("ALTER TABLE review_tasks ADD COLUMN review_comment_url TEXT")
-                    self.logger.info("已為 review_tasks 表添加 review_comment_url 欄位")
-                except Exception as e:
-                    # 欄位可能已存在，忽略錯誤
-                    pass
-
-                # 為現有記錄添加 user_feedback 欄位（用於存儲用戶對審查的回應）
-                try:
-                    cursor.execute("ALTER TABLE review_tasks ADD COLUMN user_feedback TEXT")
-                    self.logger.info("已為 review_tasks 表添加 user_feedback 欄位")
-                except Exception as e:
-                    # 欄位可能已存在，忽略錯誤
-                    pass
-
-                # 為現有記錄添加 review_comment_id 欄位（用於追蹤評論 ID）
-                try:
-                    cursor.execute("ALTER TABLE review_tasks ADD COLUMN review_comment_id INTEGER")
-                    self.logger.info("已為 review_tasks 表添加 review_comment_id 欄位")
-                except Exception as e:
-                    # 欄位可能已存在，忽略錯誤
-                    pass
+                # 為現有表補上後來新增的欄位（只在結構版本落後時檢查）
+                if schema_version < self.SCHEMA_VERSION:
+                    self._ensure_columns(cursor, 'review_tasks', {
+                        'score': 'INTEGER',
+                        'review_comment_url': 'TEXT',
+                        'user_feedback': 'TEXT',  # 用於存儲用戶對審查的回應
+                        'review_comment_id': 'INTEGER'  # 用於追蹤評論 ID
+                    })
 
                 # 創建索引以加速查詢
+                # (status, created_at DESC) 讓按狀態篩選的最新 N 筆直接走索引範圍掃描，無需排序；
+                # 同時涵蓋原本單欄 idx_status 的用途
+                cursor.execute("DROP INDEX IF EXISTS idx_status")
                 cursor.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_status
-                    ON review_tasks(status)
+                    CREATE INDEX IF NOT EXISTS idx_status_created
+                    ON review_tasks(status, created_at DESC)
                 """)
 
                 cursor.execute("""
@@ -106,6 +471,152 @@ class TaskDatabase:
                     ON review_tasks(repo, pr_number)
                 """)
 
+                # 作者歷史統計的覆蓋索引（聚合查詢只需掃描索引，不回表）
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_tasks_author_hist
+                    ON review_tasks(pr_author, status, created_at DESC, score)
+                """)
+
+                # 專案最佳實踐查詢的部分索引（只索引已完成的任務，按分數排序免去臨時排序）
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_reviews_repo_score
+                    ON review_tasks(repo, score DESC, created_at DESC)
+                    WHERE status = 'completed'
+                """)
+
+                # 觸發器每次啟動時重建（見下方），先移除舊版，避免搬移審查內容時觸發
+                cursor.execute("DROP TRIGGER IF EXISTS trg_best_practices_insert")
+                cursor.execute("DROP TRIGGER IF EXISTS trg_best_practices_update")
+
+                # 創建審查內容表 - 大欄位獨立存放，保持 review_tasks 的行緊湊
+                cursor.execute("""
+                    SELECT 1 FROM sqlite_master
+                    WHERE type = 'table' AND name = 'review_task_content'
+                """)
+                task_content_exists = cursor.fetchone() is not None
+
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS review_task_content (
+                        task_id TEXT PRIMARY KEY,
+                        review_content TEXT
+                    )
+                """)
+
+                # 首次建表時，將舊記錄內嵌的審查內容搬移到審查內容表
+                if not task_content_exists:
+                    cursor.execute("""
+                        INSERT INTO review_task_content (task_id, review_content)
+                        SELECT task_id, review_content FROM review_tasks
+                        WHERE review_content IS NOT NULL
+                    """)
+                    if cursor.rowcount > 0:
+                        self.logger.info(f"已搬移 {cursor.rowcount} 筆審查內容到 review_task_content 表")
+                        cursor.execute("UPDATE review_tasks SET review_content = NULL WHERE review_content IS NOT NULL")
+
+                cursor.execute("""
+                    CREATE TRIGGER IF NOT EXISTS trg_task_content_delete
+                    AFTER DELETE ON review_tasks
+                    BEGIN
+                        DELETE FROM review_task_content WHERE task_id = OLD.task_id;
+                    END
+                """)
+
+                # 作者常見問題分析改為經由審查內容表篩選，舊的部分索引已不再使用
+                cursor.execute("DROP INDEX IF EXISTS idx_review_tasks_author")
+
+                # 創建專案最佳實踐表 - 由觸發器在寫入時比對正面關鍵詞，讀取時不再掃描審查內容
+                cursor.execute("""
+                    SELECT 1 FROM sqlite_master
+                    WHERE type = 'table' AND name = 'repo_best_practices'
+                """)
+                best_practices_exists = cursor.fetchone() is not None
+
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS repo_best_practices (
+                        task_id TEXT PRIMARY KEY,
+                        repo TEXT NOT NULL,
+                        pr_title TEXT,
+                        score INTEGER,
+                        created_at TEXT
+                    )
+                """)
+
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_best_practices_repo_score
+                    ON repo_best_practices(repo, score DESC, created_at DESC)
+                """)
+
+                # 觸發器每次啟動時重建，確保關鍵詞變更後立即生效
+                # 任務行變更時經由子查詢比對審查內容；審查內容變更時直接比對新內容
+                task_content_condition = f"""EXISTS (
+                    SELECT 1 FROM review_task_content c
+                    WHERE c.task_id = NEW.task_id
+                    AND ({self.POSITIVE_PATTERN_CONDITION.replace('review_content', 'c.review_content')})
+                )"""
+                new_content_condition = self.POSITIVE_PATTERN_CONDITION.replace(
+                    'review_content', 'NEW.review_content'
+                )
+                cursor.execute(f"""
+                    CREATE TRIGGER trg_best_practices_insert
+                    AFTER INSERT ON review_tasks
+                    WHEN NEW.status = 'completed' AND NEW.score >= 85
+                         AND {task_content_condition}
+                    BEGIN
+                        INSERT OR REPLACE INTO repo_best_practices (task_id, repo, pr_title, score, created_at)
+                        VALUES (NEW.task_id, NEW.repo, NEW.pr_title, NEW.score, NEW.created_at);
+                    END
+                """)
+
+                cursor.execute(f"""
+                    CREATE TRIGGER trg_best_practices_update
+                    AFTER UPDATE OF status, score, repo, pr_title, created_at ON review_tasks
+                    WHEN OLD.status IS NOT NEW.status OR OLD.score IS NOT NEW.score
+                         OR OLD.repo IS NOT NEW.repo OR OLD.pr_title IS NOT NEW.pr_title
+                         OR OLD.created_at IS NOT NEW.created_at
+                    BEGIN
+                        DELETE FROM repo_best_practices WHERE task_id = OLD.task_id;
+                        INSERT INTO repo_best_practices (task_id, repo, pr_title, score, created_at)
+                        SELECT NEW.task_id, NEW.repo, NEW.pr_title, NEW.score, NEW.created_at
+                        WHERE NEW.status = 'completed' AND NEW.score >= 85
+                              AND {task_content_condition};
+                    END
+                """)
+
+                for event in ('INSERT', 'UPDATE OF review_content'):
+                    trigger_name = 'trg_best_practices_content_' + event.split()[0].lower()
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {trigger_name}")
+                    cursor.execute(f"""
+                        CREATE TRIGGER {trigger_name}
+                        AFTER {event} ON review_task_content
+                        BEGIN
+                            DELETE FROM repo_best_practices WHERE task_id = NEW.task_id;
+                            INSERT INTO repo_best_practices (task_id, repo, pr_title, score, created_at)
+                            SELECT task_id, repo, pr_title, score, created_at
+                            FROM review_tasks
+                            WHERE task_id = NEW.task_id AND status = 'completed' AND score >= 85
+                                  AND ({new_content_condition});
+                        END
+                    """)
+
+                cursor.execute("""
+                    CREATE TRIGGER IF NOT EXISTS trg_best_practices_delete
+                    AFTER DELETE ON review_tasks
+                    BEGIN
+                        DELETE FROM repo_best_practices WHERE task_id = OLD.task_id;
+                    END
+                """)
+
+                # 首次建表時，從現有的審查記錄回填
+                if not best_practices_exists:
+                    cursor.execute(f"""
+                        INSERT INTO repo_best_practices (task_id, repo, pr_title, score, created_at)
+                        SELECT t.task_id, t.repo, t.pr_title, t.score, t.created_at
+                        FROM review_tasks t
+                        JOIN review_task_content c ON c.task_id = t.task_id
+                        WHERE t.status = 'completed' AND t.score >= 85
+                              AND ({self.POSITIVE_PATTERN_CONDITION.replace('review_content', 'c.review_content')})
+                    """)
+
                 # 創建 issue 複製記錄表
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS issue_copy_records (
@@ -137,9 +648,16 @@ class TaskDatabase:
                     ON issue_copy_records(source_repo, source_issue_number)
                 """)
 
+                cursor.execute("DROP INDEX IF EXISTS idx_copy_status")
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_copy_status_created
+                    ON issue_copy_records(status, created_at DESC)
+                """)
+
+                # 複製統計按目標 repo 分組計數成功記錄的覆蓋索引
                 cursor.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_copy_status
-                    ON issue_copy_records(status)
+                    CREATE INDEX IF NOT EXISTS idx_copy_status_target
+                    ON issue_copy_records(status, target_repo)
                 """)
 
                 # 創建唯一約束索引，防止同一個 issue 被重複複製到同一個目標 repo
@@ -177,6 +695,50 @@ class TaskDatabase:
                     ON comment_sync_records(source_repo, source_issue_number)
                 """)
 
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_sync_status_created
+                    ON comment_sync_records(status, created_at DESC)
+                """)
+
+                # 創建評論同步目標表（取代 synced_to_repos JSON 欄位）
+                cursor.execute("""
+                    SELECT 1 FROM sqlite_master
+                    WHERE type = 'table' AND name = 'comment_sync_targets'
+                """)
+                sync_targets_exists = cursor.fetchone() is not None
+
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS comment_sync_targets (
+                        sync_id TEXT NOT NULL,
+                        repo_name TEXT NOT NULL
+                    )
+                """)
+
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_sync_targets_sync
+                    ON comment_sync_targets(sync_id)
+                """)
+
+                # (repo_name, sync_id) 覆蓋「哪些同步記錄同步到某 repo」的查詢，無需回表
+                cursor.execute("DROP INDEX IF EXISTS idx_sync_targets_repo")
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_sync_targets_repo_sync
+                    ON comment_sync_targets(repo_name, sync_id)
+                """)
+
+                # 首次建表時，將舊記錄的 synced_to_repos JSON 遷移到目標表
+                if not sync_targets_exists:
+                    cursor.execute("""
+                        INSERT INTO comment_sync_targets (sync_id, repo_name)
+                        SELECT r.sync_id, j.value
+                        FROM comment_sync_records r,
+                             json_each(CASE WHEN json_valid(r.synced_to_repos)
+                                            THEN r.synced_to_repos ELSE '[]' END) j
+                        ORDER BY r.rowid, j.key
+                    """)
+                    if cursor.rowcount > 0:
+                        self.logger.info(f"已遷移 {cursor.rowcount} 筆評論同步目標到 comment_sync_targets 表")
+
                 # 創建 webhook 事件記錄表
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS webhook_events (
@@ -206,6 +768,98 @@ class TaskDatabase:
                     ON webhook_events(event_type, created_at DESC)
                 """)
 
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_webhook_status
+                    ON webhook_events(status, created_at DESC)
+                """)
+
+                # 事件列表預設只顯示我們處理的事件類型；部分索引只包含這些事件，
+                # 未指定類型時可按時間順序直接取前 N 筆，不需跳過 push 等其他事件
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_webhook_hot
+                    ON webhook_events(created_at DESC)
+                    WHERE event_type IN ('pull_request', 'issues', 'issue_comment')
+                """)
+
+                # 創建 webhook 統計計數表 - 由觸發器增量維護，避免每次全表聚合
+                cursor.execute("""
+                    SELECT 1 FROM sqlite_master
+                    WHERE type = 'table' AND name = 'webhook_stats'
+                """)
+                webhook_stats_exists = cursor.fetchone() is not None
+
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS webhook_stats (
+                        event_type TEXT NOT NULL,
+                        status TEXT NOT NULL,
+                        processed_by TEXT NOT NULL DEFAULT '',
+                        cnt INTEGER NOT NULL DEFAULT 0,
+                        PRIMARY KEY (event_type, status, processed_by)
+                    )
+                """)
+
+                # processed_by 為 NULL 時以空字串計數（主鍵中 NULL 互不衝突）
+                cursor.execute("""
+                    CREATE TRIGGER IF NOT EXISTS trg_webhook_stats_insert
+                    AFTER INSERT ON webhook_events
+                    BEGIN
+                        INSERT INTO webhook_stats (event_type, status, processed_by, cnt)
+                        VALUES (NEW.event_type, NEW.status, COALESCE(NEW.processed_by, ''), 1)
+                        ON CONFLICT (event_type, status, processed_by) DO UPDATE SET cnt = cnt + 1;
+                    END
+                """)
+
+                cursor.execute("""
+                    CREATE TRIGGER IF NOT EXISTS trg_webhook_stats_delete
+                    AFTER DELETE ON webhook_events
+                    BEGIN
+                        UPDATE webhook_stats SET cnt = cnt - 1
+                        WHERE event_type = OLD.event_type AND status = OLD.status
+                        AND processed_by = COALESCE(OLD.processed_by, '');
+                    END
+                """)
+
+                cursor.execute("""
+                    CREATE TRIGGER IF NOT EXISTS trg_webhook_stats_update
+                    AFTER UPDATE OF event_type, status, processed_by ON webhook_events
+                    BEGIN
+                        UPDATE webhook_stats SET cnt = cnt - 1
+                        WHERE event_type = OLD.event_type AND status = OLD.status
+                        AND processed_by = COALESCE(OLD.processed_by, '');
+                        INSERT INTO webhook_stats (event_type, status, processed_by, cnt)
+                        VALUES (NEW.event_type, NEW.status, COALESCE(NEW.processed_by, ''), 1)
+                        ON CONFLICT (event_type, status, processed_by) DO UPDATE SET cnt = cnt + 1;
+                    END
+                """)
+
+                if not webhook_stats_exists:
+                    self._rebuild_webhook_stats(cursor)
+
+                # 創建 webhook payload 表 - 大欄位獨立存放，保持 webhook_events 的行緊湊
+                cursor.execute("""
+                    SELECT 1 FROM sqlite_master
+                    WHERE type = 'table' AND name = 'webhook_event_payloads'
+                """)
+                payloads_exists = cursor.fetchone() is not None
+
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS webhook_event_payloads (
+                        event_id TEXT PRIMARY KEY,
+                        payload BLOB
+                    )
+                """)
+
+                # 首次建表時，將舊記錄內嵌的 payload 搬移到 payload 表
+                if not payloads_exists:
+                    cursor.execute("""
+                        INSERT INTO webhook_event_payloads (event_id, payload)
+                        SELECT event_id, payload FROM webhook_events
+                        WHERE payload IS NOT NULL
+                    """)
+                    if cursor.rowcount > 0:
+                        self.logger.info(f"已搬移 {cursor.rowcount} 筆 webhook payload 到 webhook_event_payloads 表")
+                        cursor.execute("UPDATE webhook_events SET payload = NULL WHERE payload IS NOT NULL")
+
                 # 創建 issue 品質評分記錄表
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS issue_scores (
@@ -254,26 +908,77 @@ class TaskDatabase:
                     ON issue_scores(repo_name, issue_number, created_at DESC)
                 """)
 
+                cursor.execute("DROP INDEX IF EXISTS idx_score_status")
                 cursor.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_score_status
-                    ON issue_scores(status)
+                    CREATE INDEX IF NOT EXISTS idx_score_status_created
+                    ON issue_scores(status, created_at DESC)
                 """)
 
-                # 為現有表添加 user_feedback 欄位（如果不存在）
-                try:
-                    cursor.execute("ALTER TABLE issue_scores ADD COLUMN user_feedback TEXT")
-                    self.logger.info("已為 issue_scores 表添加 user_feedback 欄位")
-                except Exception:
-                    # 欄位可能已存在，忽略錯誤
-                    pass
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_score_status_repo
+                    ON issue_scores(status, repo_name, created_at DESC)
+                """)
 
-                # 為現有表添加 ignored 欄位（如果不存在）
-                try:
-                    cursor.execute("ALTER TABLE issue_scores ADD COLUMN ignored BOOLEAN DEFAULT 0")
-                    self.logger.info("已為 issue_scores 表添加 ignored 欄位")
-                except Exception:
-                    # 欄位可能已存在，忽略錯誤
-                    pass
+                # 只包含有用戶反饋的評分（反饋分析按時間範圍統計時只掃描這些記錄）
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_score_feedback_created
+                    ON issue_scores(created_at)
+                    WHERE user_feedback IS NOT NULL AND user_feedback != ''
+                """)
+
+                # 為現有表補上後來新增的欄位
+                if schema_version < self.SCHEMA_VERSION:
+                    self._ensure_columns(cursor, 'issue_scores', {
+                        'user_feedback': 'TEXT',
+                        'ignored': 'BOOLEAN DEFAULT 0'
+                    })
+
+                # 將 ignored 正規化為非 NULL（0/1），查詢條件可簡化為 ignored = 0。
+                # SQLite 無法為既有欄位加上 NOT NULL，改以觸發器在寫入時補 0
+                cursor.execute("""
+                    SELECT 1 FROM sqlite_master
+                    WHERE type = 'trigger' AND name = 'trg_issue_scores_ignored_insert'
+                """)
+                ignored_triggers_exist = cursor.fetchone() is not None
+
+                cursor.execute("""
+                    CREATE TRIGGER IF NOT EXISTS trg_issue_scores_ignored_insert
+                    AFTER INSERT ON issue_scores
+                    WHEN NEW.ignored IS NULL
+                    BEGIN
+                        UPDATE issue_scores SET ignored = 0 WHERE rowid = NEW.rowid;
+                    END
+                """)
+
+                cursor.execute("""
+                    CREATE TRIGGER IF NOT EXISTS trg_issue_scores_ignored_update
+                    AFTER UPDATE OF ignored ON issue_scores
+                    WHEN NEW.ignored IS NULL
+                    BEGIN
+                        UPDATE issue_scores SET ignored = 0 WHERE rowid = NEW.rowid;
+                    END
+                """)
+
+                if not ignored_triggers_exist:
+                    cursor.execute("UPDATE issue_scores SET ignored = 0 WHERE ignored IS NULL")
+
+                # 作者歷史統計的覆蓋索引（包含所有被聚合的分數欄位與 content_type，
+                # 按內容類型分組也只需掃描索引）；取代舊的 idx_score_author_hist
+                cursor.execute("DROP INDEX IF EXISTS idx_score_author_hist")
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_issue_scores_author_hist
+                    ON issue_scores(author, status, ignored, created_at DESC, overall_score,
+                                    format_score, content_score, clarity_score, actionability_score,
+                                    content_type)
+                """)
+
+                # 未忽略的已完成評分的部分索引（按內容類型分組統計只掃描有效記錄；
+                # 尾端附帶 status/ignored 讓查詢可直接使用覆蓋索引）
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_issue_scores_active
+                    ON issue_scores(author, content_type, overall_score, status, ignored)
+                    WHERE status = 'completed' AND ignored = 0
+                """)
 
                 # 創建反饋分析模式表 - 用於學習循環
                 cursor.execute("""
@@ -325,164 +1030,593 @@ class TaskDatabase:
                     ON feedback_snapshots(snapshot_date DESC)
                 """)
 
+                # 創建反饋分析快取表 - 相同反饋文本與分數不重複調用 Claude
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS feedback_analysis_cache (
+                        cache_key TEXT PRIMARY KEY,
+                        result_json TEXT NOT NULL,
+                        created_at TEXT NOT NULL
+                    )
+                """)
+
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_feedback_cache_created
+                    ON feedback_analysis_cache(created_at)
+                """)
+
+                # 創建快照批量分析記錄表 - 已提交但尚未收取結果的 Message Batches，重啟後繼續輪詢
+                # requests_json: {custom_id: [分析快取鍵, 快照中暫用的關鍵詞情緒]}
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS feedback_snapshot_batches (
+                        batch_id TEXT PRIMARY KEY,
+                        snapshot_id TEXT NOT NULL,
+                        requests_json TEXT NOT NULL,
+                        created_at TEXT NOT NULL
+                    )
+                """)
+
+                # 創建 webhook delivery 去重表 - GitHub 重送的事件（相同 X-GitHub-Delivery）不重複處理
+                # done_targets: 部分轉發失敗時已成功的處理服務（逗號分隔），重送時只轉發其餘服務；NULL 表示已處理或處理中
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS seen_deliveries (
+                        delivery_id TEXT PRIMARY KEY,
+                        ts INTEGER NOT NULL,
+                        done_targets TEXT
+                    )
+                """)
+                self._ensure_columns(cursor, 'seen_deliveries', {'done_targets': 'TEXT'})
+
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_seen_deliveries_ts
+                    ON seen_deliveries(ts)
+                """)
+
+                conn.commit()
+
+                # 收集索引統計（sqlite_stat1），讓查詢規劃器選擇正確的索引
+                cursor.execute("""
+                    SELECT 1 FROM sqlite_master
+                    WHERE type = 'table' AND name = 'sqlite_stat1'
+                """)
+                if cursor.fetchone() is None:
+                    cursor.execute("ANALYZE")
+                else:
+                    # 新建立的索引尚無統計，先分析其所屬的表
+                    cursor.execute("""
+                        SELECT DISTINCT tbl_name FROM sqlite_master
+                        WHERE type = 'index'
+                        AND name NOT IN (SELECT idx FROM sqlite_stat1 WHERE idx IS NOT NULL)
+                    """)
+                    for (table,) in cursor.fetchall():
+                        cursor.execute(f"ANALYZE {table}")
+                    cursor.execute("PRAGMA optimize")
+
+                if schema_version < self.SCHEMA_VERSION:
+                    cursor.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
                 conn.commit()
+
                 self.logger.info(f"資料庫初始化完成: {self.db_path}")
 
         except Exception as e:
             self.logger.error(f"資料庫初始化失敗: {e}")
             raise
 
+    def _ensure_columns(self, cursor, table: str, wanted: Dict[str, str]):
+        """
+        為表補上缺少的欄位（以 PRAGMA table_info 檢查，不再逐一嘗試 ALTER TABLE）
+
+        Args:
+            cursor: 資料庫 cursor
+            table: 表名
+            wanted: 欄位名稱到欄位定義的映射
+        """
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing = {row[1] for row in cursor.fetchall()}
+
+        for name, decl in wanted.items():
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+                self.logger.info(f"已為 {table} 表添加 {name} 欄位")
+
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        """
+        建立並設定一個新的資料庫連接
+
+        Args:
+            read_only: 是否為唯讀連接（PRAGMA query_only）
+
+        Returns:
+            資料庫連接
+        """
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            isolation_level='IMMEDIATE',  # 寫入時 BEGIN IMMEDIATE，避免 WAL 下升級鎖時 SQLITE_BUSY
+            timeout=5.0,  # busy_timeout：並發寫入時等待鎖釋放，而非立即失敗
+            cached_statements=256
+        )
+        conn.row_factory = sqlite3.Row  # 使結果可以通過列名訪問
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # 讀取密集的聚合查詢：以 mmap 取代 read() 系統調用，加大頁面快取，臨時排序表放在記憶體
+        conn.execute(f"PRAGMA mmap_size={self.MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size=-{self.CACHE_SIZE_KIB}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        if read_only:
+            conn.execute("PRAGMA query_only=1")
+        return conn
+
     @contextmanager
     def _get_connection(self):
-        """獲取資料庫連接（上下文管理器）"""
-        conn = None
+        """獲取共用的讀寫資料庫連接（上下文管理器，同一時間只供一個線程使用）"""
+        with self.lock:
+            if self._writer is None:
+                self._writer = self._connect()
+            conn = self._writer
+
+            if self._writer_depth == 0:
+                self._writer_changes = conn.total_changes
+            self._writer_depth += 1
+            try:
+                yield conn
+            finally:
+                self._writer_depth -= 1
+                if self._writer_depth == 0:
+                    # 最外層離開時回滾未提交的交易，避免交易狀態洩漏給下一個使用者
+                    if conn.in_transaction:
+                        conn.rollback()
+                    # 有資料變更時遞增資料版本，使統計快取失效
+                    if conn.total_changes != self._writer_changes:
+                        self._data_version += 1
+
+    @contextmanager
+    def _reader_conn(self):
+        """從唯讀連接池借出一個連接（上下文管理器），WAL 模式下讀取不會被寫入阻塞"""
+        if self.db_path == ':memory:':
+            # 記憶體資料庫無法跨連接共用，讀取也使用寫入連接
+            with self._get_connection() as conn:
+                yield conn
+            return
+
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            with self._reader_count_lock:
+                create = self._reader_count < self.READER_POOL_SIZE
+                if create:
+                    self._reader_count += 1
+            if create:
+                try:
+                    conn = self._connect(read_only=True)
+                except Exception:
+                    with self._reader_count_lock:
+                        self._reader_count -= 1
+                    raise
+            else:
+                # 連接池已滿，等待其他線程歸還
+                conn = self._readers.get()
+
         try:
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            conn.row_factory = sqlite3.Row  # 使結果可以通過列名訪問
             yield conn
         finally:
-            if conn:
-                conn.close()
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
 
-    def create_task(self, task_data: Dict) -> bool:
-        """
-        創建新任務
+    def close(self):
+        """關閉所有資料庫連接；關閉前寫入佇列中的 webhook 事件並執行 PRAGMA optimize 以保持查詢規劃器統計最新"""
+        self._io_pool.shutdown(wait=False)
+        self._stop_webhook_writer()
+
+        with self.lock:
+            if self._writer is not None:
+                try:
+                    self._writer.execute("PRAGMA optimize")
+                except sqlite3.Error as e:
+                    # 可能因其他進程持有鎖而失敗，不影響關閉
+                    self.logger.warning(f"關閉前執行 PRAGMA optimize 失敗: {e}")
+                self._writer.close()
+                self._writer = None
+
+        while True:
+            try:
+                conn = self._readers.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._reader_count_lock:
+                self._reader_count -= 1
+
+        with self._version_lock:
+            if self._version_conn is not None:
+                self._version_conn.close()
+                self._version_conn = None
+
+    @staticmethod
+    def _fetch_dicts(cursor) -> List[Dict]:
+        """
+        取回查詢結果並轉為字典列表
+
+        欄位名稱只從 cursor.description 取一次，再以 dict(zip()) 組合 tuple 結果，
+        比逐行 dict(sqlite3.Row) 快。
 
         Args:
-            task_data: 任務數據字典
+            cursor: 已執行查詢的 cursor
 
         Returns:
-            是否成功
+            記錄列表
         """
+        columns = tuple(description[0] for description in cursor.description)
+        row_factory = cursor.row_factory
+        cursor.row_factory = None
         try:
-            with self.lock:
-                with self._get_connection() as conn:
-                    cursor = conn.cursor()
-
-                    cursor.execute("""
-                        INSERT INTO review_tasks (
-                            task_id, pr_number, repo, pr_title, pr_author,
-                            pr_url, status, progress, message, created_at, updated_at
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        task_data.get('pr_id') or task_data.get('task_id'),
-                        task_data.get('pr_number'),
-                        task_data.get('repo'),
-                        task_data.get('pr_title'),
-                        task_data.get('pr_author'),
-                        task_data.get('pr_url'),
-                        task_data.get('status', 'queued'),
-                        task_data.get('progress', 0),
-                        task_data.get('message', '等待處理'),
-                        task_data.get('created_at', datetime.now().isoformat()),
-                        task_data.get('updated_at', datetime.now().isoformat())
-                    ))
-
-                    conn.commit()
-                    self.logger.info(f"任務已創建: {task_data.get('pr_id')}")
-                    return True
-
-        except sqlite3.IntegrityError:
-            # 任務已存在，更新它
-            self.logger.warning(f"任務已存在，將更新: {task_data.get('pr_id')}")
-            return self.update_task(
-                task_data.get('pr_id') or task_data.get('task_id'),
-                task_data
-            )
-        except Exception as e:
-            self.logger.error(f"創建任務失敗: {e}")
-            return False
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        finally:
+            cursor.row_factory = row_factory
 
-    def update_task(self, task_id: str, updates: Dict) -> bool:
+    def compact(self) -> bool:
         """
-        更新任務狀態
+        以 PRAGMA page_size 與 VACUUM 重整資料庫，並啟用增量回收
 
-        Args:
-            task_id: 任務 ID
-            updates: 要更新的字段字典
+        VACUUM 需要獨佔資料庫，且切換頁面大小必須暫時離開 WAL 模式，
+        請在其他服務停止寫入的維護時段執行。
 
         Returns:
             是否成功
         """
-        try:
-            with self.lock:
-                with self._get_connection() as conn:
-                    cursor = conn.cursor()
-
-                    # 構建更新語句
-                    set_clauses = []
-                    values = []
-
-                    # 允許更新的字段
-                    updatable_fields = [
-                        'status', 'progress', 'message', 'pr_title',
-                        'pr_author', 'pr_url', 'error_message', 'review_content',
-                        'score', 'review_comment_url'
-                    ]
-
-                    for field in updatable_fields:
-                        if field in updates:
-                            set_clauses.append(f"{field} = ?")
-                            values.append(updates[field])
-
-                    # 總是更新 updated_at
-                    set_clauses.append("updated_at = ?")
-                    values.append(updates.get('updated_at', datetime.now().isoformat()))
-
-                    # 如果狀態為 completed，設置 completed_at
-                    if updates.get('status') == 'completed':
-                        set_clauses.append("completed_at = ?")
-                        values.append(datetime.now().isoformat())
-
-                    values.append(task_id)
-
-                    sql = f"""
-                        UPDATE review_tasks
-                        SET {', '.join(set_clauses)}
-                        WHERE task_id = ?
-                    """
-
-                    cursor.execute(sql, values)
-                    conn.commit()
+        if self.db_path == ':memory:':
+            return False
 
-                    if cursor.rowcount > 0:
-                        self.logger.debug(f"任務已更新: {task_id}")
-                        return True
-                    else:
-                        self.logger.warning(f"任務不存在: {task_id}")
-                        return False
+        with self._get_connection() as conn:
+            # 釋放閒置的唯讀連接，避免切換日誌模式時因其他連接而失敗
+            while True:
+                try:
+                    reader = self._readers.get_nowait()
+                except queue.Empty:
+                    break
+                reader.close()
+                with self._reader_count_lock:
+                    self._reader_count -= 1
+
+            try:
+                conn.execute("PRAGMA journal_mode=DELETE")
+                conn.execute(f"PRAGMA page_size = {self.PAGE_SIZE}")
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+                self.logger.info(f"資料庫已重整: {self.db_path}")
+                return True
 
-        except Exception as e:
-            self.logger.error(f"更新任務失敗: {e}")
-            return False
+            except Exception as e:
+                self.logger.error(f"重整資料庫失敗: {e}")
+                return False
 
-    def get_task(self, task_id: str) -> Optional[Dict]:
+            finally:
+                conn.execute("PRAGMA journal_mode=WAL")
+
+    def incremental_vacuum(self, pages: int = 0) -> int:
         """
-        獲取單個任務
+        歸還資料庫中的空閒頁面（僅在 auto_vacuum=INCREMENTAL 時有效，不需要完整 VACUUM 的獨佔鎖）
 
         Args:
-            task_id: 任務 ID
+            pages: 最多歸還的頁數，0 表示全部
 
         Returns:
-            任務數據字典或 None
+            歸還前的空閒頁數
         """
         try:
             with self._get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT * FROM review_tasks WHERE task_id = ?
-                """, (task_id,))
-
-                row = cursor.fetchone()
-                if row:
-                    return dict(row)
-                return None
+                freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if freelist_count > 0:
+                    # incremental_vacuum 每次 step 只歸還一頁，execute() 只 step 一次；
+                    # executescript 會把語句執行到結束（此時沒有未提交的交易）
+                    conn.executescript(f"PRAGMA incremental_vacuum({int(pages)})")
+                return freelist_count
 
         except Exception as e:
-            self.logger.error(f"獲取任務失敗: {e}")
-            return None
+            self.logger.warning(f"增量回收空閒頁面失敗: {e}")
+            return 0
 
-    def get_all_tasks(self, limit: int = 100, status: Optional[str] = None) -> List[Dict]:
+    def _stats_version(self) -> tuple:
+        """
+        統計快取使用的資料版本
+
+        本實例的寫入由 _data_version 追蹤；共用同一資料庫文件的其他進程（如 issue-scorer 寫入
+        issue_scores）提交時，專用連接上的 PRAGMA data_version 會改變，快取隨之失效。
+        探測結果在 STATS_VERSION_PROBE_INTERVAL 秒內重用，讀取統計時不必每次排隊探測。
+
+        Returns:
+            (本實例寫入版本, PRAGMA data_version)
+        """
+        if self.db_path == ':memory:':
+            return (self._data_version, 0)
+
+        probed_at, external = self._external_version
+        if time.monotonic() - probed_at < self.STATS_VERSION_PROBE_INTERVAL:
+            return (self._data_version, external)
+
+        try:
+            with self._version_lock:
+                # 等待鎖期間其他線程可能已完成探測
+                probed_at, external = self._external_version
+                now = time.monotonic()
+                if now - probed_at >= self.STATS_VERSION_PROBE_INTERVAL:
+                    if self._version_conn is None:
+                        self._version_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                    external = self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+                    self._external_version = (now, external)
+        except sqlite3.Error as e:
+            # 無法探測時使用不會與快取相符的版本，等同不使用快取
+            self.logger.warning(f"讀取 PRAGMA data_version 失敗: {e}")
+            external = object()
+        return (self._data_version, external)
+
+    def _get_cached_stats(self, key: tuple, version: tuple):
+        """
+        讀取統計快取
+
+        Args:
+            key: 快取鍵
+            version: 目前的資料版本
+
+        Returns:
+            快取的結果；不存在、已過期或資料已變更時返回 None
+        """
+        entry = self._stats_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, cached_version, value = entry
+        if cached_version != version or expires_at < time.monotonic():
+            return None
+        return value
+
+    def _set_cached_stats(self, key: tuple, version: tuple, value, ttl: Optional[float] = None):
+        """
+        寫入統計快取
+
+        Args:
+            key: 快取鍵
+            version: 開始計算時的資料版本
+            value: 計算結果
+            ttl: 有效期（秒），預設為 STATS_CACHE_TTL
+        """
+        if len(self._stats_cache) >= 1024:
+            self._stats_cache.clear()
+        if ttl is None:
+            ttl = self.STATS_CACHE_TTL
+        self._stats_cache[key] = (time.monotonic() + ttl, version, value)
+
+    def create_task(self, task_data: Dict) -> bool:
+        """
+        創建新任務
+
+        Args:
+            task_data: 任務數據字典
+
+        Returns:
+            是否成功
+        """
+        try:
+            # 插入參數之後接上任務已存在時使用的更新參數（共用同一個時間戳）
+            now = datetime.now().isoformat()
+            row = self._task_row(task_data, now) + tuple(self._task_update_values(task_data, now))
+            task_id = row[0]
+
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+
+                cursor.execute(self._SQL_UPSERT_TASK, row)
+
+                if 'review_content' in task_data:
+                    self._upsert_task_content(cursor, task_id, task_data['review_content'])
+
+                conn.commit()
+                self.logger.info(f"任務已創建: {task_id}")
+                return True
+
+        except Exception as e:
+            self.logger.error(f"創建任務失敗: {e}")
+            return False
+
+    def create_tasks_bulk(self, tasks: List[Dict]) -> int:
+        """
+        在單一交易中批量創建任務（已存在的任務會被跳過，不會更新）
+
+        Args:
+            tasks: 任務數據字典列表
+
+        Returns:
+            實際創建的任務數量
+        """
+        if not tasks:
+            return 0
+
+        try:
+            # 逐筆取時間戳（微秒精度），保持任務的建立順序
+            rows = [self._task_row(task_data, datetime.now().isoformat()) for task_data in tasks]
+
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+
+                cursor.executemany(self._SQL_INSERT_TASK_IGNORE, rows)
+                created = cursor.rowcount
+
+                conn.commit()
+                self.logger.info(f"批量創建任務: {created}/{len(rows)}")
+                return created
+
+        except Exception as e:
+            self.logger.error(f"批量創建任務失敗: {e}")
+            return 0
+
+    @staticmethod
+    def _task_row(task_data: Dict, now: str) -> tuple:
+        """將任務數據字典轉為 review_tasks 的插入參數"""
+        return (
+            task_data.get('pr_id') or task_data.get('task_id'),
+            task_data.get('pr_number'),
+            task_data.get('repo'),
+            task_data.get('pr_title'),
+            task_data.get('pr_author'),
+            task_data.get('pr_url'),
+            task_data.get('status', 'queued'),
+            task_data.get('progress', 0),
+            task_data.get('message', '等待處理'),
+            task_data.get('created_at', now),
+            task_data.get('updated_at', now)
+        )
+
+    def update_task(self, task_id: str, updates: Dict) -> bool:
+        """
+        更新任務狀態
+
+        Args:
+            task_id: 任務 ID
+            updates: 要更新的字段字典
+
+        Returns:
+            是否成功
+        """
+        try:
+            # 在取得連接之前準備參數
+            values = self._task_update_values(updates, datetime.now().isoformat())
+            values.append(task_id)
+
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+
+                cursor.execute(self._SQL_UPDATE_TASK, values)
+
+                if cursor.rowcount == 0:
+                    self.logger.warning(f"任務不存在: {task_id}")
+                    return False
+
+                if 'review_content' in updates:
+                    self._upsert_task_content(cursor, task_id, updates['review_content'])
+
+                conn.commit()
+                self.logger.debug(f"任務已更新: {task_id}")
+                return True
+
+        except Exception as e:
+            self.logger.error(f"更新任務失敗: {e}")
+            return False
+
+    def _task_update_values(self, updates: Dict, now: str) -> list:
+        """
+        產生 _TASK_UPDATE_ASSIGNMENTS 的參數
+
+        每個允許更新的欄位傳入（是否更新, 新值）兩個參數，接著是 updated_at
+        與 completed_at（是否設置, 時間）。
+
+        Args:
+            updates: 要更新的字段字典
+            now: 當前時間（ISO 格式）
+
+        Returns:
+            參數列表
+        """
+        values = []
+        for field in self._TASK_UPDATABLE_FIELDS:
+            values.append(field in updates)
+            values.append(updates.get(field))
+
+        # 總是更新 updated_at
+        values.append(updates.get('updated_at', now))
+
+        # 如果狀態為 completed，設置 completed_at
+        values.append(updates.get('status') == 'completed')
+        values.append(now)
+        return values
+
+    def _upsert_task_content(self, cursor, task_id: str, review_content: Optional[str]):
+        """將審查內容寫入獨立的審查內容表"""
+        cursor.execute(self._SQL_UPSERT_TASK_CONTENT, (task_id, review_content))
+
+    def get_task(self, task_id: str) -> Optional[Dict]:
+        """
+        獲取單個任務
+
+        Args:
+            task_id: 任務 ID
+
+        Returns:
+            任務數據字典或 None
+        """
+        try:
+            with self._reader_conn() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"""
+                    SELECT {self._TASK_COLUMNS} FROM review_tasks WHERE task_id = ?
+                """, (task_id,))
+
+                row = cursor.fetchone()
+                if row:
+                    return dict(row)
+                return None
+
+        except Exception as e:
+            self.logger.error(f"獲取任務失敗: {e}")
+            return None
+
+    def get_task_status(self, task_id: str) -> Optional[Dict]:
+        """
+        獲取單個任務的進度狀態（輪詢用，只讀取狀態相關欄位）
+
+        Args:
+            task_id: 任務 ID
+
+        Returns:
+            包含 task_id、status、progress、message、updated_at、completed_at、score 的字典或 None
+        """
+        try:
+            with self._reader_conn() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"""
+                    SELECT {self._TASK_STATUS_COLUMNS} FROM review_tasks WHERE task_id = ?
+                """, (task_id,))
+
+                row = cursor.fetchone()
+                if row:
+                    return dict(row)
+                return None
+
+        except Exception as e:
+            self.logger.error(f"獲取任務狀態失敗: {e}")
+            return None
+
+    def get_task_with_content(self, task_id: str) -> Optional[Dict]:
+        """
+        獲取單個任務（包含審查內容）
+
+        Args:
+            task_id: 任務 ID
+
+        Returns:
+            任務數據字典或 None
+        """
+        try:
+            with self._reader_conn() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"""
+                    SELECT {self._TASK_COLUMNS},
+                           COALESCE(
+                               (SELECT c.review_content FROM review_task_content c
+                                WHERE c.task_id = review_tasks.task_id),
+                               review_content
+                           ) AS review_content
+                    FROM review_tasks
+                    WHERE task_id = ?
+                """, (task_id,))
+
+                row = cursor.fetchone()
+                if row:
+                    return dict(row)
+                return None
+
+        except Exception as e:
+            self.logger.error(f"獲取任務失敗: {e}")
+            return None
+
+    def get_all_tasks(self, limit: int = 100, status: Optional[str] = None) -> List[Dict]:
         """
         獲取所有任務
 
@@ -494,29 +1628,52 @@ class TaskDatabase:
             任務列表
         """
         try:
-            with self._get_connection() as conn:
+            with self._reader_conn() as conn:
                 cursor = conn.cursor()
+                self._execute_all_tasks(cursor, limit, status)
+                return self._fetch_dicts(cursor)
 
-                if status:
-                    cursor.execute("""
-                        SELECT * FROM review_tasks
-                        WHERE status = ?
-                        ORDER BY created_at DESC
-                        LIMIT ?
-                    """, (status, limit))
-                else:
-                    cursor.execute("""
-                        SELECT * FROM review_tasks
-                        ORDER BY created_at DESC
-                        LIMIT ?
-                    """, (limit,))
+        except Exception as e:
+            self.logger.error(f"獲取任務列表失敗: {e}")
+            return []
+
+    def iter_all_tasks(self, limit: int = 100, status: Optional[str] = None):
+        """
+        逐筆迭代任務（匯出大量任務時使用，不一次載入全部結果）
 
-                rows = cursor.fetchall()
-                return [dict(row) for row in rows]
+        迭代期間會佔用一個唯讀連接，請完整迭代或關閉生成器。
+
+        Args:
+            limit: 返回的最大任務數
+            status: 可選的狀態過濾
+
+        Yields:
+            sqlite3.Row（支援索引與欄位名存取，需要字典時再以 dict() 轉換）
+        """
+        try:
+            with self._reader_conn() as conn:
+                cursor = conn.cursor()
+                self._execute_all_tasks(cursor, limit, status)
+                yield from cursor
 
         except Exception as e:
             self.logger.error(f"獲取任務列表失敗: {e}")
-            return []
+
+    def _execute_all_tasks(self, cursor, limit: int, status: Optional[str]):
+        """執行任務列表查詢（按建立時間倒序，可選狀態過濾）"""
+        if status:
+            cursor.execute(f"""
+                SELECT {self._TASK_COLUMNS} FROM review_tasks
+                WHERE status = ?
+                ORDER BY created_at DESC
+                LIMIT ?
+            """, (status, limit))
+        else:
+            cursor.execute(f"""
+                SELECT {self._TASK_COLUMNS} FROM review_tasks
+                ORDER BY created_at DESC
+                LIMIT ?
+            """, (limit,))
 
     def get_task_stats(self) -> Dict:
         """
@@ -526,28 +1683,35 @@ class TaskDatabase:
             統計數據字典
         """
         try:
-            with self._get_connection() as conn:
+            # 儀表板頻繁輪詢，使用極短的快取；本實例有寫入時立即失效
+            cache_key = ('task_stats',)
+            version = self._stats_version()
+            cached = self._get_cached_stats(cache_key, version)
+            if cached is not None:
+                return dict(cached)
+
+            with self._reader_conn() as conn:
                 cursor = conn.cursor()
 
+                # 每個狀態一個子查詢，各自只在 idx_status_created 上做範圍計數，不掃描整張表
                 cursor.execute("""
                     SELECT
-                        status,
-                        COUNT(*) as count
-                    FROM review_tasks
-                    GROUP BY status
+                        (SELECT COUNT(*) FROM review_tasks WHERE status = 'queued'),
+                        (SELECT COUNT(*) FROM review_tasks WHERE status = 'processing'),
+                        (SELECT COUNT(*) FROM review_tasks WHERE status = 'completed'),
+                        (SELECT COUNT(*) FROM review_tasks WHERE status = 'failed')
                 """)
 
+                queued, processing, completed, failed = cursor.fetchone()
                 stats = {
-                    'queued': 0,
-                    'processing': 0,
-                    'completed': 0,
-                    'failed': 0
+                    'queued': queued,
+                    'processing': processing,
+                    'completed': completed,
+                    'failed': failed
                 }
 
-                for row in cursor.fetchall():
-                    stats[row['status']] = row['count']
-
-                return stats
+                self._set_cached_stats(cache_key, version, stats, ttl=self.TASK_STATS_CACHE_TTL)
+                return dict(stats)
 
         except Exception as e:
             self.logger.error(f"獲取統計失敗: {e}")
@@ -564,26 +1728,27 @@ class TaskDatabase:
             刪除的任務數
         """
         try:
-            with self.lock:
-                with self._get_connection() as conn:
-                    cursor = conn.cursor()
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
 
-                    # 計算日期閾值
-                    from datetime import timedelta
-                    threshold = (datetime.now() - timedelta(days=days)).isoformat()
+                # 計算日期閾值
+                from datetime import timedelta
+                threshold = (datetime.now() - timedelta(days=days)).isoformat()
 
-                    cursor.execute("""
-                        DELETE FROM review_tasks
-                        WHERE created_at < ? AND status IN ('completed', 'failed')
-                    """, (threshold,))
+                cursor.execute("""
+                    DELETE FROM review_tasks
+                    WHERE created_at < ? AND status IN ('completed', 'failed')
+                """, (threshold,))
 
-                    deleted_count = cursor.rowcount
-                    conn.commit()
+                deleted_count = cursor.rowcount
+                conn.commit()
 
-                    if deleted_count > 0:
-                        self.logger.info(f"已刪除 {deleted_count} 個舊任務")
+                if deleted_count > 0:
+                    self.logger.info(f"已刪除 {deleted_count} 個舊任務")
+                    # 歸還刪除後產生的空閒頁面
+                    self.incremental_vacuum()
 
-                    return deleted_count
+                return deleted_count
 
         except Exception as e:
             self.logger.error(f"刪除舊任務失敗: {e}")
@@ -604,39 +1769,14 @@ class TaskDatabase:
             匹配的任務列表
         """
         try:
-            with self._get_connection() as conn:
+            with self._reader_conn() as conn:
                 cursor = conn.cursor()
 
-                conditions = []
-                values = []
+                filters = (repo, pr_number, pr_author)
+                sql = self._SQL_SEARCH_TASKS[tuple(bool(value) for value in filters)]
+                cursor.execute(sql, [value for value in filters if value])
 
-                if repo:
-                    conditions.append("repo = ?")
-                    values.append(repo)
-
-                if pr_number:
-                    conditions.append("pr_number = ?")
-                    values.append(pr_number)
-
-                if pr_author:
-                    conditions.append("pr_author = ?")
-                    values.append(pr_author)
-
-                if conditions:
-                    sql = f"""
-                        SELECT * FROM review_tasks
-                        WHERE {' AND '.join(conditions)}
-                        ORDER BY created_at DESC
-                    """
-                    cursor.execute(sql, values)
-                else:
-                    cursor.execute("""
-                        SELECT * FROM review_tasks
-                        ORDER BY created_at DESC
-                    """)
-
-                rows = cursor.fetchall()
-                return [dict(row) for row in rows]
+                return self._fetch_dicts(cursor)
 
         except Exception as e:
             self.logger.error(f"搜索任務失敗: {e}")
@@ -655,53 +1795,81 @@ class TaskDatabase:
             是否成功（如果因唯一約束而失敗，也返回 False，表示已存在）
         """
         try:
-            with self.lock:
-                with self._get_connection() as conn:
-                    cursor = conn.cursor()
+            row = self._copy_record_row(record_data, datetime.now().isoformat())
 
-                    # 將 labels 列表轉為 JSON 字符串
-                    labels_json = json.dumps(record_data.get('source_labels', []))
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
 
-                    cursor.execute("""
-                        INSERT INTO issue_copy_records (
-                            record_id, source_repo, source_issue_number,
-                            source_issue_title, source_issue_url, source_labels,
-                            target_repo, target_issue_number, target_issue_url,
-                            status, error_message, images_count, created_at, completed_at
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        record_data.get('record_id'),
-                        record_data.get('source_repo'),
-                        record_data.get('source_issue_number'),
-                        record_data.get('source_issue_title'),
-                        record_data.get('source_issue_url'),
-                        labels_json,
-                        record_data.get('target_repo'),
-                        record_data.get('target_issue_number'),
-                        record_data.get('target_issue_url'),
-                        record_data.get('status', 'pending'),
-                        record_data.get('error_message'),
-                        record_data.get('images_count', 0),
-                        record_data.get('created_at', datetime.now().isoformat()),
-                        record_data.get('completed_at')
-                    ))
+                cursor.execute(self._SQL_INSERT_COPY_RECORD, row)
 
-                    conn.commit()
-                    self.logger.info(f"複製記錄已創建: {record_data.get('record_id')}")
-                    return True
+                # 唯一約束衝突時不插入，說明已經有相同的複製記錄
+                if cursor.rowcount == 0:
+                    self.logger.warning(f"複製記錄已存在（避免重複）: {record_data.get('source_repo')}#{record_data.get('source_issue_number')} -> {record_data.get('target_repo')}")
+                    return False
+
+                conn.commit()
+                self.logger.info(f"複製記錄已創建: {record_data.get('record_id')}")
+                return True
 
         except sqlite3.IntegrityError as e:
-            # 唯一約束衝突，說明已經有相同的複製記錄
-            if "idx_copy_unique_source_target" in str(e) or "UNIQUE constraint failed" in str(e):
-                self.logger.warning(f"複製記錄已存在（避免重複）: {record_data.get('source_repo')}#{record_data.get('source_issue_number')} -> {record_data.get('target_repo')}")
-                return False
-            else:
-                self.logger.error(f"創建複製記錄失敗（IntegrityError）: {e}")
-                return False
+            self.logger.error(f"創建複製記錄失敗（IntegrityError）: {e}")
+            return False
         except Exception as e:
             self.logger.error(f"創建複製記錄失敗: {e}")
             return False
 
+    def create_copy_records_bulk(self, records: List[Dict]) -> int:
+        """
+        在單一交易中批量創建 issue 複製記錄（違反唯一約束的記錄會被跳過）
+
+        Args:
+            records: 記錄數據字典列表
+
+        Returns:
+            實際創建的記錄數量
+        """
+        if not records:
+            return 0
+
+        try:
+            # 在取得鎖之前完成參數轉換（包含 labels 的 JSON 編碼）
+            rows = [self._copy_record_row(record_data, datetime.now().isoformat()) for record_data in records]
+
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+
+                cursor.executemany(self._SQL_INSERT_COPY_RECORD_IGNORE, rows)
+                created = cursor.rowcount
+
+                conn.commit()
+                self.logger.info(f"批量創建複製記錄: {created}/{len(rows)}")
+                return created
+
+        except Exception as e:
+            self.logger.error(f"批量創建複製記錄失敗: {e}")
+            return 0
+
+    @staticmethod
+    def _copy_record_row(record_data: Dict, now: str) -> tuple:
+        """將複製記錄數據字典轉為 issue_copy_records 的插入參數"""
+        return (
+            record_data.get('record_id'),
+            record_data.get('source_repo'),
+            record_data.get('source_issue_number'),
+            record_data.get('source_issue_title'),
+            record_data.get('source_issue_url'),
+            # 將 labels 列表轉為 JSON 字符串
+            json.dumps(record_data.get('source_labels', [])),
+            record_data.get('target_repo'),
+            record_data.get('target_issue_number'),
+            record_data.get('target_issue_url'),
+            record_data.get('status', 'pending'),
+            record_data.get('error_message'),
+            record_data.get('images_count', 0),
+            record_data.get('created_at', now),
+            record_data.get('completed_at')
+        )
+
     def update_copy_record(self, record_id: str, updates: Dict) -> bool:
         """
         更新複製記錄
@@ -714,91 +1882,70 @@ class TaskDatabase:
             是否成功
         """
         try:
-            with self.lock:
-                with self._get_connection() as conn:
-                    cursor = conn.cursor()
+            # 在取得連接之前準備參數：每個允許更新的欄位傳入（是否更新, 新值）兩個參數
+            values = []
+            for field in self._COPY_RECORD_UPDATABLE_FIELDS:
+                values.append(field in updates)
+                values.append(updates.get(field))
 
-                    set_clauses = []
-                    values = []
+            # 如果狀態為 success，設置 completed_at
+            values.append(updates.get('status') in ['success', 'failed'])
+            values.append(datetime.now().isoformat())
 
-                    updatable_fields = [
-                        'target_issue_number', 'target_issue_url', 'status',
-                        'error_message', 'images_count'
-                    ]
+            values.append(record_id)
 
-                    for field in updatable_fields:
-                        if field in updates:
-                            set_clauses.append(f"{field} = ?")
-                            values.append(updates[field])
-
-                    # 如果狀態為 success，設置 completed_at
-                    if updates.get('status') in ['success', 'failed']:
-                        set_clauses.append("completed_at = ?")
-                        values.append(datetime.now().isoformat())
-
-                    values.append(record_id)
-
-                    sql = f"""
-                        UPDATE issue_copy_records
-                        SET {', '.join(set_clauses)}
-                        WHERE record_id = ?
-                    """
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
 
-                    cursor.execute(sql, values)
-                    conn.commit()
+                cursor.execute(self._SQL_UPDATE_COPY_RECORD, values)
+                conn.commit()
 
-                    if cursor.rowcount > 0:
-                        self.logger.debug(f"複製記錄已更新: {record_id}")
-                        return True
-                    else:
-                        self.logger.warning(f"複製記錄不存在: {record_id}")
-                        return False
+                if cursor.rowcount > 0:
+                    self.logger.debug(f"複製記錄已更新: {record_id}")
+                    return True
+                else:
+                    self.logger.warning(f"複製記錄不存在: {record_id}")
+                    return False
 
         except Exception as e:
             self.logger.error(f"更新複製記錄失敗: {e}")
             return False
 
-    def get_copy_records(self, limit: int = 100, status: Optional[str] = None) -> List[Dict]:
+    def get_copy_records(self, limit: int = 100, status: Optional[str] = None,
+                         include_labels: bool = True) -> List[Dict]:
         """
         獲取複製記錄列表
 
         Args:
             limit: 返回的最大記錄數
             status: 可選的狀態過濾
+            include_labels: 是否讀取並解析 source_labels
 
         Returns:
             記錄列表
         """
         try:
-            with self._get_connection() as conn:
+            with self._reader_conn() as conn:
                 cursor = conn.cursor()
 
+                columns = '*' if include_labels else self._COPY_RECORD_COLUMNS_NO_LABELS
+
                 if status:
-                    cursor.execute("""
-                        SELECT * FROM issue_copy_records
+                    cursor.execute(f"""
+                        SELECT {columns} FROM issue_copy_records
                         WHERE status = ?
                         ORDER BY created_at DESC
                         LIMIT ?
                     """, (status, limit))
                 else:
-                    cursor.execute("""
-                        SELECT * FROM issue_copy_records
+                    cursor.execute(f"""
+                        SELECT {columns} FROM issue_copy_records
                         ORDER BY created_at DESC
                         LIMIT ?
                     """, (limit,))
 
-                rows = cursor.fetchall()
-                records = []
-                for row in rows:
-                    record = dict(row)
-                    # 將 labels JSON 字符串轉回列表
-                    try:
-                        record['source_labels'] = json.loads(record.get('source_labels', '[]'))
-                    except:
-                        record['source_labels'] = []
-                    records.append(record)
-
-                return records
+                records = self._fetch_dicts(cursor)
+                return self._decode_copy_records(records) if include_labels else records
 
         except Exception as e:
             self.logger.error(f"獲取複製記錄失敗: {e}")
@@ -812,53 +1959,50 @@ class TaskDatabase:
             統計數據字典
         """
         try:
-            with self._get_connection() as conn:
+            with self._reader_conn() as conn:
                 cursor = conn.cursor()
 
-                # 總體統計
+                # 總體統計與按來源／目標 repo 的分組計數合併為一次查詢
+                # （分組計數分別走 idx_copy_source 與 idx_copy_status_target 覆蓋索引）
                 cursor.execute("""
-                    SELECT
-                        COUNT(*) as total,
-                        SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END) as success,
-                        SUM(CASE WHEN status = 'failed' THEN 1 ELSE 0 END) as failed,
-                        SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END) as pending,
-                        SUM(images_count) as total_images
+                    SELECT 'total' AS kind, NULL AS repo, COUNT(*) AS count,
+                           SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END) AS success,
+                           SUM(CASE WHEN status = 'failed' THEN 1 ELSE 0 END) AS failed,
+                           SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END) AS pending,
+                           SUM(images_count) AS total_images
                     FROM issue_copy_records
-                """)
-
-                row = cursor.fetchone()
-                stats = {
-                    'total': row['total'] or 0,
-                    'success': row['success'] or 0,
-                    'failed': row['failed'] or 0,
-                    'pending': row['pending'] or 0,
-                    'total_images': row['total_images'] or 0
-                }
-
-                # 按來源 repo 統計
-                cursor.execute("""
-                    SELECT source_repo, COUNT(*) as count
+                    UNION ALL
+                    SELECT 'source', source_repo, COUNT(*), NULL, NULL, NULL, NULL
                     FROM issue_copy_records
                     GROUP BY source_repo
-                    ORDER BY count DESC
-                """)
-
-                stats['by_source_repo'] = {}
-                for row in cursor.fetchall():
-                    stats['by_source_repo'][row['source_repo']] = row['count']
-
-                # 按目標 repo 統計
-                cursor.execute("""
-                    SELECT target_repo, COUNT(*) as count
+                    UNION ALL
+                    SELECT 'target', target_repo, COUNT(*), NULL, NULL, NULL, NULL
                     FROM issue_copy_records
                     WHERE status = 'success'
                     GROUP BY target_repo
-                    ORDER BY count DESC
+                    ORDER BY kind, count DESC
                 """)
 
-                stats['by_target_repo'] = {}
-                for row in cursor.fetchall():
-                    stats['by_target_repo'][row['target_repo']] = row['count']
+                stats = {
+                    'total': 0,
+                    'success': 0,
+                    'failed': 0,
+                    'pending': 0,
+                    'total_images': 0,
+                    'by_source_repo': {},
+                    'by_target_repo': {}
+                }
+                for kind, repo, count, success, failed, pending, total_images in cursor:
+                    if kind == 'total':
+                        stats['total'] = count or 0
+                        stats['success'] = success or 0
+                        stats['failed'] = failed or 0
+                        stats['pending'] = pending or 0
+                        stats['total_images'] = total_images or 0
+                    elif kind == 'source':
+                        stats['by_source_repo'][repo] = count
+                    else:
+                        stats['by_target_repo'][repo] = count
 
                 return stats
 
@@ -876,7 +2020,8 @@ class TaskDatabase:
 
     def search_copy_records(self, source_repo: Optional[str] = None,
                            target_repo: Optional[str] = None,
-                           source_issue_number: Optional[int] = None) -> List[Dict]:
+                           source_issue_number: Optional[int] = None,
+                           include_labels: bool = True) -> List[Dict]:
         """
         搜索複製記錄
 
@@ -884,58 +2029,50 @@ class TaskDatabase:
             source_repo: 來源倉庫
             target_repo: 目標倉庫
             source_issue_number: 來源 issue 編號
+            include_labels: 是否讀取並解析 source_labels
 
         Returns:
             匹配的記錄列表
         """
         try:
-            with self._get_connection() as conn:
+            with self._reader_conn() as conn:
                 cursor = conn.cursor()
 
-                conditions = []
-                values = []
-
-                if source_repo:
-                    conditions.append("source_repo = ?")
-                    values.append(source_repo)
-
-                if target_repo:
-                    conditions.append("target_repo = ?")
-                    values.append(target_repo)
+                filters = (source_repo, target_repo, source_issue_number)
+                sql = self._SQL_SEARCH_COPY_RECORDS[bool(include_labels)][tuple(bool(value) for value in filters)]
+                cursor.execute(sql, [value for value in filters if value])
 
-                if source_issue_number:
-                    conditions.append("source_issue_number = ?")
-                    values.append(source_issue_number)
-
-                if conditions:
-                    sql = f"""
-                        SELECT * FROM issue_copy_records
-                        WHERE {' AND '.join(conditions)}
-                        ORDER BY created_at DESC
-                    """
-                    cursor.execute(sql, values)
-                else:
-                    cursor.execute("""
-                        SELECT * FROM issue_copy_records
-                        ORDER BY created_at DESC
-                    """)
-
-                rows = cursor.fetchall()
-                records = []
-                for row in rows:
-                    record = dict(row)
-                    try:
-                        record['source_labels'] = json.loads(record.get('source_labels', '[]'))
-                    except:
-                        record['source_labels'] = []
-                    records.append(record)
-
-                return records
+                records = self._fetch_dicts(cursor)
+                return self._decode_copy_records(records) if include_labels else records
 
         except Exception as e:
             self.logger.error(f"搜索複製記錄失敗: {e}")
             return []
 
+    @staticmethod
+    def _decode_copy_records(records: List[Dict]) -> List[Dict]:
+        """
+        將複製記錄的 source_labels JSON 字符串轉回列表（原地修改）
+
+        Args:
+            records: 記錄列表
+
+        Returns:
+            記錄列表
+        """
+        loads = orjson.loads if orjson is not None else json.loads
+        for record in records:
+            labels = record.get('source_labels')
+            # 無標籤的記錄最常見，直接給空列表，不經過 JSON 解析
+            if not labels or labels == '[]':
+                record['source_labels'] = []
+                continue
+            try:
+                record['source_labels'] = loads(labels)
+            except (ValueError, TypeError):
+                record['source_labels'] = []
+        return records
+
     # ============ 評論同步記錄相關方法 ============
 
     def create_comment_sync_record(self, record_data: Dict) -> bool:
@@ -949,32 +2086,18 @@ class TaskDatabase:
             是否成功
         """
         try:
+            row = self._comment_sync_row(record_data, datetime.now().isoformat())
+
             with self._get_connection() as conn:
                 cursor = conn.cursor()
 
-                # 將同步目標列表轉換為 JSON
-                synced_to_repos = json.dumps(record_data.get('synced_to_repos', []))
-
-                cursor.execute("""
-                    INSERT INTO comment_sync_records (
-                        sync_id, source_repo, source_issue_number, source_issue_url,
-                        comment_author, comment_body, synced_to_repos,
-                        synced_count, total_targets, status, error_message, created_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    record_data['sync_id'],
-                    record_data['source_repo'],
-                    record_data['source_issue_number'],
-                    record_data.get('source_issue_url', ''),
-                    record_data.get('comment_author', ''),
-                    record_data.get('comment_body', ''),
-                    synced_to_repos,
-                    record_data.get('synced_count', 0),
-                    record_data.get('total_targets', 0),
-                    record_data['status'],
-                    record_data.get('error_message'),
-                    record_data.get('created_at', datetime.now().isoformat())
-                ))
+                cursor.execute(self._SQL_INSERT_COMMENT_SYNC, row)
+
+                # 同步目標寫入目標表（每個目標一行）
+                cursor.executemany(self._SQL_INSERT_COMMENT_SYNC_TARGET, [
+                    (record_data['sync_id'], repo_name)
+                    for repo_name in record_data.get('synced_to_repos', [])
+                ])
 
                 conn.commit()
                 return True
@@ -983,6 +2106,66 @@ class TaskDatabase:
             self.logger.error(f"創建評論同步記錄失敗: {e}")
             return False
 
+    def create_comment_sync_records_bulk(self, records: List[Dict]) -> int:
+        """
+        在單一交易中批量創建評論同步記錄（sync_id 已存在的記錄會被跳過）
+
+        Args:
+            records: 記錄數據字典列表
+
+        Returns:
+            實際創建的記錄數量
+        """
+        if not records:
+            return 0
+
+        try:
+            # 在取得連接之前完成參數轉換，整批使用同一個時間戳
+            now = datetime.now().isoformat()
+            rows = [self._comment_sync_row(record_data, now) for record_data in records]
+
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+
+                created = 0
+                targets = []
+                for record_data, row in zip(records, rows):
+                    cursor.execute(self._SQL_INSERT_COMMENT_SYNC_IGNORE, row)
+                    # 只為實際插入的記錄寫入同步目標，避免重複的目標行
+                    if cursor.rowcount > 0:
+                        created += 1
+                        targets.extend(
+                            (record_data['sync_id'], repo_name)
+                            for repo_name in record_data.get('synced_to_repos', [])
+                        )
+
+                cursor.executemany(self._SQL_INSERT_COMMENT_SYNC_TARGET, targets)
+
+                conn.commit()
+                self.logger.info(f"批量創建評論同步記錄: {created}/{len(rows)}")
+                return created
+
+        except Exception as e:
+            self.logger.error(f"批量創建評論同步記錄失敗: {e}")
+            return 0
+
+    @staticmethod
+    def _comment_sync_row(record_data: Dict, now: str) -> tuple:
+        """將評論同步記錄數據字典轉為 comment_sync_records 的插入參數"""
+        return (
+            record_data['sync_id'],
+            record_data['source_repo'],
+            record_data['source_issue_number'],
+            record_data.get('source_issue_url', ''),
+            record_data.get('comment_author', ''),
+            record_data.get('comment_body', ''),
+            record_data.get('synced_count', 0),
+            record_data.get('total_targets', 0),
+            record_data['status'],
+            record_data.get('error_message'),
+            record_data.get('created_at', now)
+        )
+
     def get_comment_sync_records(self, limit: int = 50, status: str = None) -> List[Dict]:
         """
         獲取評論同步記錄
@@ -995,8 +2178,7 @@ class TaskDatabase:
             記錄列表
         """
         try:
-            with self._get_connection() as conn:
-                conn.row_factory = sqlite3.Row
+            with self._reader_conn() as conn:
                 cursor = conn.cursor()
 
                 if status:
@@ -1013,16 +2195,24 @@ class TaskDatabase:
                         LIMIT ?
                     """, (limit,))
 
-                rows = cursor.fetchall()
-                records = []
-                for row in rows:
-                    record = dict(row)
-                    # 將同步目標 JSON 字符串轉回列表
-                    try:
-                        record['synced_to_repos'] = json.loads(record.get('synced_to_repos', '[]'))
-                    except:
-                        record['synced_to_repos'] = []
-                    records.append(record)
+                records = self._fetch_dicts(cursor)
+                if not records:
+                    return records
+
+                # 一次查詢取回這批記錄的所有同步目標
+                targets = {record['sync_id']: [] for record in records}
+                placeholders = ', '.join('?' * len(targets))
+                cursor.execute(f"""
+                    SELECT sync_id, repo_name FROM comment_sync_targets
+                    WHERE sync_id IN ({placeholders})
+                    ORDER BY rowid
+                """, list(targets))
+
+                for row in cursor.fetchall():
+                    targets[row['sync_id']].append(row['repo_name'])
+
+                for record in records:
+                    record['synced_to_repos'] = targets[record['sync_id']]
 
                 return records
 
@@ -1038,7 +2228,7 @@ class TaskDatabase:
             統計數據字典
         """
         try:
-            with self._get_connection() as conn:
+            with self._reader_conn() as conn:
                 cursor = conn.cursor()
 
                 # 總體統計
@@ -1061,124 +2251,456 @@ class TaskDatabase:
 
                 return stats
 
-        except Exception as e:
-            self.logger.error(f"獲取評論同步統計失敗: {e}")
-            return {
-                'total': 0,
-                'total_synced': 0,
-                'success': 0,
-                'failed': 0
-            }
+        except Exception as e:
+            self.logger.error(f"獲取評論同步統計失敗: {e}")
+            return {
+                'total': 0,
+                'total_synced': 0,
+                'success': 0,
+                'failed': 0
+            }
+
+    def mark_webhook_delivery(self, delivery_id: str) -> Optional[List[str]]:
+        """
+        記錄 GitHub webhook delivery ID，並定期清除超過 DELIVERY_RETENTION 的記錄
+
+        部分轉發失敗後保留的記錄（done_targets 非 NULL）在重送時重新認領，返回已成功的處理服務。
+
+        Args:
+            delivery_id: X-GitHub-Delivery 標頭的值
+
+        Returns:
+            已處理過（重送）返回 None；否則返回先前已成功的處理服務列表（首次收到為空列表）。
+            記錄失敗時返回空列表以照常處理
+        """
+        try:
+            now = int(time.time())
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+
+                cursor.execute("""
+                    INSERT OR IGNORE INTO seen_deliveries (delivery_id, ts)
+                    VALUES (?, ?)
+                """, (delivery_id, now))
+
+                if cursor.rowcount > 0:
+                    done_targets = []
+                else:
+                    cursor.execute("SELECT done_targets FROM seen_deliveries WHERE delivery_id = ?", (delivery_id,))
+                    row = cursor.fetchone()
+                    if row is None or row[0] is None:
+                        done_targets = None
+                    else:
+                        done_targets = [target for target in row[0].split(',') if target]
+                        cursor.execute("""
+                            UPDATE seen_deliveries SET done_targets = NULL, ts = ?
+                            WHERE delivery_id = ?
+                        """, (now, delivery_id))
+
+                if time.monotonic() - self._deliveries_purged_at > self.DELIVERY_PURGE_INTERVAL:
+                    cursor.execute("DELETE FROM seen_deliveries WHERE ts < ?", (now - self.DELIVERY_RETENTION,))
+                    self._deliveries_purged_at = time.monotonic()
+
+                conn.commit()
+                return done_targets
+
+        except Exception as e:
+            self.logger.error(f"記錄 webhook delivery 失敗: {e}")
+            return []
+
+    def unmark_webhook_delivery(self, delivery_id: str, done_targets: Optional[List[str]] = None) -> bool:
+        """
+        釋放 webhook delivery ID 記錄，讓 GitHub 重送時可再次處理
+
+        Args:
+            delivery_id: X-GitHub-Delivery 標頭的值
+            done_targets: 已成功的處理服務（可選）；提供時保留記錄，重送時只轉發其餘服務
+
+        Returns:
+            bool: 是否成功
+        """
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                if done_targets:
+                    cursor.execute("""
+                        UPDATE seen_deliveries SET done_targets = ?
+                        WHERE delivery_id = ?
+                    """, (','.join(sorted(done_targets)), delivery_id))
+                else:
+                    cursor.execute("DELETE FROM seen_deliveries WHERE delivery_id = ?", (delivery_id,))
+                conn.commit()
+                return True
+
+        except Exception as e:
+            self.logger.error(f"移除 webhook delivery 記錄失敗: {e}")
+            return False
+
+    def record_webhook_event(self, event_data: Dict) -> bool:
+        """
+        記錄 webhook 事件
+
+        Args:
+            event_data: 事件數據字典，包含:
+                - event_id: 事件 ID
+                - event_type: 事件類型 (pull_request, issues, issue_comment)
+                - repo_name: 倉庫名稱
+                - pr_number: PR 編號 (可選)
+                - issue_number: Issue 編號 (可選)
+                - action: 動作 (opened, closed, created, etc.)
+                - sender: 發送者
+                - payload: 完整的 payload (JSON)
+                - payload_raw: 原始 payload JSON（bytes/str，可選；提供時直接存儲，不再重新序列化）
+                - processed_by: 處理服務 (pr-reviewer, issue-copier)
+                - status: 狀態 (processed, skipped, failed)
+                - error_message: 錯誤信息 (可選)
+
+        事件先放入延遲寫入佇列，由背景線程批量寫入（約 WEBHOOK_FLUSH_INTERVAL 秒內可查詢到）；
+        需要立即讀取時先調用 flush_webhook_events()。
+
+        Returns:
+            bool: 是否成功（已放入佇列或已寫入）
+        """
+        try:
+            # 在取得連接之前完成參數轉換（包含 payload 的序列化與壓縮）
+            row = self._webhook_event_row(event_data, datetime.now().isoformat())
+            payload_row = self._webhook_payload_row(event_data)
+
+            # 交給背景線程批量寫入，呼叫端不需等待提交；佇列已滿或已關閉時改為同步寫入
+            if self._enqueue_webhook_event(row, payload_row):
+                return True
+
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+
+                cursor.execute(self._SQL_INSERT_WEBHOOK_EVENT, row)
+                cursor.execute(self._SQL_INSERT_WEBHOOK_PAYLOAD, payload_row)
+
+                conn.commit()
+                self.logger.debug(f"Webhook 事件已記錄: {event_data.get('event_id')}")
+
+                self._count_webhook_inserts(conn, 1)
+                return True
+
+        except Exception as e:
+            self.logger.error(f"記錄 webhook 事件失敗: {e}")
+            return False
+
+    def record_webhook_events_bulk(self, events: List[Dict]) -> int:
+        """
+        在單一交易中批量記錄 webhook 事件（event_id 已存在的事件會被跳過）
+
+        Args:
+            events: 事件數據字典列表（欄位同 record_webhook_event）
+
+        Returns:
+            實際記錄的事件數量
+        """
+        if not events:
+            return 0
+
+        try:
+            # 在取得連接之前完成參數轉換，整批使用同一個時間戳
+            now = datetime.now().isoformat()
+            rows = [self._webhook_event_row(event_data, now) for event_data in events]
+            payload_rows = [self._webhook_payload_row(event_data) for event_data in events]
+            return self._insert_webhook_rows(rows, payload_rows)
+
+        except Exception as e:
+            self.logger.error(f"批量記錄 webhook 事件失敗: {e}")
+            return 0
+
+    def _insert_webhook_rows(self, rows: List[tuple], payload_rows: List[tuple]) -> int:
+        """在單一交易中寫入已轉換好的 webhook 事件與 payload 參數，返回實際寫入的事件數"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.executemany(self._SQL_INSERT_WEBHOOK_EVENT_IGNORE, rows)
+            created = cursor.rowcount
+            cursor.executemany(self._SQL_INSERT_WEBHOOK_PAYLOAD_IGNORE, payload_rows)
+
+            conn.commit()
+            self.logger.debug(f"批量記錄 webhook 事件: {created}/{len(rows)}")
+
+            self._count_webhook_inserts(conn, created)
+            return created
+
+    def _enqueue_webhook_event(self, row: tuple, payload_row: tuple) -> bool:
+        """
+        將 webhook 事件放入延遲寫入佇列（必要時啟動背景寫入線程）
+
+        Returns:
+            是否已放入佇列；佇列已滿或已關閉時返回 False，由呼叫端同步寫入
+        """
+        with self._webhook_writer_lock:
+            if self._webhook_writer_closed:
+                return False
+
+            if self._webhook_writer is None:
+                self._webhook_writer = threading.Thread(
+                    target=self._webhook_writer_loop,
+                    name="TaskDatabaseWebhookWriter",
+                    daemon=True
+                )
+                self._webhook_writer.start()
+
+            try:
+                self._webhook_queue.put_nowait((row, payload_row))
+                return True
+            except queue.Full:
+                self.logger.warning("webhook 寫入佇列已滿，改為同步寫入")
+                return False
+
+    def _webhook_writer_loop(self):
+        """背景寫入線程：收集佇列中的事件，達到批量上限或等待逾時後以單一交易寫入"""
+        webhook_queue = self._webhook_queue
+        stop = False
+        while not stop:
+            item = webhook_queue.get()
+            batch = []
+            received = 1
+            if item is None:
+                stop = True
+            else:
+                batch.append(item)
+
+            deadline = time.monotonic() + self.WEBHOOK_FLUSH_INTERVAL
+            while not stop and len(batch) < self.WEBHOOK_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = webhook_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                received += 1
+                if item is None:
+                    stop = True
+                else:
+                    batch.append(item)
+
+            if batch:
+                self._write_webhook_batch(batch)
+
+            for _ in range(received):
+                webhook_queue.task_done()
+
+    def _write_webhook_batch(self, batch: List[tuple]):
+        """
+        寫入背景線程收集的一批 webhook 事件
+
+        暫時性錯誤（sqlite3.OperationalError）整批重試；其他錯誤改為逐筆寫入，
+        避免單筆壞資料拖累整批。最終仍寫入失敗的事件計入 _webhook_write_failures。
+        """
+        rows = [row for row, _ in batch]
+        payload_rows = [payload for _, payload in batch]
+
+        for attempt in range(1, self.WEBHOOK_WRITE_RETRIES + 1):
+            try:
+                self._insert_webhook_rows(rows, payload_rows)
+                return
+            except sqlite3.OperationalError as e:
+                if attempt >= self.WEBHOOK_WRITE_RETRIES:
+                    self._webhook_write_failures += len(batch)
+                    self.logger.error(f"寫入 webhook 事件失敗（{len(batch)} 筆，已重試 {attempt} 次）: {e}")
+                    return
+                self.logger.warning(f"寫入 webhook 事件暫時失敗，稍後重試（{len(batch)} 筆）: {e}")
+                time.sleep(self.WEBHOOK_RETRY_DELAY * attempt)
+            except Exception as e:
+                self.logger.warning(f"批量寫入 webhook 事件失敗，改為逐筆寫入（{len(batch)} 筆）: {e}")
+                break
+
+        for row, payload_row in batch:
+            try:
+                self._insert_webhook_rows([row], [payload_row])
+            except Exception as e:
+                self._webhook_write_failures += 1
+                self.logger.error(f"寫入 webhook 事件失敗 ({row[0]}): {e}")
+
+    def flush_webhook_events(self):
+        """等待延遲寫入佇列中的 webhook 事件全部寫入資料庫"""
+        if self._webhook_writer is not None:
+            self._webhook_queue.join()
+
+    def _stop_webhook_writer(self):
+        """寫入佇列中剩餘的 webhook 事件並停止背景寫入線程（之後的事件改為同步寫入）"""
+        with self._webhook_writer_lock:
+            self._webhook_writer_closed = True
+            writer = self._webhook_writer
+            if writer is None:
+                return
+            self._webhook_queue.put(None)
+
+        writer.join()
+        self._webhook_writer = None
+
+    def _count_webhook_inserts(self, conn, count: int):
+        """累計 webhook 寫入數；大量寫入後刷新統計，避免規劃器沿用過期的索引選擇"""
+        self._webhook_inserts += count
+        if self._webhook_inserts >= self.OPTIMIZE_INTERVAL:
+            self._webhook_inserts = 0
+            conn.execute("PRAGMA optimize")
+
+    @staticmethod
+    def _webhook_event_row(event_data: Dict, now: str) -> tuple:
+        """將 webhook 事件數據字典轉為 webhook_events 的插入參數"""
+        return (
+            event_data.get('event_id'),
+            event_data.get('event_type'),
+            event_data.get('repo_name'),
+            event_data.get('pr_number'),
+            event_data.get('issue_number'),
+            event_data.get('action'),
+            event_data.get('sender'),
+            event_data.get('processed_by'),
+            event_data.get('status', 'processed'),
+            event_data.get('error_message'),
+            event_data.get('created_at', now)
+        )
+
+    def _webhook_payload_row(self, event_data: Dict) -> tuple:
+        """將 webhook 事件數據字典轉為 webhook_event_payloads 的插入參數"""
+        raw = event_data.get('payload_raw')
+        if raw is not None:
+            if isinstance(raw, str):
+                raw = raw.encode('utf-8')
+            return (event_data.get('event_id'), zlib.compress(raw, 6))
+        return (
+            event_data.get('event_id'),
+            self._encode_payload(event_data.get('payload', {}))
+        )
 
-    def record_webhook_event(self, event_data: Dict) -> bool:
+    def get_webhook_events(self, limit: int = 100, event_type: str = None, status: str = None) -> List[Dict]:
         """
-        記錄 webhook 事件
+        獲取 webhook 事件記錄（列表不含 payload，需要時使用 get_webhook_event）
 
         Args:
-            event_data: 事件數據字典，包含:
-                - event_id: 事件 ID
-                - event_type: 事件類型 (pull_request, issues, issue_comment)
-                - repo_name: 倉庫名稱
-                - pr_number: PR 編號 (可選)
-                - issue_number: Issue 編號 (可選)
-                - action: 動作 (opened, closed, created, etc.)
-                - sender: 發送者
-                - payload: 完整的 payload (JSON)
-                - processed_by: 處理服務 (pr-reviewer, issue-copier)
-                - status: 狀態 (processed, skipped, failed)
-                - error_message: 錯誤信息 (可選)
+            limit: 返回記錄數量限制
+            event_type: 過濾事件類型
+            status: 過濾狀態
 
         Returns:
-            bool: 是否成功
+            List[Dict]: 事件記錄列表
         """
-        try:
-            with self.lock:
-                with self._get_connection() as conn:
-                    cursor = conn.cursor()
-
-                    cursor.execute("""
-                        INSERT INTO webhook_events (
-                            event_id, event_type, repo_name, pr_number, issue_number,
-                            action, sender, payload, processed_by, status,
-                            error_message, created_at
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        event_data.get('event_id'),
-                        event_data.get('event_type'),
-                        event_data.get('repo_name'),
-                        event_data.get('pr_number'),
-                        event_data.get('issue_number'),
-                        event_data.get('action'),
-                        event_data.get('sender'),
-                        json.dumps(event_data.get('payload', {})),
-                        event_data.get('processed_by'),
-                        event_data.get('status', 'processed'),
-                        event_data.get('error_message'),
-                        event_data.get('created_at', datetime.now().isoformat())
-                    ))
+        # 只顯示我們處理的事件類型；指定其他類型時不會有結果
+        if event_type and event_type not in ALLOWED_EVENT_TYPES:
+            return []
 
-                    conn.commit()
-                    self.logger.debug(f"Webhook 事件已記錄: {event_data.get('event_id')}")
-                    return True
+        try:
+            with self._reader_conn() as conn:
+                cursor = conn.cursor()
+                self._execute_webhook_events(cursor, limit, event_type, status)
+                return self._fetch_dicts(cursor)
 
         except Exception as e:
-            self.logger.error(f"記錄 webhook 事件失敗: {e}")
-            return False
+            self.logger.error(f"獲取 webhook 事件失敗: {e}")
+            return []
 
-    def get_webhook_events(self, limit: int = 100, event_type: str = None, status: str = None) -> List[Dict]:
+    def iter_webhook_events(self, limit: int = 100, event_type: str = None, status: str = None):
         """
-        獲取 webhook 事件記錄
+        逐筆迭代 webhook 事件（匯出大量事件時使用，不一次載入全部結果）
+
+        迭代期間會佔用一個唯讀連接，請完整迭代或關閉生成器。
 
         Args:
             limit: 返回記錄數量限制
             event_type: 過濾事件類型
             status: 過濾狀態
 
-        Returns:
-            List[Dict]: 事件記錄列表
+        Yields:
+            sqlite3.Row（不含 payload，需要字典時再以 dict() 轉換）
         """
+        if event_type and event_type not in ALLOWED_EVENT_TYPES:
+            return
+
         try:
-            with self._get_connection() as conn:
+            with self._reader_conn() as conn:
                 cursor = conn.cursor()
+                self._execute_webhook_events(cursor, limit, event_type, status)
+                yield from cursor
 
-                # 只顯示我們處理的事件類型
-                query = "SELECT * FROM webhook_events WHERE event_type IN ('pull_request', 'issues', 'issue_comment')"
-                params = []
+        except Exception as e:
+            self.logger.error(f"獲取 webhook 事件失敗: {e}")
 
-                if event_type:
-                    query += " AND event_type = ?"
-                    params.append(event_type)
+    def _execute_webhook_events(self, cursor, limit: int, event_type: Optional[str], status: Optional[str]):
+        """執行 webhook 事件列表查詢（按建立時間倒序，可選類型與狀態過濾）"""
+        filters = (event_type, status)
+        sql = self._SQL_WEBHOOK_EVENTS[tuple(bool(value) for value in filters)]
+        cursor.execute(sql, [value for value in filters if value] + [limit])
 
-                if status:
-                    query += " AND status = ?"
-                    params.append(status)
+    def get_webhook_event(self, event_id: str) -> Optional[Dict]:
+        """
+        獲取單個 webhook 事件（包含完整 payload）
 
-                query += " ORDER BY created_at DESC LIMIT ?"
-                params.append(limit)
+        Args:
+            event_id: 事件 ID
 
-                cursor.execute(query, params)
-                rows = cursor.fetchall()
+        Returns:
+            事件數據字典或 None
+        """
+        try:
+            with self._reader_conn() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT e.event_id, e.event_type, e.repo_name, e.pr_number, e.issue_number,
+                           e.action, e.sender, e.processed_by, e.status, e.error_message,
+                           e.created_at, COALESCE(p.payload, e.payload) AS payload
+                    FROM webhook_events e
+                    LEFT JOIN webhook_event_payloads p ON p.event_id = e.event_id
+                    WHERE e.event_id = ?
+                """, (event_id,))
 
-                events = []
-                for row in rows:
-                    event = dict(row)
-                    # 解析 payload JSON
-                    if event.get('payload'):
-                        try:
-                            event['payload'] = json.loads(event['payload'])
-                        except:
-                            pass
-                    events.append(event)
+                row = cursor.fetchone()
+                if not row:
+                    return None
 
-                return events
+                event = dict(row)
+                if event.get('payload'):
+                    try:
+                        event['payload'] = self._decode_payload(event['payload'])
+                    except (ValueError, zlib.error) as e:
+                        # 損壞的 payload 保留原值返回，但記錄下來以便追查
+                        self.logger.warning(f"解析 webhook payload 失敗 ({event_id}): {e}")
+                return event
 
         except Exception as e:
             self.logger.error(f"獲取 webhook 事件失敗: {e}")
-            return []
+            return None
+
+    @staticmethod
+    def _encode_payload(payload) -> bytes:
+        """將 webhook payload 序列化為 zlib 壓縮的 JSON（存為 BLOB）"""
+        if orjson is not None:
+            try:
+                return zlib.compress(orjson.dumps(payload), 6)
+            except TypeError:
+                # orjson 不支援的內容（如非字串鍵）交給標準庫處理
+                pass
+        return zlib.compress(json.dumps(payload).encode('utf-8'), 6)
+
+    @staticmethod
+    def _decode_payload(value):
+        """解析 payload，兼容舊版未壓縮的 JSON 文本"""
+        if isinstance(value, bytes):
+            value = zlib.decompress(value)
+        if orjson is not None:
+            return orjson.loads(value)
+        return json.loads(value)
+
+    def _rebuild_webhook_stats(self, cursor) -> None:
+        """從 webhook_events 全量重算統計計數表"""
+        cursor.execute("DELETE FROM webhook_stats")
+        cursor.execute("""
+            INSERT INTO webhook_stats (event_type, status, processed_by, cnt)
+            SELECT event_type, status, COALESCE(processed_by, ''), COUNT(*)
+            FROM webhook_events
+            GROUP BY event_type, status, COALESCE(processed_by, '')
+        """)
+        self._webhook_stats_rebuilt_at = time.monotonic()
 
     def get_webhook_stats(self) -> Dict:
         """
-        獲取 webhook 事件統計
+        獲取 webhook 事件統計（讀取由觸發器維護的計數表）
 
         Returns:
             Dict: 統計信息
@@ -1187,46 +2709,36 @@ class TaskDatabase:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
 
-                # 只統計我們處理的事件類型
-                event_filter = "WHERE event_type IN ('pull_request', 'issues', 'issue_comment')"
-
-                # 總事件數
-                cursor.execute(f"SELECT COUNT(*) FROM webhook_events {event_filter}")
-                total = cursor.fetchone()[0]
-
-                # 按類型統計
-                cursor.execute(f"""
-                    SELECT event_type, COUNT(*) as count
-                    FROM webhook_events
-                    {event_filter}
-                    GROUP BY event_type
-                """)
-                by_type = {row[0]: row[1] for row in cursor.fetchall()}
+                # 定期全量重算，修正任何計數漂移
+                if time.monotonic() - self._webhook_stats_rebuilt_at > self.WEBHOOK_STATS_REBUILD_INTERVAL:
+                    self._rebuild_webhook_stats(cursor)
+                    conn.commit()
 
-                # 按狀態統計
-                cursor.execute(f"""
-                    SELECT status, COUNT(*) as count
-                    FROM webhook_events
-                    {event_filter}
-                    GROUP BY status
+                # 只統計我們處理的事件類型
+                cursor.execute("""
+                    SELECT event_type, status, processed_by, cnt
+                    FROM webhook_stats
+                    WHERE event_type IN ('pull_request', 'issues', 'issue_comment')
+                    AND cnt > 0
                 """)
-                by_status = {row[0]: row[1] for row in cursor.fetchall()}
 
-                # 按處理服務統計
-                cursor.execute(f"""
-                    SELECT processed_by, COUNT(*) as count
-                    FROM webhook_events
-                    {event_filter}
-                    AND processed_by IS NOT NULL
-                    GROUP BY processed_by
-                """)
-                by_service = {row[0]: row[1] for row in cursor.fetchall()}
+                total = 0
+                by_type = {}
+                by_status = {}
+                by_service = {}
+                for event_type, status, processed_by, cnt in cursor.fetchall():
+                    total += cnt
+                    by_type[event_type] = by_type.get(event_type, 0) + cnt
+                    by_status[status] = by_status.get(status, 0) + cnt
+                    if processed_by:
+                        by_service[processed_by] = by_service.get(processed_by, 0) + cnt
 
                 return {
                     'total': total,
                     'by_type': by_type,
                     'by_status': by_status,
-                    'by_service': by_service
+                    'by_service': by_service,
+                    'write_failures': self._webhook_write_failures
                 }
 
         except Exception as e:
@@ -1235,7 +2747,8 @@ class TaskDatabase:
                 'total': 0,
                 'by_type': {},
                 'by_status': {},
-                'by_service': {}
+                'by_service': {},
+                'write_failures': self._webhook_write_failures
             }
 
     # ==================== Issue Scoring Methods ====================
@@ -1251,30 +2764,12 @@ class TaskDatabase:
             bool: 是否創建成功
         """
         try:
+            row = self._score_row(score_data, datetime.now().isoformat())
+
             with self._get_connection() as conn:
                 cursor = conn.cursor()
 
-                now = datetime.now().isoformat()
-
-                cursor.execute("""
-                    INSERT INTO issue_scores
-                    (score_id, repo_name, issue_number, comment_id, event_type, content_type,
-                     title, body, author, issue_url, status, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    score_data.get('score_id'),
-                    score_data.get('repo_name'),
-                    score_data.get('issue_number'),
-                    score_data.get('comment_id'),
-                    score_data.get('event_type'),
-                    score_data.get('content_type'),
-                    score_data.get('title'),
-                    score_data.get('body'),
-                    score_data.get('author'),
-                    score_data.get('issue_url'),
-                    score_data.get('status', 'queued'),
-                    now
-                ))
+                cursor.execute(self._SQL_INSERT_SCORE, row)
 
                 conn.commit()
                 self.logger.info(f"創建評分記錄: {score_data.get('score_id')}")
@@ -1287,36 +2782,85 @@ class TaskDatabase:
             self.logger.error(f"創建評分記錄失敗: {e}")
             return False
 
-    def update_score_record(self, score_id: str, update_data: Dict) -> bool:
+    def create_score_records_bulk(self, scores: List[Dict]) -> int:
         """
-        更新評分記錄
+        在單一交易中批量創建 issue 評分記錄（score_id 已存在的記錄會被跳過）
 
         Args:
-            score_id: 評分記錄 ID
-            update_data: 要更新的數據
+            scores: 評分數據字典列表
 
         Returns:
-            bool: 是否更新成功
+            實際創建的記錄數量
         """
+        if not scores:
+            return 0
+
         try:
+            now = datetime.now().isoformat()
+            rows = [self._score_row(score_data, now) for score_data in scores]
+
             with self._get_connection() as conn:
                 cursor = conn.cursor()
 
-                # 構建 SET 子句
-                set_parts = []
-                values = []
+                cursor.executemany(self._SQL_INSERT_SCORE_IGNORE, rows)
+                created = cursor.rowcount
 
-                for key, value in update_data.items():
-                    if key != 'score_id':
-                        set_parts.append(f"{key} = ?")
-                        values.append(value)
+                conn.commit()
+                self.logger.info(f"批量創建評分記錄: {created}/{len(rows)}")
+                return created
 
-                if not set_parts:
-                    return False
+        except Exception as e:
+            self.logger.error(f"批量創建評分記錄失敗: {e}")
+            return 0
+
+    @staticmethod
+    def _score_row(score_data: Dict, now: str) -> tuple:
+        """將評分數據字典轉為 issue_scores 的插入參數"""
+        return (
+            score_data.get('score_id'),
+            score_data.get('repo_name'),
+            score_data.get('issue_number'),
+            score_data.get('comment_id'),
+            score_data.get('event_type'),
+            score_data.get('content_type'),
+            score_data.get('title'),
+            score_data.get('body'),
+            score_data.get('author'),
+            score_data.get('issue_url'),
+            score_data.get('status', 'queued'),
+            now
+        )
+
+    def update_score_record(self, score_id: str, update_data: Dict) -> bool:
+        """
+        更新評分記錄
+
+        Args:
+            score_id: 評分記錄 ID
+            update_data: 要更新的數據
+
+        Returns:
+            bool: 是否更新成功
+        """
+        try:
+            fields = frozenset(key for key in update_data if key != 'score_id')
+            if not fields:
+                return False
 
-                values.append(score_id)
+            # 同一組更新欄位只構建一次語句；固定的欄位順序讓語句文字一致，
+            # 可重用連接上已預編譯的語句
+            cached = self._update_score_sql_cache.get(fields)
+            if cached is None:
+                ordered_keys = tuple(sorted(fields))
+                set_clause = ', '.join(f"{key} = ?" for key in ordered_keys)
+                cached = (f"UPDATE issue_scores SET {set_clause} WHERE score_id = ?", ordered_keys)
+                self._update_score_sql_cache[fields] = cached
+            query, ordered_keys = cached
+            values = [update_data[key] for key in ordered_keys]
+            values.append(score_id)
 
-                query = f"UPDATE issue_scores SET {', '.join(set_parts)} WHERE score_id = ?"
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
                 cursor.execute(query, values)
                 conn.commit()
 
@@ -1400,7 +2944,7 @@ class TaskDatabase:
             評分記錄字典或 None
         """
         try:
-            with self._get_connection() as conn:
+            with self._reader_conn() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT * FROM issue_scores WHERE score_id = ?", (score_id,))
                 row = cursor.fetchone()
@@ -1426,15 +2970,14 @@ class TaskDatabase:
             評分記錄列表
         """
         try:
-            with self._get_connection() as conn:
+            with self._reader_conn() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT * FROM issue_scores
                     WHERE repo_name = ? AND issue_number = ? AND comment_id = ?
                     ORDER BY created_at DESC
                 """, (repo_name, issue_number, comment_id))
-                rows = cursor.fetchall()
-                return [dict(row) for row in rows]
+                return self._fetch_dicts(cursor)
 
         except Exception as e:
             self.logger.error(f"根據 comment_id 查找評分記錄失敗: {e}")
@@ -1453,31 +2996,43 @@ class TaskDatabase:
             評分記錄列表
         """
         try:
-            with self._get_connection() as conn:
+            with self._reader_conn() as conn:
                 cursor = conn.cursor()
+                self._execute_score_records(cursor, limit, status, repo_name)
+                return self._fetch_dicts(cursor)
 
-                query = "SELECT * FROM issue_scores WHERE 1=1"
-                params = []
-
-                if status:
-                    query += " AND status = ?"
-                    params.append(status)
+        except Exception as e:
+            self.logger.error(f"獲取評分記錄失敗: {e}")
+            return []
 
-                if repo_name:
-                    query += " AND repo_name = ?"
-                    params.append(repo_name)
+    def iter_score_records(self, limit: int = 100, status: str = None, repo_name: str = None):
+        """
+        逐筆迭代評分記錄（匯出大量記錄時使用，不一次載入全部結果）
 
-                query += " ORDER BY created_at DESC LIMIT ?"
-                params.append(limit)
+        迭代期間會佔用一個唯讀連接，請完整迭代或關閉生成器。
 
-                cursor.execute(query, params)
-                rows = cursor.fetchall()
+        Args:
+            limit: 返回記錄數量限制
+            status: 按狀態過濾
+            repo_name: 按 repository 過濾
 
-                return [dict(row) for row in rows]
+        Yields:
+            sqlite3.Row（支援索引與欄位名存取，需要字典時再以 dict() 轉換）
+        """
+        try:
+            with self._reader_conn() as conn:
+                cursor = conn.cursor()
+                self._execute_score_records(cursor, limit, status, repo_name)
+                yield from cursor
 
         except Exception as e:
             self.logger.error(f"獲取評分記錄失敗: {e}")
-            return []
+
+    def _execute_score_records(self, cursor, limit: int, status: Optional[str], repo_name: Optional[str]):
+        """執行評分記錄列表查詢（按建立時間倒序，可選狀態與 repository 過濾）"""
+        filters = (status, repo_name)
+        sql = self._SQL_SCORE_RECORDS[tuple(bool(value) for value in filters)]
+        cursor.execute(sql, [value for value in filters if value] + [limit])
 
     def check_comment_already_scored(self, repo_name: str, issue_number: int, comment_id: int) -> bool:
         """
@@ -1492,7 +3047,7 @@ class TaskDatabase:
             True 如果已經評分過, False 如果還沒有
         """
         try:
-            with self._get_connection() as conn:
+            with self._reader_conn() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT COUNT(*) as count
@@ -1518,46 +3073,28 @@ class TaskDatabase:
             統計數據字典
         """
         try:
-            with self._get_connection() as conn:
+            with self._reader_conn() as conn:
                 cursor = conn.cursor()
 
-                where_clause = "WHERE (ignored IS NULL OR ignored = 0)"
-                params = []
-
                 if repo_name:
-                    where_clause += " AND repo_name = ?"
-                    params.append(repo_name)
-
-                # 總評分數（排除已忽略的）
-                cursor.execute(f"SELECT COUNT(*) FROM issue_scores {where_clause}", params)
-                total = cursor.fetchone()[0]
-
-                # 按狀態統計（排除已忽略的）
-                cursor.execute(f"""
-                    SELECT status, COUNT(*) as count
-                    FROM issue_scores
-                    {where_clause}
-                    GROUP BY status
-                """, params)
-                by_status = {row[0]: row[1] for row in cursor.fetchall()}
-
-                # 按內容類型統計（排除已忽略的）
-                cursor.execute(f"""
-                    SELECT content_type, COUNT(*) as count
-                    FROM issue_scores
-                    {where_clause}
-                    GROUP BY content_type
-                """, params)
-                by_type = {row[0]: row[1] for row in cursor.fetchall()}
+                    cursor.execute(self._SQL_SCORE_STATS[True], (repo_name,))
+                else:
+                    cursor.execute(self._SQL_SCORE_STATS[False])
 
-                # 平均分數（只計算已完成的且未忽略的）
-                cursor.execute(f"""
-                    SELECT AVG(overall_score) as avg_score
-                    FROM issue_scores
-                    {where_clause} AND status = 'completed' AND overall_score IS NOT NULL
-                """, params)
-                result = cursor.fetchone()
-                avg_score = round(result[0], 1) if result[0] is not None else None
+                total = 0
+                by_status = {}
+                by_type = {}
+                score_sum = 0
+                score_count = 0
+                for status, content_type, count, group_score_sum, group_score_count in cursor.fetchall():
+                    total += count
+                    by_status[status] = by_status.get(status, 0) + count
+                    by_type[content_type] = by_type.get(content_type, 0) + count
+                    if group_score_count:
+                        score_sum += group_score_sum
+                        score_count += group_score_count
+
+                avg_score = round(score_sum / score_count, 1) if score_count else None
 
                 return {
                     'total': total,
@@ -1583,227 +3120,238 @@ class TaskDatabase:
 
     # ==================== Author History & Statistics Methods ====================
 
-    def get_author_pr_history(self, author: str, limit: int = 20) -> Dict:
+    @staticmethod
+    def _calculate_trend(recent_scores: List[int]) -> Optional[str]:
         """
-        獲取作者的 PR 審查歷史和統計
+        根據最近的分數（由新到舊）判斷趨勢：比較前半和後半的平均分
+
+        Args:
+            recent_scores: 最近的分數列表
+
+        Returns:
+            'improving' / 'declining' / 'stable'，數據不足時為 None
+        """
+        count = len(recent_scores)
+        if count < 3:
+            return None
+
+        # 單次遍歷累加前後兩半，不建立切片
+        mid = count // 2
+        recent_sum = older_sum = 0
+        for i, score in enumerate(recent_scores):
+            if i < mid:
+                recent_sum += score
+            else:
+                older_sum += score
+
+        recent_avg = recent_sum / mid
+        older_avg = older_sum / (count - mid)
+
+        if recent_avg > older_avg + 5:
+            return 'improving'  # 進步中
+        if recent_avg < older_avg - 5:
+            return 'declining'  # 退步中
+        return 'stable'  # 穩定
+
+    def _fetch_author_pr_history(self, cursor, author: str, limit: int) -> Dict:
+        """
+        在已有的 cursor 上查詢作者的 PR 審查歷史和統計
 
         Args:
+            cursor: 資料庫 cursor
             author: PR 作者名稱
             limit: 返回的最大記錄數
 
         Returns:
             包含歷史記錄和統計的字典
         """
+        # 獲取作者的 PR 記錄
+        cursor.execute("""
+            SELECT task_id, pr_number, repo, pr_title, pr_url, score,
+                   status, created_at, completed_at, review_comment_url
+            FROM review_tasks
+            WHERE pr_author = ? AND status = 'completed'
+            ORDER BY created_at DESC
+            LIMIT ?
+        """, (author, limit))
+
+        records = self._fetch_dicts(cursor)
+
+        # 計算統計
+        cursor.execute("""
+            SELECT
+                COUNT(*) as total_prs,
+                AVG(CASE WHEN score IS NOT NULL THEN score END) as avg_score,
+                MIN(CASE WHEN score IS NOT NULL THEN score END) as min_score,
+                MAX(CASE WHEN score IS NOT NULL THEN score END) as max_score,
+                COUNT(CASE WHEN score IS NOT NULL THEN 1 END) as scored_prs
+            FROM review_tasks
+            WHERE pr_author = ? AND status = 'completed'
+        """, (author,))
+
+        stats_row = cursor.fetchone()
+        stats = {
+            'total_prs': stats_row['total_prs'] or 0,
+            'avg_score': round(stats_row['avg_score'], 1) if stats_row['avg_score'] else None,
+            'min_score': stats_row['min_score'],
+            'max_score': stats_row['max_score'],
+            'scored_prs': stats_row['scored_prs'] or 0
+        }
+
+        # 獲取最近5次的分數趨勢（用於判斷進步或退步）
+        # 只需位置存取，暫時關閉 Row 工廠直接取得 tuple
+        row_factory = cursor.row_factory
+        cursor.row_factory = None
         try:
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
-
-                # 獲取作者的 PR 記錄
-                cursor.execute("""
-                    SELECT task_id, pr_number, repo, pr_title, pr_url, score,
-                           status, created_at, completed_at, review_comment_url
-                    FROM review_tasks
-                    WHERE pr_author = ? AND status = 'completed'
-                    ORDER BY created_at DESC
-                    LIMIT ?
-                """, (author, limit))
-
-                records = [dict(row) for row in cursor.fetchall()]
+            cursor.execute("""
+                SELECT score
+                FROM review_tasks
+                WHERE pr_author = ? AND status = 'completed' AND score IS NOT NULL
+                ORDER BY created_at DESC
+                LIMIT 5
+            """, (author,))
+
+            recent_scores = [score for score, in cursor]
+        finally:
+            cursor.row_factory = row_factory
 
-                # 計算統計
-                cursor.execute("""
-                    SELECT
-                        COUNT(*) as total_prs,
-                        AVG(CASE WHEN score IS NOT NULL THEN score END) as avg_score,
-                        MIN(CASE WHEN score IS NOT NULL THEN score END) as min_score,
-                        MAX(CASE WHEN score IS NOT NULL THEN score END) as max_score,
-                        COUNT(CASE WHEN score IS NOT NULL THEN 1 END) as scored_prs
-                    FROM review_tasks
-                    WHERE pr_author = ? AND status = 'completed'
-                """, (author,))
+        stats['trend'] = self._calculate_trend(recent_scores)
+        stats['recent_scores'] = recent_scores
 
-                stats_row = cursor.fetchone()
-                stats = {
-                    'total_prs': stats_row['total_prs'] or 0,
-                    'avg_score': round(stats_row['avg_score'], 1) if stats_row['avg_score'] else None,
-                    'min_score': stats_row['min_score'],
-                    'max_score': stats_row['max_score'],
-                    'scored_prs': stats_row['scored_prs'] or 0
-                }
+        return {
+            'records': records,
+            'stats': stats
+        }
 
-                # 獲取最近5次的分數趨勢（用於判斷進步或退步）
-                cursor.execute("""
-                    SELECT score
-                    FROM review_tasks
-                    WHERE pr_author = ? AND status = 'completed' AND score IS NOT NULL
-                    ORDER BY created_at DESC
-                    LIMIT 5
-                """, (author,))
-
-                recent_scores = [row['score'] for row in cursor.fetchall()]
-
-                # 計算趨勢（如果有足夠的數據）
-                trend = None
-                if len(recent_scores) >= 3:
-                    # 簡單的趨勢判斷：比較前半和後半的平均分
-                    mid = len(recent_scores) // 2
-                    recent_avg = sum(recent_scores[:mid]) / mid
-                    older_avg = sum(recent_scores[mid:]) / (len(recent_scores) - mid)
-
-                    if recent_avg > older_avg + 5:
-                        trend = 'improving'  # 進步中
-                    elif recent_avg < older_avg - 5:
-                        trend = 'declining'  # 退步中
-                    else:
-                        trend = 'stable'  # 穩定
+    def get_author_pr_history(self, author: str, limit: int = 20) -> Dict:
+        """
+        獲取作者的 PR 審查歷史和統計
 
-                stats['trend'] = trend
-                stats['recent_scores'] = recent_scores
+        Args:
+            author: PR 作者名稱
+            limit: 返回的最大記錄數
 
-                return {
-                    'records': records,
-                    'stats': stats
-                }
+        Returns:
+            包含歷史記錄和統計的字典
+        """
+        try:
+            with self._reader_conn() as conn:
+                return self._fetch_author_pr_history(conn.cursor(), author, limit)
 
         except Exception as e:
             self.logger.error(f"獲取作者 PR 歷史失敗: {e}")
-            return {
-                'records': [],
-                'stats': {
-                    'total_prs': 0,
-                    'avg_score': None,
-                    'min_score': None,
-                    'max_score': None,
-                    'scored_prs': 0,
-                    'trend': None,
-                    'recent_scores': []
-                }
-            }
+            return {'records': [], 'stats': self._EMPTY_PR_STATS.copy()}
 
-    def get_author_issue_history(self, author: str, limit: int = 20) -> Dict:
+    def _fetch_author_issue_history(self, cursor, author: str, limit: int) -> Dict:
         """
-        獲取作者的 Issue 評分歷史和統計
+        在已有的 cursor 上查詢作者的 Issue 評分歷史和統計
 
         Args:
+            cursor: 資料庫 cursor
             author: Issue 作者名稱
             limit: 返回的最大記錄數
 
         Returns:
             包含歷史記錄和統計的字典
         """
+        # 獲取作者的 Issue 評分記錄（排除已忽略的）
+        cursor.execute("""
+            SELECT score_id, repo_name, issue_number, content_type,
+                   title, issue_url, overall_score, format_score,
+                   content_score, clarity_score, actionability_score,
+                   status, created_at, completed_at
+            FROM issue_scores
+            WHERE author = ? AND status = 'completed' AND ignored = 0
+            ORDER BY created_at DESC
+            LIMIT ?
+        """, (author, limit))
+
+        records = self._fetch_dicts(cursor)
+
+        # 以下查詢只需位置存取，暫時關閉 Row 工廠直接取得 tuple
+        row_factory = cursor.row_factory
+        cursor.row_factory = None
         try:
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
-
-                # 獲取作者的 Issue 評分記錄（排除已忽略的）
-                cursor.execute("""
-                    SELECT score_id, repo_name, issue_number, content_type,
-                           title, issue_url, overall_score, format_score,
-                           content_score, clarity_score, actionability_score,
-                           status, created_at, completed_at
-                    FROM issue_scores
-                    WHERE author = ? AND status = 'completed' AND (ignored IS NULL OR ignored = 0)
-                    ORDER BY created_at DESC
-                    LIMIT ?
-                """, (author, limit))
-
-                records = [dict(row) for row in cursor.fetchall()]
-
-                # 計算統計
-                cursor.execute("""
-                    SELECT
-                        COUNT(*) as total_issues,
-                        AVG(overall_score) as avg_overall,
-                        AVG(format_score) as avg_format,
-                        AVG(content_score) as avg_content,
-                        AVG(clarity_score) as avg_clarity,
-                        AVG(actionability_score) as avg_actionability,
-                        MIN(overall_score) as min_score,
-                        MAX(overall_score) as max_score
-                    FROM issue_scores
-                    WHERE author = ? AND status = 'completed' AND (ignored IS NULL OR ignored = 0)
-                """, (author,))
+            # 單一查詢同時取得最近5次的分數（用於趨勢）與整體統計（視窗函數 OVER ()
+            # 在 LIMIT 之前以全部記錄計算，每一列都帶有相同的統計值）
+            cursor.execute("""
+                SELECT overall_score,
+                       COUNT(*) OVER w,
+                       AVG(overall_score) OVER w,
+                       AVG(format_score) OVER w,
+                       AVG(content_score) OVER w,
+                       AVG(clarity_score) OVER w,
+                       AVG(actionability_score) OVER w,
+                       MIN(overall_score) OVER w,
+                       MAX(overall_score) OVER w
+                FROM issue_scores
+                WHERE author = ? AND status = 'completed' AND ignored = 0
+                WINDOW w AS ()
+                ORDER BY created_at DESC
+                LIMIT 5
+            """, (author,))
+
+            rows = cursor.fetchall()
+            recent_scores = [row[0] for row in rows]
+            (total_issues, avg_overall, avg_format, avg_content, avg_clarity,
+             avg_actionability, min_score, max_score) = rows[0][1:] if rows else (0,) + (None,) * 7
+
+            stats = {
+                'total_issues': total_issues or 0,
+                'avg_overall': round(avg_overall, 1) if avg_overall else None,
+                'avg_format': round(avg_format, 1) if avg_format else None,
+                'avg_content': round(avg_content, 1) if avg_content else None,
+                'avg_clarity': round(avg_clarity, 1) if avg_clarity else None,
+                'avg_actionability': round(avg_actionability, 1) if avg_actionability else None,
+                'min_score': min_score,
+                'max_score': max_score
+            }
 
-                stats_row = cursor.fetchone()
-                stats = {
-                    'total_issues': stats_row['total_issues'] or 0,
-                    'avg_overall': round(stats_row['avg_overall'], 1) if stats_row['avg_overall'] else None,
-                    'avg_format': round(stats_row['avg_format'], 1) if stats_row['avg_format'] else None,
-                    'avg_content': round(stats_row['avg_content'], 1) if stats_row['avg_content'] else None,
-                    'avg_clarity': round(stats_row['avg_clarity'], 1) if stats_row['avg_clarity'] else None,
-                    'avg_actionability': round(stats_row['avg_actionability'], 1) if stats_row['avg_actionability'] else None,
-                    'min_score': stats_row['min_score'],
-                    'max_score': stats_row['max_score']
+            # 按內容類型統計
+            cursor.execute("""
+                SELECT content_type, COUNT(*) as count, AVG(overall_score) as avg_score
+                FROM issue_scores
+                WHERE author = ? AND status = 'completed' AND ignored = 0
+                GROUP BY content_type
+            """, (author,))
+
+            by_type = {
+                content_type: {
+                    'count': count,
+                    'avg_score': round(avg_score, 1) if avg_score else None
                 }
+                for content_type, count, avg_score in cursor
+            }
+        finally:
+            cursor.row_factory = row_factory
 
-                # 獲取最近5次的分數趨勢
-                cursor.execute("""
-                    SELECT overall_score
-                    FROM issue_scores
-                    WHERE author = ? AND status = 'completed' AND (ignored IS NULL OR ignored = 0)
-                    ORDER BY created_at DESC
-                    LIMIT 5
-                """, (author,))
-
-                recent_scores = [row['overall_score'] for row in cursor.fetchall()]
-
-                # 計算趨勢
-                trend = None
-                if len(recent_scores) >= 3:
-                    mid = len(recent_scores) // 2
-                    recent_avg = sum(recent_scores[:mid]) / mid
-                    older_avg = sum(recent_scores[mid:]) / (len(recent_scores) - mid)
-
-                    if recent_avg > older_avg + 5:
-                        trend = 'improving'
-                    elif recent_avg < older_avg - 5:
-                        trend = 'declining'
-                    else:
-                        trend = 'stable'
-
-                stats['trend'] = trend
-                stats['recent_scores'] = recent_scores
+        stats['trend'] = self._calculate_trend(recent_scores)
+        stats['recent_scores'] = recent_scores
+        stats['by_content_type'] = by_type
 
-                # 按內容類型統計
-                cursor.execute("""
-                    SELECT content_type, COUNT(*) as count, AVG(overall_score) as avg_score
-                    FROM issue_scores
-                    WHERE author = ? AND status = 'completed' AND (ignored IS NULL OR ignored = 0)
-                    GROUP BY content_type
-                """, (author,))
+        return {
+            'records': records,
+            'stats': stats
+        }
 
-                by_type = {}
-                for row in cursor.fetchall():
-                    by_type[row['content_type']] = {
-                        'count': row['count'],
-                        'avg_score': round(row['avg_score'], 1) if row['avg_score'] else None
-                    }
+    def get_author_issue_history(self, author: str, limit: int = 20) -> Dict:
+        """
+        獲取作者的 Issue 評分歷史和統計
 
-                stats['by_content_type'] = by_type
+        Args:
+            author: Issue 作者名稱
+            limit: 返回的最大記錄數
 
-                return {
-                    'records': records,
-                    'stats': stats
-                }
+        Returns:
+            包含歷史記錄和統計的字典
+        """
+        try:
+            with self._reader_conn() as conn:
+                return self._fetch_author_issue_history(conn.cursor(), author, limit)
 
         except Exception as e:
             self.logger.error(f"獲取作者 Issue 歷史失敗: {e}")
-            return {
-                'records': [],
-                'stats': {
-                    'total_issues': 0,
-                    'avg_overall': None,
-                    'avg_format': None,
-                    'avg_content': None,
-                    'avg_clarity': None,
-                    'avg_actionability': None,
-                    'min_score': None,
-                    'max_score': None,
-                    'trend': None,
-                    'recent_scores': [],
-                    'by_content_type': {}
-                }
-            }
+            return {'records': [], 'stats': self._EMPTY_ISSUE_STATS.copy()}
 
     def get_author_combined_stats(self, author: str) -> Dict:
         """
@@ -1816,10 +3364,19 @@ class TaskDatabase:
             綜合統計字典
         """
         try:
-            pr_history = self.get_author_pr_history(author, limit=10)
-            issue_history = self.get_author_issue_history(author, limit=10)
-
-            return {
+            cache_key = ('combined_stats', author)
+            version = self._stats_version()
+            cached = self._get_cached_stats(cache_key, version)
+            if cached is not None:
+                return copy.deepcopy(cached)
+
+            # PR 與 Issue 歷史在兩個工作線程上並行查詢，總耗時約為兩者中較長者
+            pr_future = self._io_pool.submit(self.get_author_pr_history, author, 10)
+            issue_future = self._io_pool.submit(self.get_author_issue_history, author, 10)
+            pr_history = pr_future.result()
+            issue_history = issue_future.result()
+
+            result = {
                 'author': author,
                 'pr_stats': pr_history['stats'],
                 'issue_stats': issue_history['stats'],
@@ -1827,6 +3384,9 @@ class TaskDatabase:
                 'issue_recent_records': issue_history['records'][:5]  # 最近5個 Issue
             }
 
+            self._set_cached_stats(cache_key, version, result)
+            return copy.deepcopy(result)
+
         except Exception as e:
             self.logger.error(f"獲取作者綜合統計失敗: {e}")
             return {
@@ -1849,54 +3409,33 @@ class TaskDatabase:
             常見問題列表
         """
         try:
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
+            cache_key = ('common_issues', author, repo)
+            version = self._stats_version()
+            cached = self._get_cached_stats(cache_key, version)
+            if cached is not None:
+                return [dict(issue) for issue in cached]
 
-                # 獲取作者的所有 PR 審查內容
-                query = """
-                    SELECT review_content, score, pr_title, repo, created_at
-                    FROM review_tasks
-                    WHERE pr_author = ? AND status = 'completed' AND review_content IS NOT NULL
-                """
-                params = [author]
+            with self._reader_conn() as conn:
+                cursor = conn.cursor()
 
+                # 在 SQLite 中一次完成計數：作者最近 10 篇審查內容各只轉小寫一次
                 if repo:
-                    query += " AND repo = ?"
-                    params.append(repo)
-
-                query += " ORDER BY created_at DESC LIMIT 10"
-
-                cursor.execute(query, params)
-                reviews = cursor.fetchall()
-
-                # 從審查內容中提取常見問題關鍵詞
-                issue_patterns = {
-                    '程式碼品質': ['代碼質量', '代码质量', '程式碼品質', 'code quality'],
-                    '命名規範': ['命名', 'naming', '變數名', '变量名'],
-                    '錯誤處理': ['錯誤處理', '错误处理', 'error handling', '例外處理'],
-                    '效能問題': ['效能', '性能', 'performance', '優化', '优化'],
-                    '安全問題': ['安全', 'security', '漏洞', '风险'],
-                    '測試覆蓋': ['測試', '测试', 'test', 'coverage'],
-                    '註解不足': ['註解', '注释', 'comment', '文檔', '文档'],
-                    '重複程式碼': ['重複', '重复', 'duplicate', 'DRY']
-                }
-
-                issue_counts = {pattern: 0 for pattern in issue_patterns}
-
-                for review in reviews:
-                    content = review['review_content'] or ''
-                    for issue_type, keywords in issue_patterns.items():
-                        if any(keyword.lower() in content.lower() for keyword in keywords):
-                            issue_counts[issue_type] += 1
+                    cursor.execute(self._SQL_ISSUES_BY_AUTHOR_REPO,
+                                   self._ISSUE_KEYWORD_PARAMS + [author, repo])
+                else:
+                    cursor.execute(self._SQL_ISSUES_BY_AUTHOR,
+                                   self._ISSUE_KEYWORD_PARAMS + [author])
+                issue_counts = Counter(dict(zip(self.ISSUE_PATTERNS, cursor.fetchone())))
 
                 # 排序並過濾（只返回至少出現2次的問題）
                 common_issues = [
                     {'issue_type': issue_type, 'occurrence_count': count}
-                    for issue_type, count in sorted(issue_counts.items(), key=lambda x: x[1], reverse=True)
+                    for issue_type, count in issue_counts.most_common()
                     if count >= 2
                 ]
 
-                return common_issues
+                self._set_cached_stats(cache_key, version, common_issues)
+                return [dict(issue) for issue in common_issues]
 
         except Exception as e:
             self.logger.error(f"分析作者常見問題失敗: {e}")
@@ -1914,40 +3453,38 @@ class TaskDatabase:
             最佳實踐建議列表
         """
         try:
-            with self._get_connection() as conn:
+            cache_key = ('best_practices', repo, limit)
+            version = self._stats_version()
+            cached = self._get_cached_stats(cache_key, version)
+            if cached is not None:
+                return list(cached)
+
+            with self._reader_conn() as conn:
                 cursor = conn.cursor()
 
-                # 獲取該倉庫評分最高的 PR 審查內容
+                # 在該倉庫評分最高的 PR 中，取出已由觸發器標記為最佳實踐的記錄
+                # （只走索引，不讀取審查內容）
                 cursor.execute("""
-                    SELECT review_content, score, pr_title
-                    FROM review_tasks
-                    WHERE repo = ? AND status = 'completed' AND score >= 85
+                    SELECT pr_title, score
+                    FROM repo_best_practices
+                    WHERE repo = ? AND task_id IN (
+                        SELECT task_id
+                        FROM review_tasks
+                        WHERE repo = ? AND status = 'completed' AND score >= 85
+                        ORDER BY score DESC, created_at DESC
+                        LIMIT ?
+                    )
                     ORDER BY score DESC, created_at DESC
-                    LIMIT ?
-                """, (repo, limit))
-
-                high_score_reviews = cursor.fetchall()
-
-                if not high_score_reviews:
-                    return []
+                    LIMIT 5
+                """, (repo, repo, limit))
 
-                # 從高分審查中提取正面評價關鍵詞
-                positive_patterns = [
-                    '程式碼清晰', '代碼清晰', 'clean code', 'well structured',
-                    '良好的', '優秀的', '完整的測試', 'comprehensive test',
-                    '詳細的註解', 'well documented', '命名清晰', 'clear naming',
-                    '錯誤處理完善', 'proper error handling'
+                practices = [
+                    f"參考 PR '{pr_title[:50]}' (評分: {score})"
+                    for pr_title, score in cursor
                 ]
 
-                practices = []
-                for review in high_score_reviews:
-                    content = review['review_content'] or ''
-                    for pattern in positive_patterns:
-                        if pattern.lower() in content.lower():
-                            practices.append(f"參考 PR '{review['pr_title'][:50]}' (評分: {review['score']})")
-                            break  # 每個 PR 只添加一次
-
-                return practices[:5]  # 返回前5個
+                self._set_cached_stats(cache_key, version, practices)
+                return list(practices)
 
         except Exception as e:
             self.logger.error(f"獲取專案最佳實踐失敗: {e}")
@@ -6,17 +6,133 @@
 
 import re
 import json
+import atexit
+import copy
+import hashlib
 import logging
+import queue
+import threading
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from collections import Counter
-import anthropic
 import os
 
+try:
+    import orjson
+except ImportError:  # 未安裝時退回標準庫 json
+    orjson = None
+
+
+def _dumps(obj) -> str:
+    """序列化為 JSON 文本（非 ASCII 字元不轉義）"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj).decode('utf-8')
+        except TypeError:
+            # orjson 不支援的內容（如非字串鍵）交給標準庫處理
+            pass
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _loads(value):
+    """解析 JSON 文本"""
+    if orjson is not None:
+        return orjson.loads(value)
+    return json.loads(value)
+
+
+def _iso_now() -> str:
+    """當前時間的 ISO 格式字串"""
+    return datetime.now().isoformat()
+
+
+def _iso_days_ago(days: int, now: Optional[datetime] = None) -> str:
+    """距 now（預設為當前時間）days 天前的 ISO 格式字串，用作查詢的截止時間"""
+    return ((now or datetime.now()) - timedelta(days=days)).isoformat()
+
 
 class FeedbackAnalyzer:
     """分析用戶反饋並提取學習見解"""
 
+    # 反饋類型的判斷優先順序（依序取第一個命中的類型）
+    FEEDBACK_TYPE_PRIORITY = ('too_harsh', 'too_lenient', 'missed_issue', 'incorrect_assessment')
+
+    # 評分維度的判斷優先順序
+    DIMENSION_PRIORITY = ('format', 'content', 'clarity', 'actionability')
+
+    # 反饋分析使用的 Claude 模型與輸出上限
+    ANALYSIS_MODEL = "claude-3-5-haiku-20241022"
+    ANALYSIS_MAX_TOKENS = 500
+
+    # Claude 分析結果快取的有效天數
+    ANALYSIS_CACHE_TTL_DAYS = 7
+
+    # 快照批量分析（Message Batches API）：每批最大請求數、輪詢間隔與最長等待時間（秒）
+    # 批量最遲 24 小時內結束（未完成的請求過期），超過此時間仍查詢不到結果的記錄才放棄，不主動取消已付費的批量
+    BATCH_MAX_REQUESTS = 10000
+    BATCH_POLL_INTERVAL = 30
+    BATCH_TIMEOUT = 24 * 3600 + 600
+
+    # 短反饋預篩：長度低於此值且只命中一類關鍵詞時直接使用規則分析，不調用 Claude
+    PREFILTER_MAX_LENGTH = 40
+
+    # 反饋模式延遲寫入（write-behind）佇列：容量、每批最大筆數與收集一批的最長等待時間（秒）
+    PATTERN_QUEUE_SIZE = 10000
+    PATTERN_BATCH_SIZE = 100
+    PATTERN_FLUSH_INTERVAL = 0.5
+
+    # 反饋見解的記憶體快取有效時間（秒）
+    INSIGHTS_CACHE_TTL = 60
+
+    # 反饋模式的新增或累加（單一語句）：
+    # - 平均分數偏差只在有非零調整建議時更新為增量平均，否則保持原值（NULL 視為 0）
+    # - 示例反饋在 SQLite 內附加新的一條並只保留最新 5 條
+    _SQL_UPSERT_FEEDBACK_PATTERN = """
+        INSERT INTO feedback_patterns (
+            pattern_id, pattern_type, dimension, feedback_theme,
+            occurrence_count, avg_score_deviation, example_feedbacks,
+            identified_issue, suggested_adjustment,
+            last_seen, created_at, updated_at
+        ) VALUES (?, ?, ?, ?, 1, ?, json_array(?), ?, ?, ?, ?, ?)
+        ON CONFLICT(pattern_id) DO UPDATE SET
+            occurrence_count = occurrence_count + 1,
+            avg_score_deviation = CASE
+                WHEN excluded.avg_score_deviation IS NOT NULL AND excluded.avg_score_deviation != 0
+                THEN (COALESCE(avg_score_deviation, 0) * occurrence_count + excluded.avg_score_deviation)
+                     / (occurrence_count + 1.0)
+                ELSE COALESCE(avg_score_deviation, 0)
+            END,
+            example_feedbacks = (
+                SELECT json_group_array(value) FROM (
+                    SELECT value FROM (
+                        SELECT part, key, value FROM (
+                            SELECT 0 AS part, key, value
+                            FROM json_each(COALESCE(NULLIF(feedback_patterns.example_feedbacks, ''), '[]'))
+                            UNION ALL
+                            SELECT 1 AS part, key, value FROM json_each(excluded.example_feedbacks)
+                        )
+                        ORDER BY part DESC, key DESC
+                        LIMIT 5
+                    )
+                    ORDER BY part, key
+                )
+            ),
+            last_seen = excluded.last_seen,
+            updated_at = excluded.updated_at
+    """
+
+    # Claude 回應中的 markdown JSON 代碼塊
+    _JSON_BLOCK = re.compile(r'```(?:json)?\s*(.*?)\s*```', re.DOTALL)
+
+    # 建議分數的提取模式（依優先順序，預先編譯）
+    SCORE_PATTERNS = tuple(re.compile(pattern) for pattern in (
+        r'應該.*?(\d+)',
+        r'至少.*?(\d+)',
+        r'給.*?(\d+)',
+        r'(\d+)\s*分'
+    ))
+
     def __init__(self, database, anthropic_api_key: str = None):
         """
         初始化反饋分析器
@@ -28,12 +144,10 @@ class FeedbackAnalyzer:
         self.db = database
         self.logger = logging.getLogger("FeedbackAnalyzer")
 
-        # 初始化 Anthropic client（用於分析反饋文本）
-        api_key = anthropic_api_key or os.environ.get("ANTHROPIC_API_KEY")
-        if api_key:
-            self.client = anthropic.Anthropic(api_key=api_key)
-        else:
-            self.client = None
+        # Anthropic client（用於分析反饋文本）在首次使用時才建立，見 client 屬性
+        self._api_key = anthropic_api_key or os.environ.get("ANTHROPIC_API_KEY")
+        self._client = None
+        if not self._api_key:
             self.logger.warning("未提供 Anthropic API key，將使用規則基礎的分析")
 
         # 預定義的反饋關鍵詞模式
@@ -72,6 +186,82 @@ class FeedbackAnalyzer:
             ]
         }
 
+        # 每類關鍵詞預先編譯為一個交替正則，每段文本只需在 C 層各掃描一次
+        self._keyword_regexes = {
+            bucket: re.compile('|'.join(re.escape(kw) for kw in keywords))
+            for bucket, keywords in self.feedback_patterns.items()
+        }
+
+        # 快照的關鍵詞情緒判斷以 SQL 表達式在資料庫內完成（與 _rule_based_analysis 相同的子字串比對）
+        self._keyword_sentiment_sql = (
+            f"CASE WHEN {self._keyword_condition(('good_feedback',), 'feedback_lower')} THEN 'positive' "
+            f"WHEN {self._keyword_condition(('too_harsh', 'too_lenient'), 'feedback_lower')} THEN 'negative' "
+            f"ELSE 'neutral' END"
+        )
+
+        # 反饋見解快取：(days, min_occurrences) -> (寫入時間, 見解字典)
+        self._insight_cache: Dict[Tuple[int, int], Tuple[float, Dict]] = {}
+
+        # 反饋模式寫入佇列與背景寫入線程（首次處理反饋時才啟動）
+        self._pattern_queue = queue.Queue(maxsize=self.PATTERN_QUEUE_SIZE)
+        self._pattern_writer = None
+        self._pattern_writer_lock = threading.Lock()
+        self._pattern_writer_closed = False
+        # 快照批量分析的輪詢線程（每個分析器最多一個，有未收取的批量時才運行）
+        self._batch_poller = None
+        self._batch_lock = threading.Lock()
+        self._batch_stop = threading.Event()
+
+        # 退出時先寫入佇列中的模式更新（在資料庫的 atexit 之後註冊，因此先於其執行）
+        atexit.register(self.close)
+
+        # 繼續輪詢上次運行時提交、尚未收取結果的批量
+        if self._api_key:
+            self._start_batch_poller()
+
+    @property
+    def client(self):
+        """
+        延遲建立的 Anthropic client（anthropic 套件導入成本高，只在需要 Claude 分析時才載入）
+
+        Returns:
+            Anthropic client，未提供 API key 時返回 None
+        """
+        if self._client is None and self._api_key:
+            import anthropic
+            self._client = anthropic.Anthropic(api_key=self._api_key)
+        return self._client
+
+    def _keyword_condition(self, buckets: Tuple[str, ...], column: str) -> str:
+        """
+        構建「欄位包含任一關鍵詞」的 SQL 條件（關鍵詞以字面值嵌入）
+
+        Args:
+            buckets: 關鍵詞類別
+            column: 比對的欄位（需已轉為小寫）
+
+        Returns:
+            SQL 條件表達式
+        """
+        conditions = ' OR '.join(
+            "instr({}, '{}') > 0".format(column, keyword.replace("'", "''"))
+            for bucket in buckets
+            for keyword in self.feedback_patterns[bucket]
+        )
+        return f"({conditions})"
+
+    def _match_keyword_buckets(self, text_lower: str) -> set:
+        """
+        找出文本命中的所有關鍵詞類別
+
+        Args:
+            text_lower: 已轉為小寫的反饋文本
+
+        Returns:
+            命中的類別名稱集合
+        """
+        return {bucket for bucket, regex in self._keyword_regexes.items() if regex.search(text_lower)}
+
     def analyze_feedback_text(self, feedback_text: str, score_data: Dict) -> Dict:
         """
         使用 Claude 分析單條反饋文本
@@ -83,13 +273,59 @@ class FeedbackAnalyzer:
         Returns:
             分析結果字典
         """
-        if not self.client or not feedback_text.strip():
-            # 回退到規則基礎分析
+        if not feedback_text.strip():
             return self._rule_based_analysis(feedback_text, score_data)
 
+        # 簡短且意圖明確的反饋（如「太嚴格!」）規則分析即足夠，不需調用 Claude
+        hits = self._match_keyword_buckets(feedback_text.lower())
+        if len(feedback_text) < self.PREFILTER_MAX_LENGTH and len(hits) == 1:
+            self.logger.info(f"短反饋預篩命中，略過 Claude 分析: {next(iter(hits))}")
+            return self._rule_based_analysis(feedback_text, score_data, hits)
+
+        if not self.client:
+            # 回退到規則基礎分析
+            return self._rule_based_analysis(feedback_text, score_data, hits)
+
+        # 相同的反饋文本與分數直接使用快取的分析結果
+        cache_key = self._analysis_cache_key(feedback_text, score_data)
+        cached = self._get_cached_analysis(cache_key)
+        if cached is not None:
+            self.logger.info(f"使用快取的反饋分析: {cached.get('feedback_type')}")
+            return cached
+
         try:
             # 使用 Claude 深度分析反饋
-            prompt = f"""請分析以下用戶對 AI 評分系統的反饋，提取關鍵信息：
+            message = self.client.messages.create(
+                model=self.ANALYSIS_MODEL,
+                max_tokens=self.ANALYSIS_MAX_TOKENS,
+                messages=[{
+                    "role": "user",
+                    "content": self._build_analysis_prompt(feedback_text, score_data)
+                }]
+            )
+
+            analysis = self._parse_analysis_response(message.content[0].text)
+            self.logger.info(f"Claude 分析反饋完成: {analysis.get('feedback_type')}")
+            self._cache_analysis(cache_key, analysis)
+            return analysis
+
+        except Exception as e:
+            self.logger.error(f"Claude 分析反饋失敗，回退到規則分析: {e}")
+            return self._rule_based_analysis(feedback_text, score_data, hits)
+
+    @staticmethod
+    def _build_analysis_prompt(feedback_text: str, score_data: Dict) -> str:
+        """
+        構建反饋分析的 Claude prompt
+
+        Args:
+            feedback_text: 用戶反饋文本
+            score_data: 原始評分數據
+
+        Returns:
+            prompt 文本
+        """
+        return f"""請分析以下用戶對 AI 評分系統的反饋，提取關鍵信息：
 
 ## 原始評分信息
 - 格式分數: {score_data.get('format_score', 'N/A')}/100
@@ -111,88 +347,141 @@ class FeedbackAnalyzer:
 
 請只返回 JSON，不要其他文字。"""
 
-            message = self.client.messages.create(
-                model="claude-3-5-haiku-20241022",
-                max_tokens=500,
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
-            )
+    @classmethod
+    def _parse_analysis_response(cls, result_text: str) -> Dict:
+        """
+        解析 Claude 返回的分析 JSON
 
-            result_text = message.content[0].text.strip()
+        Args:
+            result_text: Claude 回應文本
 
-            # 提取 JSON（處理可能的 markdown 代碼塊）
-            if '```json' in result_text:
-                result_text = result_text.split('```json')[1].split('```')[0].strip()
-            elif '```' in result_text:
-                result_text = result_text.split('```')[1].split('```')[0].strip()
+        Returns:
+            分析結果字典
+        """
+        # 大多數回應就是純 JSON，直接解析
+        try:
+            return _loads(result_text)
+        except ValueError:
+            pass
 
-            analysis = json.loads(result_text)
-            self.logger.info(f"Claude 分析反饋完成: {analysis.get('feedback_type')}")
-            return analysis
+        # 提取 JSON（處理可能的 markdown 代碼塊）
+        match = cls._JSON_BLOCK.search(result_text)
+        return _loads(match.group(1) if match else result_text)
+
+    @staticmethod
+    def _analysis_cache_key(feedback_text: str, score_data: Dict) -> str:
+        """
+        計算反饋分析快取鍵（反饋文本與各維度分數的 SHA256）
+
+        Args:
+            feedback_text: 用戶反饋文本
+            score_data: 原始評分數據
+
+        Returns:
+            快取鍵
+        """
+        key_data = [
+            feedback_text.strip(),
+            score_data.get('format_score'),
+            score_data.get('content_score'),
+            score_data.get('clarity_score'),
+            score_data.get('actionability_score'),
+            score_data.get('overall_score')
+        ]
+        return hashlib.sha256(json.dumps(key_data, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def _get_cached_analysis(self, cache_key: str) -> Optional[Dict]:
+        """
+        讀取未過期的反饋分析快取
+
+        Args:
+            cache_key: 快取鍵
+
+        Returns:
+            分析結果字典，未命中時返回 None
+        """
+        try:
+            cutoff = _iso_days_ago(self.ANALYSIS_CACHE_TTL_DAYS)
+            with self.db._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT result_json FROM feedback_analysis_cache
+                    WHERE cache_key = ? AND created_at >= ?
+                """, (cache_key, cutoff))
+                row = cursor.fetchone()
+                return _loads(row['result_json']) if row else None
 
         except Exception as e:
-            self.logger.error(f"Claude 分析反饋失敗，回退到規則分析: {e}")
-            return self._rule_based_analysis(feedback_text, score_data)
+            self.logger.warning(f"讀取反饋分析快取失敗: {e}")
+            return None
+
+    def _cache_analysis(self, cache_key: str, analysis: Dict) -> None:
+        """
+        寫入反饋分析快取，並清除已過期的快取
+
+        Args:
+            cache_key: 快取鍵
+            analysis: 分析結果
+        """
+        try:
+            now = datetime.now()
+            cutoff = _iso_days_ago(self.ANALYSIS_CACHE_TTL_DAYS, now)
+            with self.db._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    INSERT OR REPLACE INTO feedback_analysis_cache (cache_key, result_json, created_at)
+                    VALUES (?, ?, ?)
+                """, (cache_key, _dumps(analysis), now.isoformat()))
+                cursor.execute("DELETE FROM feedback_analysis_cache WHERE created_at < ?", (cutoff,))
+                conn.commit()
+
+        except Exception as e:
+            self.logger.warning(f"寫入反饋分析快取失敗: {e}")
 
-    def _rule_based_analysis(self, feedback_text: str, score_data: Dict) -> Dict:
+    def _rule_based_analysis(self, feedback_text: str, score_data: Dict,
+                             hits: Optional[set] = None) -> Dict:
         """
         基於規則的反饋分析（當 Claude API 不可用時使用）
 
         Args:
             feedback_text: 用戶反饋文本
             score_data: 原始評分數據
+            hits: 已比對出的關鍵詞類別（可選，未提供時重新比對）
 
         Returns:
             分析結果字典
         """
-        text_lower = feedback_text.lower()
+        # 一次比對出所有命中的關鍵詞類別，之後只做集合查詢
+        if hits is None:
+            hits = self._match_keyword_buckets(feedback_text.lower())
+
+        # 判斷反饋類型（負面類型依優先順序取第一個）
+        feedback_type = next((ftype for ftype in self.FEEDBACK_TYPE_PRIORITY if ftype in hits), 'neutral')
 
         # 判斷情緒
         sentiment = 'neutral'
-        if any(kw in text_lower for kw in self.feedback_patterns['good_feedback']):
+        if 'good_feedback' in hits:
             sentiment = 'positive'
-        elif any(kw in text_lower for kw in
-                 self.feedback_patterns['too_harsh'] +
-                 self.feedback_patterns['too_lenient'] +
-                 self.feedback_patterns['missed_issue'] +
-                 self.feedback_patterns['incorrect_assessment']):
+        elif feedback_type != 'neutral':
             sentiment = 'negative'
 
-        # 判斷反饋類型
-        feedback_type = 'neutral'
-        for ftype, keywords in self.feedback_patterns.items():
-            if ftype in ['good_feedback', 'format_issue', 'content_issue',
-                        'clarity_issue', 'actionability_issue']:
-                continue
-            if any(kw in text_lower for kw in keywords):
-                feedback_type = ftype
-                break
-
         # 判斷涉及的維度
-        affected_dimension = None
-        for dimension in ['format', 'content', 'clarity', 'actionability']:
-            if any(kw in text_lower for kw in self.feedback_patterns[f'{dimension}_issue']):
-                affected_dimension = dimension
-                break
+        affected_dimension = next(
+            (dimension for dimension in self.DIMENSION_PRIORITY if f'{dimension}_issue' in hits), None
+        )
 
         # 提取分數調整建議（簡單的數字模式匹配）
+        # 沒有原始總分時無法計算調整量，不需掃描文本
         score_adjustment = None
-        score_patterns = [
-            r'應該.*?(\d+)',
-            r'至少.*?(\d+)',
-            r'給.*?(\d+)',
-            r'(\d+)\s*分'
-        ]
-        for pattern in score_patterns:
-            match = re.search(pattern, feedback_text)
-            if match:
-                suggested_score = int(match.group(1))
-                current_score = score_data.get('overall_score', 0)
-                if current_score and suggested_score != current_score:
-                    score_adjustment = suggested_score - current_score
-                    break
+        current_score = score_data.get('overall_score', 0)
+        if current_score:
+            for pattern in self.SCORE_PATTERNS:
+                match = pattern.search(feedback_text)
+                if match:
+                    suggested_score = int(match.group(1))
+                    if suggested_score != current_score:
+                        score_adjustment = suggested_score - current_score
+                        break
 
         return {
             'sentiment': sentiment,
@@ -207,6 +496,9 @@ class FeedbackAnalyzer:
         """
         處理新的用戶反饋，分析並更新模式庫
 
+        模式庫更新由背景線程批量寫入（約 PATTERN_FLUSH_INTERVAL 秒內生效）；
+        需要立即讀取時先調用 flush_pattern_updates()。
+
         Args:
             score_id: 評分記錄 ID
             feedback_text: 用戶反饋文本
@@ -224,8 +516,10 @@ class FeedbackAnalyzer:
             # 分析反饋
             analysis = self.analyze_feedback_text(feedback_text, score_record)
 
-            # 更新或創建反饋模式
-            self._update_feedback_pattern(analysis, score_record, feedback_text)
+            # 更新或創建反饋模式：交給背景線程批量寫入；佇列已滿或已關閉時改為同步寫入
+            row = self._feedback_pattern_row(analysis, feedback_text)
+            if not self._enqueue_pattern_update(row):
+                self._upsert_feedback_patterns([row])
 
             self.logger.info(f"反饋處理完成: {score_id}, 類型={analysis['feedback_type']}")
             return True
@@ -234,114 +528,204 @@ class FeedbackAnalyzer:
             self.logger.error(f"處理反饋失敗: {e}", exc_info=True)
             return False
 
-    def _update_feedback_pattern(self, analysis: Dict, score_record: Dict,
-                                  feedback_text: str) -> None:
+    @staticmethod
+    def _feedback_pattern_row(analysis: Dict, feedback_text: str) -> tuple:
         """
-        更新反饋模式數據庫
+        將分析結果轉為反饋模式 UPSERT 的參數
 
         Args:
             analysis: 分析結果
-            score_record: 評分記錄
             feedback_text: 原始反饋文本
+
+        Returns:
+            _SQL_UPSERT_FEEDBACK_PATTERN 的參數
+        """
+        # 生成模式 ID（基於類型和維度）
+        dimension = analysis.get('affected_dimension') or 'general'
+        feedback_type = analysis['feedback_type']
+        now = _iso_now()
+
+        return (
+            f"{feedback_type}:{dimension}",
+            feedback_type,
+            dimension,
+            analysis.get('key_learning', ''),
+            analysis.get('suggested_score_adjustment'),
+            feedback_text[:200],
+            analysis.get('specific_issue', ''),
+            f"考慮調整{dimension}評分標準" if dimension != 'general' else '檢討整體評分標準',
+            now,
+            now,
+            now
+        )
+
+    def _upsert_feedback_patterns(self, rows: List[tuple]) -> None:
+        """
+        在單一交易中更新反饋模式數據庫
+
+        Args:
+            rows: _feedback_pattern_row 產生的參數列表（同一模式可出現多次，依序累加）
         """
         try:
             with self.db._get_connection() as conn:
                 cursor = conn.cursor()
 
-                # 生成模式 ID（基於類型和維度）
-                dimension = analysis.get('affected_dimension') or 'general'
-                feedback_type = analysis['feedback_type']
-                pattern_id = f"{feedback_type}:{dimension}"
-
-                # 查詢現有模式
-                cursor.execute("""
-                    SELECT * FROM feedback_patterns WHERE pattern_id = ?
-                """, (pattern_id,))
-
-                existing = cursor.fetchone()
-                now = datetime.now().isoformat()
-
-                if existing:
-                    # 更新現有模式
-                    occurrence_count = existing['occurrence_count'] + 1
-
-                    # 合併示例反饋（保留最多5個）
-                    example_feedbacks = json.loads(existing['example_feedbacks'] or '[]')
-                    example_feedbacks.append(feedback_text[:200])
-                    example_feedbacks = example_feedbacks[-5:]  # 只保留最新5個
-
-                    # 更新平均分數偏差
-                    avg_deviation = existing['avg_score_deviation'] or 0
-                    if analysis.get('suggested_score_adjustment'):
-                        new_deviation = analysis['suggested_score_adjustment']
-                        avg_deviation = (avg_deviation * (occurrence_count - 1) + new_deviation) / occurrence_count
-
-                    cursor.execute("""
-                        UPDATE feedback_patterns
-                        SET occurrence_count = ?,
-                            avg_score_deviation = ?,
-                            example_feedbacks = ?,
-                            last_seen = ?,
-                            updated_at = ?
-                        WHERE pattern_id = ?
-                    """, (
-                        occurrence_count,
-                        avg_deviation,
-                        json.dumps(example_feedbacks, ensure_ascii=False),
-                        now,
-                        now,
-                        pattern_id
-                    ))
-                else:
-                    # 創建新模式
-                    cursor.execute("""
-                        INSERT INTO feedback_patterns (
-                            pattern_id, pattern_type, dimension, feedback_theme,
-                            occurrence_count, avg_score_deviation, example_feedbacks,
-                            identified_issue, suggested_adjustment,
-                            last_seen, created_at, updated_at
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        pattern_id,
-                        feedback_type,
-                        dimension,
-                        analysis.get('key_learning', ''),
-                        1,
-                        analysis.get('suggested_score_adjustment'),
-                        json.dumps([feedback_text[:200]], ensure_ascii=False),
-                        analysis.get('specific_issue', ''),
-                        f"考慮調整{dimension}評分標準" if dimension != 'general' else '檢討整體評分標準',
-                        now,
-                        now,
-                        now
-                    ))
+                # 新模式直接插入；已存在時累加次數、更新平均偏差與示例反饋
+                cursor.executemany(self._SQL_UPSERT_FEEDBACK_PATTERN, rows)
 
                 conn.commit()
-                self.logger.info(f"反饋模式已更新: {pattern_id}")
+                self.logger.info(f"反饋模式已更新: {', '.join(sorted({row[0] for row in rows}))}")
+
+            # 模式庫已變更，已快取的見解失效
+            self._insight_cache.clear()
 
         except Exception as e:
             self.logger.error(f"更新反饋模式失敗: {e}", exc_info=True)
 
-    def get_feedback_insights(self, days: int = 30, min_occurrences: int = 2) -> Dict:
+    def _enqueue_pattern_update(self, row: tuple) -> bool:
+        """
+        將反饋模式更新放入延遲寫入佇列（必要時啟動背景寫入線程）
+
+        Returns:
+            是否已放入佇列；佇列已滿或已關閉時返回 False，由呼叫端同步寫入
+        """
+        with self._pattern_writer_lock:
+            if self._pattern_writer_closed:
+                return False
+
+            if self._pattern_writer is None:
+                self._pattern_writer = threading.Thread(
+                    target=self._pattern_writer_loop,
+                    name="FeedbackPatternWriter",
+                    daemon=True
+                )
+                self._pattern_writer.start()
+
+            try:
+                self._pattern_queue.put_nowait(row)
+                return True
+            except queue.Full:
+                self.logger.warning("反饋模式寫入佇列已滿，改為同步寫入")
+                return False
+
+    def _pattern_writer_loop(self):
+        """背景寫入線程：收集佇列中的模式更新，達到批量上限或等待逾時後以單一交易寫入"""
+        pattern_queue = self._pattern_queue
+        stop = False
+        while not stop:
+            item = pattern_queue.get()
+            batch = []
+            received = 1
+            if item is None:
+                stop = True
+            else:
+                batch.append(item)
+
+            deadline = time.monotonic() + self.PATTERN_FLUSH_INTERVAL
+            while not stop and len(batch) < self.PATTERN_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = pattern_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                received += 1
+                if item is None:
+                    stop = True
+                else:
+                    batch.append(item)
+
+            if batch:
+                self._upsert_feedback_patterns(batch)
+
+            for _ in range(received):
+                pattern_queue.task_done()
+
+    def flush_pattern_updates(self):
+        """等待延遲寫入佇列中的反饋模式更新全部寫入資料庫"""
+        if self._pattern_writer is not None:
+            self._pattern_queue.join()
+
+    def close(self):
+        """
+        停止快照批量分析的輪詢線程（未收取的批量保留在資料庫中，下次啟動時繼續），
+        並寫入佇列中剩餘的反饋模式更新、停止背景寫入線程（之後的更新改為同步寫入）
+        """
+        with self._batch_lock:
+            self._batch_stop.set()
+            poller = self._batch_poller
+        if poller is not None:
+            poller.join()
+
+        with self._pattern_writer_lock:
+            self._pattern_writer_closed = True
+            writer = self._pattern_writer
+            if writer is None:
+                return
+            self._pattern_queue.put(None)
+
+        writer.join()
+        self._pattern_writer = None
+
+    def get_feedback_insights(self, days: int = 30, min_occurrences: int = 2,
+                              cutoff_date: Optional[str] = None) -> Dict:
         """
         獲取反饋學習見解（用於注入到 prompt 中）
 
         Args:
             days: 查看最近幾天的反饋
             min_occurrences: 最小出現次數閾值
+            cutoff_date: 已計算好的截止時間（可選，呼叫端在同一批查詢中共用；指定時不使用快取）
 
         Returns:
-            反饋見解字典
+            反饋見解字典（呼叫端可自由修改，不影響快取）
+        """
+        if cutoff_date is not None:
+            insights = self._load_feedback_insights(days, min_occurrences, cutoff_date)
+            if insights is not None:
+                return insights
+        else:
+            # 短時間內的重複讀取（如 UI 輪詢統計）直接返回快取結果的副本
+            now = time.monotonic()
+            key = (days, min_occurrences)
+            hit = self._insight_cache.get(key)
+            if hit and now - hit[0] < self.INSIGHTS_CACHE_TTL:
+                return copy.deepcopy(hit[1])
+
+            insights = self._load_feedback_insights(days, min_occurrences, _iso_days_ago(days))
+            if insights is not None:
+                self._insight_cache[key] = (now, insights)
+                return copy.deepcopy(insights)
+
+        return {
+            'has_insights': False,
+            'summary': '獲取反饋數據時發生錯誤',
+            'adjustments': []
+        }
+
+    def _load_feedback_insights(self, days: int, min_occurrences: int,
+                                cutoff_date: str) -> Optional[Dict]:
+        """
+        從資料庫查詢並構建反饋見解
+
+        Args:
+            days: 查看最近幾天的反饋
+            min_occurrences: 最小出現次數閾值
+            cutoff_date: 查詢的截止時間
+
+        Returns:
+            反饋見解字典，查詢失敗時返回 None
         """
         try:
             with self.db._get_connection() as conn:
                 cursor = conn.cursor()
 
-                cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
-
-                # 查詢高頻反饋模式
+                # 查詢高頻反饋模式（只取構建見解需要的欄位，按位置解包）
                 cursor.execute("""
-                    SELECT * FROM feedback_patterns
+                    SELECT pattern_type, dimension, feedback_theme, occurrence_count,
+                           avg_score_deviation, identified_issue, suggested_adjustment
+                    FROM feedback_patterns
                     WHERE last_seen >= ? AND occurrence_count >= ?
                     ORDER BY occurrence_count DESC
                     LIMIT 10
@@ -351,13 +735,13 @@ class FeedbackAnalyzer:
 
                 # 查詢實際的反饋總數
                 cursor.execute("""
-                    SELECT COUNT(*) as total
+                    SELECT COUNT(*)
                     FROM issue_scores
                     WHERE user_feedback IS NOT NULL
                     AND user_feedback != ''
                     AND created_at >= ?
                 """, (cutoff_date,))
-                total_feedbacks = cursor.fetchone()['total']
+                total_feedbacks = cursor.fetchone()[0]
 
                 if not patterns:
                     return {
@@ -375,33 +759,33 @@ class FeedbackAnalyzer:
                     'general_guidance': []
                 }
 
-                for pattern in patterns:
-                    issue_desc = f"{pattern['feedback_theme']} (出現 {pattern['occurrence_count']} 次)"
+                for (pattern_type, dimension, feedback_theme, occurrence_count,
+                     avg_score_deviation, identified_issue, suggested_adjustment) in patterns:
+                    issue_desc = f"{feedback_theme} (出現 {occurrence_count} 次)"
                     insights['top_issues'].append(issue_desc)
 
                     # 維度特定的調整建議
-                    dimension = pattern['dimension']
                     if dimension and dimension != 'general':
                         if dimension not in insights['dimension_adjustments']:
                             insights['dimension_adjustments'][dimension] = []
 
                         adjustment = {
-                            'issue': pattern['identified_issue'],
-                            'suggestion': pattern['suggested_adjustment'],
-                            'avg_deviation': pattern['avg_score_deviation']
+                            'issue': identified_issue,
+                            'suggestion': suggested_adjustment,
+                            'avg_deviation': avg_score_deviation
                         }
                         insights['dimension_adjustments'][dimension].append(adjustment)
 
                     # 通用指導
-                    if pattern['pattern_type'] == 'too_harsh':
+                    if pattern_type == 'too_harsh':
                         insights['general_guidance'].append(
                             f"⚠️ 用戶反映{dimension or '整體'}評分過於嚴格，考慮適度放寬標準"
                         )
-                    elif pattern['pattern_type'] == 'too_lenient':
+                    elif pattern_type == 'too_lenient':
                         insights['general_guidance'].append(
                             f"⚠️ 用戶反映{dimension or '整體'}評分過於寬鬆，考慮提高要求"
                         )
-                    elif pattern['pattern_type'] == 'missed_issue':
+                    elif pattern_type == 'missed_issue':
                         insights['general_guidance'].append(
                             f"⚠️ 用戶指出遺漏了{dimension or '某些'}問題，加強該方面的檢查"
                         )
@@ -410,67 +794,81 @@ class FeedbackAnalyzer:
 
         except Exception as e:
             self.logger.error(f"獲取反饋見解失敗: {e}", exc_info=True)
-            return {
-                'has_insights': False,
-                'summary': '獲取反饋數據時發生錯誤',
-                'adjustments': []
-            }
+            return None
 
     def create_feedback_snapshot(self) -> Optional[str]:
         """
         創建反饋快照（定期執行，用於追蹤改進趨勢）
 
+        有 Claude 時先以快取的分析結果與關鍵詞情緒寫入快照，未快取的反饋提交為 Message Batches 後即返回；
+        批量記錄在資料庫中，由背景輪詢線程在批量結束後收取結果並更新快照的情緒計數。
+
         Returns:
             快照 ID，如果失敗則返回 None
         """
         try:
-            # 獲取最近 30 天的所有反饋
-            with self.db._get_connection() as conn:
-                cursor = conn.cursor()
-
-                cutoff_date = (datetime.now() - timedelta(days=30)).isoformat()
-
-                # 統計反饋數量和情緒
-                cursor.execute("""
-                    SELECT
-                        COUNT(*) as total,
-                        user_feedback
+            # 整個快照使用同一個時間點（截止時間、快照 ID 與建立時間）
+            snapshot_time = datetime.now()
+            cutoff_date = _iso_days_ago(30, snapshot_time)
+
+            # 最近 30 天的反饋；關鍵詞皆為 ASCII 小寫或無大小寫的中文，SQLite 的 lower() 即足以比對
+            # （MATERIALIZED 讓每行只計算一次 lower()，不會展開到每個 instr 中）
+            recent_feedbacks = """
+                WITH fb AS MATERIALIZED (
+                    SELECT user_feedback, lower(user_feedback) AS feedback_lower,
+                           format_score, content_score, clarity_score,
+                           actionability_score, overall_score
                     FROM issue_scores
                     WHERE user_feedback IS NOT NULL
                     AND user_feedback != ''
                     AND created_at >= ?
-                """, (cutoff_date,))
-
-                feedbacks = cursor.fetchall()
-                total_feedbacks = len(feedbacks)
-
-                if total_feedbacks == 0:
-                    self.logger.info("沒有新反饋，跳過快照創建")
-                    return None
-
-                # 簡單的情緒統計（可以改進為使用 Claude 分析）
-                positive = 0
-                negative = 0
-                neutral = 0
-
-                for fb in feedbacks:
-                    text = (fb['user_feedback'] or '').lower()
-                    if any(kw in text for kw in self.feedback_patterns['good_feedback']):
-                        positive += 1
-                    elif any(kw in text for kw in
-                            self.feedback_patterns['too_harsh'] +
-                            self.feedback_patterns['too_lenient']):
-                        negative += 1
-                    else:
-                        neutral += 1
-
-                # 獲取 top issues
-                insights = self.get_feedback_insights(days=30, min_occurrences=2)
-
-                # 創建快照
-                snapshot_id = f"snapshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                now = datetime.now().isoformat()
+                )
+            """
+
+            if self.client:
+                # 有 Claude 時取回每條反饋（連同評分與關鍵詞情緒），以批量分析結果為準
+                with self.db._get_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute(f"""
+                        {recent_feedbacks}
+                        SELECT user_feedback, format_score, content_score, clarity_score,
+                               actionability_score, overall_score,
+                               {self._keyword_sentiment_sql} AS keyword_sentiment
+                        FROM fb
+                    """, (cutoff_date,))
+                    feedbacks = self.db._fetch_dicts(cursor)
+
+                # 已快取的分析結果立即採用，其餘在快照寫入後由背景批量分析
+                analyses, pending = self._split_cached_analyses(feedbacks)
+                sentiments = self._count_sentiments(feedbacks, analyses)
+            else:
+                pending = {}
+
+                # 只用關鍵詞判斷時，分類與計數全部在資料庫內完成，不需取回反饋文本
+                with self.db._get_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute(f"""
+                        {recent_feedbacks}
+                        SELECT {self._keyword_sentiment_sql} AS sentiment, COUNT(*)
+                        FROM fb
+                        GROUP BY sentiment
+                    """, (cutoff_date,))
+                    sentiments = Counter(dict(cursor.fetchall()))
+
+            total_feedbacks = sum(sentiments.values())
+            if total_feedbacks == 0:
+                self.logger.info("沒有新反饋，跳過快照創建")
+                return None
+
+            # 獲取 top issues
+            insights = self.get_feedback_insights(days=30, min_occurrences=2, cutoff_date=cutoff_date)
+
+            # 創建快照
+            snapshot_id = f"snapshot_{snapshot_time.strftime('%Y%m%d_%H%M%S')}"
+            now = snapshot_time.isoformat()
 
+            with self.db._get_connection() as conn:
+                cursor = conn.cursor()
                 cursor.execute("""
                     INSERT INTO feedback_snapshots (
                         snapshot_id, snapshot_date, total_feedbacks,
@@ -480,25 +878,280 @@ class FeedbackAnalyzer:
                     ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """, (
                     snapshot_id,
-                    datetime.now().date().isoformat(),
+                    snapshot_time.date().isoformat(),
                     total_feedbacks,
-                    positive,
-                    negative,
-                    neutral,
-                    json.dumps(insights.get('top_issues', []), ensure_ascii=False),
-                    json.dumps(insights, ensure_ascii=False),
-                    json.dumps(insights.get('general_guidance', []), ensure_ascii=False),
+                    sentiments['positive'],
+                    sentiments['negative'],
+                    sentiments['neutral'],
+                    _dumps(insights.get('top_issues', [])),
+                    _dumps(insights),
+                    _dumps(insights.get('general_guidance', [])),
                     now
                 ))
 
                 conn.commit()
                 self.logger.info(f"反饋快照已創建: {snapshot_id}")
-                return snapshot_id
+
+            # 批量分析可能需要數小時，只提交不等待（HTTP 請求或 cron 不被佔用）
+            if pending:
+                self._submit_snapshot_batches(snapshot_id, feedbacks, pending)
+
+            return snapshot_id
 
         except Exception as e:
             self.logger.error(f"創建反饋快照失敗: {e}", exc_info=True)
             return None
 
+    def _split_cached_analyses(self, feedbacks: List[Dict]) -> Tuple[Dict[int, Dict], Dict[int, str]]:
+        """
+        取出不需調用 Claude 的反饋分析結果（短反饋預篩與已快取的結果）
+
+        Args:
+            feedbacks: 反饋列表（包含 user_feedback 與各維度分數）
+
+        Returns:
+            (以索引為鍵的已有分析結果, 以索引為鍵的待分析反饋快取鍵)
+        """
+        results = {}
+        pending = {}
+        prefiltered = 0
+
+        for index, fb in enumerate(feedbacks):
+            feedback_text = fb['user_feedback']
+
+            # 與 analyze_feedback_text 相同的短反饋預篩
+            hits = self._match_keyword_buckets(feedback_text.lower())
+            if len(feedback_text) < self.PREFILTER_MAX_LENGTH and len(hits) == 1:
+                results[index] = self._rule_based_analysis(feedback_text, fb, hits)
+                prefiltered += 1
+                continue
+
+            cache_key = self._analysis_cache_key(feedback_text, fb)
+            cached = self._get_cached_analysis(cache_key)
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending[index] = cache_key
+
+        if prefiltered:
+            self.logger.info(f"短反饋預篩命中 {prefiltered} 條，略過批量分析")
+
+        return results, pending
+
+    @staticmethod
+    def _count_sentiments(feedbacks: List[Dict], analyses: Dict[int, Dict]) -> Counter:
+        """
+        統計反饋情緒（以分析結果為準，沒有有效結果時使用關鍵詞情緒）
+
+        Args:
+            feedbacks: 反饋列表（包含 keyword_sentiment）
+            analyses: 以索引為鍵的分析結果
+
+        Returns:
+            各情緒的計數
+        """
+        sentiments = Counter()
+        for index, fb in enumerate(feedbacks):
+            sentiment = analyses.get(index, {}).get('sentiment')
+            if sentiment not in ('positive', 'negative', 'neutral'):
+                sentiment = fb['keyword_sentiment']
+            sentiments[sentiment] += 1
+        return sentiments
+
+    def _message_batches(self):
+        """Message Batches API 資源（新版 SDK 為 client.messages.batches，舊版位於 beta 命名空間）"""
+        return getattr(self.client.messages, 'batches', None) or self.client.beta.messages.batches
+
+    def _submit_snapshot_batches(self, snapshot_id: str, feedbacks: List[Dict], pending: Dict[int, str]) -> None:
+        """
+        以 Message Batches API 提交快照中未快取的反饋，並記錄批量以便背景輪詢收取結果
+
+        批量請求費用為逐筆調用的一半；已在其他未結束批量中的反饋不重複提交（結果會寫入分析快取），
+        在本快照中保留關鍵詞情緒。
+
+        Args:
+            snapshot_id: 快照 ID
+            feedbacks: 反饋列表（包含 user_feedback、各維度分數與 keyword_sentiment）
+            pending: 以索引為鍵的待分析反饋快取鍵
+        """
+        try:
+            with self._batch_lock:
+                with self.db._get_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT requests_json FROM feedback_snapshot_batches")
+                    in_flight = {
+                        cache_key
+                        for (requests_json,) in cursor.fetchall()
+                        for cache_key, _ in _loads(requests_json).values()
+                    }
+
+                # 同一快照內相同的反饋也只提交一次
+                indexes = []
+                for index, cache_key in pending.items():
+                    if cache_key not in in_flight:
+                        in_flight.add(cache_key)
+                        indexes.append(index)
+
+                skipped = len(pending) - len(indexes)
+                if skipped:
+                    self.logger.info(f"{skipped} 條反饋已在進行中的批量分析內，不重複提交")
+
+                batches = self._message_batches()
+                for start in range(0, len(indexes), self.BATCH_MAX_REQUESTS):
+                    chunk = indexes[start:start + self.BATCH_MAX_REQUESTS]
+                    batch = batches.create(requests=[{
+                        # custom_id 只允許英數字、底線與連字號，以索引對應回反饋
+                        'custom_id': f"feedback-{index}",
+                        'params': {
+                            'model': self.ANALYSIS_MODEL,
+                            'max_tokens': self.ANALYSIS_MAX_TOKENS,
+                            'messages': [{
+                                'role': 'user',
+                                'content': self._build_analysis_prompt(feedbacks[index]['user_feedback'], feedbacks[index])
+                            }]
+                        }
+                    } for index in chunk])
+
+                    requests = {
+                        f"feedback-{index}": [pending[index], feedbacks[index]['keyword_sentiment']]
+                        for index in chunk
+                    }
+                    with self.db._get_connection() as conn:
+                        cursor = conn.cursor()
+                        cursor.execute("""
+                            INSERT INTO feedback_snapshot_batches (batch_id, snapshot_id, requests_json, created_at)
+                            VALUES (?, ?, ?, ?)
+                        """, (batch.id, snapshot_id, _dumps(requests), _iso_now()))
+                        conn.commit()
+
+                    self.logger.info(f"已提交反饋批量分析: {batch.id} ({len(chunk)} 條)")
+
+            self._start_batch_poller()
+
+        except Exception as e:
+            self.logger.error(f"提交反饋批量分析失敗，快照保留關鍵詞情緒: {e}")
+
+    def _start_batch_poller(self) -> None:
+        """有未收取的快照批量時啟動背景輪詢線程（已在運行或分析器已關閉時不重複啟動）"""
+        try:
+            with self._batch_lock:
+                if self._batch_stop.is_set() or self._batch_poller is not None:
+                    return
+
+                with self.db._get_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT 1 FROM feedback_snapshot_batches LIMIT 1")
+                    if cursor.fetchone() is None:
+                        return
+
+                self._batch_poller = threading.Thread(
+                    target=self._batch_poller_loop,
+                    name="FeedbackSnapshotBatch",
+                    daemon=True
+                )
+                self._batch_poller.start()
+
+        except Exception as e:
+            self.logger.error(f"啟動反饋批量分析輪詢失敗: {e}")
+
+    def _batch_poller_loop(self) -> None:
+        """背景輪詢線程：定期查詢記錄中的批量，結束的批量收取結果；沒有未收取的批量或分析器關閉時退出"""
+        while True:
+            with self._batch_lock:
+                try:
+                    with self.db._get_connection() as conn:
+                        cursor = conn.cursor()
+                        cursor.execute("""
+                            SELECT batch_id, snapshot_id, requests_json, created_at
+                            FROM feedback_snapshot_batches
+                            ORDER BY created_at
+                        """)
+                        records = cursor.fetchall()
+                except Exception as e:
+                    self.logger.error(f"讀取反饋批量分析記錄失敗: {e}")
+                    records = None
+
+                # 在鎖內判斷退出，避免與剛提交的批量競爭（提交後會重新啟動輪詢線程）
+                if not records or self._batch_stop.is_set():
+                    self._batch_poller = None
+                    return
+
+            for batch_id, snapshot_id, requests_json, created_at in records:
+                if self._batch_stop.is_set():
+                    break
+                self._collect_snapshot_batch(batch_id, snapshot_id, _loads(requests_json), created_at)
+
+            self._batch_stop.wait(self.BATCH_POLL_INTERVAL)
+
+    def _collect_snapshot_batch(self, batch_id: str, snapshot_id: str,
+                                requests: Dict[str, List[str]], created_at: str) -> None:
+        """
+        查詢一個快照批量；已結束時將成功的結果寫入分析快取，依分析的情緒調整快照計數並刪除記錄
+
+        Args:
+            batch_id: 批量 ID
+            snapshot_id: 快照 ID
+            requests: {custom_id: [分析快取鍵, 快照中暫用的關鍵詞情緒]}
+            created_at: 批量提交時間
+        """
+        try:
+            batches = self._message_batches()
+            try:
+                batch = batches.retrieve(batch_id)
+            except Exception as e:
+                if created_at < (datetime.now() - timedelta(seconds=self.BATCH_TIMEOUT)).isoformat():
+                    self.logger.warning(f"反饋批量分析已逾時且無法查詢，放棄收取: {batch_id} ({e})")
+                    self._finish_snapshot_batch(batch_id)
+                else:
+                    self.logger.warning(f"查詢反饋批量分析失敗，稍後重試: {batch_id} ({e})")
+                return
+
+            if batch.processing_status != 'ended':
+                return
+
+            # 每條結果由暫用的關鍵詞情緒改為分析的情緒
+            deltas = Counter()
+            analyzed = 0
+            for entry in batches.results(batch_id):
+                request = requests.get(entry.custom_id)
+                if request is None or entry.result.type != 'succeeded':
+                    continue
+                cache_key, provisional = request
+                try:
+                    analysis = self._parse_analysis_response(entry.result.message.content[0].text)
+                except (ValueError, IndexError) as e:
+                    self.logger.warning(f"解析批量分析結果失敗 ({entry.custom_id}): {e}")
+                    continue
+
+                self._cache_analysis(cache_key, analysis)
+                analyzed += 1
+                sentiment = analysis.get('sentiment')
+                if sentiment in ('positive', 'negative', 'neutral') and sentiment != provisional:
+                    deltas[provisional] -= 1
+                    deltas[sentiment] += 1
+
+            self._finish_snapshot_batch(batch_id, snapshot_id, deltas)
+            self.logger.info(f"反饋快照情緒已依批量分析更新: {snapshot_id} ({batch_id}, {analyzed}/{len(requests)} 條)")
+
+        except Exception as e:
+            self.logger.error(f"收取反饋批量分析結果失敗: {batch_id} ({e})", exc_info=True)
+
+    def _finish_snapshot_batch(self, batch_id: str, snapshot_id: Optional[str] = None,
+                               deltas: Optional[Counter] = None) -> None:
+        """在同一交易中調整快照的情緒計數（可選）並刪除批量記錄，確保結果只套用一次"""
+        with self.db._get_connection() as conn:
+            cursor = conn.cursor()
+            if snapshot_id and deltas:
+                cursor.execute("""
+                    UPDATE feedback_snapshots
+                    SET positive_count = positive_count + ?,
+                        negative_count = negative_count + ?,
+                        neutral_count = neutral_count + ?
+                    WHERE snapshot_id = ?
+                """, (deltas['positive'], deltas['negative'], deltas['neutral'], snapshot_id))
+            cursor.execute("DELETE FROM feedback_snapshot_batches WHERE batch_id = ?", (batch_id,))
+            conn.commit()
+
     def get_feedback_statistics(self, days: int = 30) -> Dict:
         """
         獲取反饋統計數據（用於 UI 展示）
@@ -513,7 +1166,7 @@ class FeedbackAnalyzer:
             with self.db._get_connection() as conn:
                 cursor = conn.cursor()
 
-                cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
+                cutoff_date = _iso_days_ago(days)
 
                 # 總反饋數
                 cursor.execute("""
@@ -535,7 +1188,7 @@ class FeedbackAnalyzer:
                     ORDER BY count DESC
                 """, (cutoff_date,))
 
-                patterns = cursor.fetchall()
+                patterns = self.db._fetch_dicts(cursor)
 
                 # 最近快照
                 cursor.execute("""
@@ -544,14 +1197,14 @@ class FeedbackAnalyzer:
                     LIMIT 5
                 """)
 
-                recent_snapshots = cursor.fetchall()
+                recent_snapshots = self.db._fetch_dicts(cursor)
 
                 return {
                     'total_feedbacks': total,
                     'date_range': f"最近 {days} 天",
-                    'patterns': [dict(p) for p in patterns],
-                    'recent_snapshots': [dict(s) for s in recent_snapshots],
-                    'insights': self.get_feedback_insights(days=days)
+                    'patterns': patterns,
+                    'recent_snapshots': recent_snapshots,
+                    'insights': self.get_feedback_insights(days=days, cutoff_date=cutoff_date)
                 }
 
         except Exception as e:
@@ -6,18 +6,27 @@ Workspace Monitor Gateway - Webhook 路由和 Web UI
 
 import os
 import sys
+import atexit
+import signal
 import hmac
 import hashlib
 import logging
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from flask import Flask, request, jsonify, render_template_string
 from flask_httpauth import HTTPBasicAuth
 from werkzeug.security import generate_password_hash, check_password_hash
 from dotenv import load_dotenv
 import yaml
+import time
+import queue
+import threading
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 
 # 導入資料庫模組
 from database import TaskDatabase
@@ -26,6 +35,7 @@ from database import TaskDatabase
 from gateway_routes import (
     get_dashboard,
     get_webhooks,
+    get_webhook_detail,
     handle_webhook,
     proxy_issue_scorer_scores,
     update_score_feedback,
@@ -50,6 +60,28 @@ from gateway_routes import (
 class WorkspaceGateway:
     """Workspace Monitor Gateway"""
 
+    # 對微服務的 HTTP 連接池大小（keep-alive 連接重複使用，避免每次請求重新握手）
+    HTTP_POOL_CONNECTIONS = 32
+    HTTP_POOL_MAXSIZE = 64
+
+    # 連接逾時（秒）：微服務無法連接時快速失敗，不阻塞 webhook 處理
+    CONNECT_TIMEOUT = 1.0
+
+    # 聚合 Dashboard 數據時等待所有微服務回應的最長時間（秒）
+    AGGREGATE_TIMEOUT = 6
+
+    # Dashboard 聚合數據的快取時間（秒）：多個分頁同時輪詢時只對微服務發出一次請求
+    DASHBOARD_CACHE_TTL = 3
+
+    # webhook 轉發佇列：容量與背景轉發線程數（佇列已滿時返回 503 讓 GitHub 重送）
+    DISPATCH_QUEUE_SIZE = 1000
+    DISPATCH_WORKERS = 4
+    # 關閉時等待佇列中 webhook 轉發完成的最長時間（秒），需短於容器停止的寬限期
+    DISPATCH_DRAIN_TIMEOUT = 8
+
+    # 記憶體中保留的最近 webhook delivery ID 數量（資料庫查詢前的快速去重）
+    DELIVERY_CACHE_SIZE = 4096
+
     def __init__(self, config_path: str = "config.yaml"):
         """初始化 Gateway"""
         load_dotenv()
@@ -68,10 +100,43 @@ class WorkspaceGateway:
         self.issue_copier_url = os.getenv("ISSUE_COPIER_URL", "http://issue-copier:8082")
         self.issue_scorer_url = os.getenv("ISSUE_SCORER_URL", "http://issue-scorer:8083")
 
+        # 對微服務的共用 HTTP session
+        self.http = self._create_http_session()
+        # 並行調用多個微服務，總耗時約為其中最慢者；webhook 轉發與 Dashboard 聚合使用各自的線程池，
+        # 緩慢的轉發（逾時 10 秒）不會佔滿線程而讓 Dashboard 請求逾時
+        # - 轉發：每個轉發線程最多同時轉發到 2 個微服務
+        # - 聚合：3 個數據來源，保留一倍餘量給逾時後仍在執行的請求
+        self._forward_pool = ThreadPoolExecutor(max_workers=self.DISPATCH_WORKERS * 2,
+                                                thread_name_prefix="GatewayForward")
+        self._dashboard_pool = ThreadPoolExecutor(max_workers=6, thread_name_prefix="GatewayDashboard")
+
+        # Dashboard 快取：(寫入時間, 數據)；進行中的聚合請求由後到的請求共用
+        self._dashboard_cache = None
+        self._dashboard_pending = None
+        self._dashboard_lock = threading.Lock()
+
+        # 最近收到的 webhook delivery ID（LRU）
+        self._recent_deliveries = OrderedDict()
+        self._delivery_lock = threading.Lock()
+
+        # webhook 先放入佇列即返回，由背景線程轉發到微服務，回應時間不受微服務延遲影響
+        self._dispatch_queue = queue.Queue(maxsize=self.DISPATCH_QUEUE_SIZE)
+        self._dispatch_lock = threading.Lock()
+        self._dispatch_closed = False
+        for i in range(self.DISPATCH_WORKERS):
+            threading.Thread(
+                target=self._dispatch_loop,
+                name=f"GatewayDispatch-{i}",
+                daemon=True
+            ).start()
+
         # 資料庫（用於記錄 webhook 歷史）
         db_path = os.getenv("DB_PATH", "/var/lib/github-monitor/tasks.db")
         self.db = TaskDatabase(db_path)
 
+        # 退出時先轉發佇列中的 webhook（在資料庫的 atexit 之後註冊，因此先於其執行）
+        atexit.register(self.close)
+
         self.logger.info("Workspace Gateway 初始化完成")
         self.logger.info(f"PR Reviewer: {self.pr_reviewer_url}")
         self.logger.info(f"Issue Copier: {self.issue_copier_url}")
@@ -86,6 +151,21 @@ class WorkspaceGateway:
             print(f"無法載入配置文件: {e}")
             sys.exit(1)
 
+    def _create_http_session(self) -> requests.Session:
+        """建立帶連接池與重試的 HTTP session（網關錯誤時短暫退避後重試）"""
+        # 重試後仍為錯誤狀態時返回最後的回應（而非拋出 RetryError），呼叫端照常檢查 status_code
+        retry = Retry(total=2, backoff_factor=0.1, status_forcelist=[502, 503, 504], raise_on_status=False)
+        adapter = HTTPAdapter(
+            pool_connections=self.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=self.HTTP_POOL_MAXSIZE,
+            max_retries=retry
+        )
+
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
     def _setup_logging(self):
         """設置日誌系統"""
         log_level = os.getenv("LOG_LEVEL", "INFO")
@@ -114,11 +194,132 @@ class WorkspaceGateway:
 
         return hmac.compare_digest(expected_signature, signature)
 
-    def route_webhook(self, event_type: str, payload: Dict) -> Dict:
-        """路由 webhook 到對應的微服務"""
+    def claim_delivery(self, delivery_id: str) -> Optional[List[str]]:
+        """
+        檢查 webhook 是否為 GitHub 重送（相同 X-GitHub-Delivery），首次收到時記錄下來
+
+        Args:
+            delivery_id: X-GitHub-Delivery 標頭的值
+
+        Returns:
+            已處理過（或正在處理）時返回 None；否則返回先前已成功轉發的處理服務（重送時不再轉發），
+            首次收到為空列表
+        """
+        if not delivery_id:
+            return []
+
+        with self._delivery_lock:
+            if delivery_id in self._recent_deliveries:
+                self._recent_deliveries.move_to_end(delivery_id)
+                return None
+            self._recent_deliveries[delivery_id] = None
+            if len(self._recent_deliveries) > self.DELIVERY_CACHE_SIZE:
+                self._recent_deliveries.popitem(last=False)
+
+        # 記憶體中沒有（如重啟後或部分轉發失敗後）時以資料庫為準
+        return self.db.mark_webhook_delivery(delivery_id)
+
+    def forget_delivery(self, delivery_id: str, done_targets: Optional[List[str]] = None):
+        """
+        釋放 delivery ID 記錄，讓 GitHub 重送時可再次處理
+
+        Args:
+            delivery_id: X-GitHub-Delivery 標頭的值
+            done_targets: 已成功轉發的處理服務（可選）；重送時只轉發其餘服務
+        """
+        if not delivery_id:
+            return
+
+        with self._delivery_lock:
+            self._recent_deliveries.pop(delivery_id, None)
+        self.db.unmark_webhook_delivery(delivery_id, done_targets)
+
+    def dispatch_webhook(self, event_type: str, payload: Dict, raw_payload: Optional[bytes] = None,
+                         delivery_id: Optional[str] = None, done_targets: Optional[List[str]] = None) -> bool:
+        """
+        將 webhook 放入轉發佇列，由背景線程調用 route_webhook
+
+        Args:
+            event_type: GitHub 事件類型
+            payload: 解析後的 payload
+            raw_payload: 原始請求內容（可選）
+            delivery_id: X-GitHub-Delivery 標頭的值（可選；轉發失敗時移除記錄，讓手動重送可再次處理）
+            done_targets: 此 delivery 先前已成功轉發的處理服務（可選，不再轉發）
+
+        Returns:
+            是否已放入佇列；佇列已滿時返回 False
+        """
+        with self._dispatch_lock:
+            if self._dispatch_closed:
+                self.logger.warning(f"Gateway 正在關閉，拒絕事件: {event_type}")
+                return False
+
+            try:
+                self._dispatch_queue.put_nowait((event_type, payload, raw_payload, delivery_id, done_targets))
+                return True
+            except queue.Full:
+                self.logger.warning(f"webhook 轉發佇列已滿，拒絕事件: {event_type}")
+                return False
+
+    def _dispatch_loop(self):
+        """背景轉發線程：依序取出佇列中的 webhook 並路由到微服務"""
+        while True:
+            event_type, payload, raw_payload, delivery_id, done_targets = self._dispatch_queue.get()
+            try:
+                self.route_webhook(event_type, payload, raw_payload=raw_payload,
+                                   delivery_id=delivery_id, done_targets=done_targets)
+            except Exception as e:
+                self.logger.error(f"轉發 webhook 失敗: {e}", exc_info=True)
+                self.forget_delivery(delivery_id, done_targets)
+            finally:
+                self._dispatch_queue.task_done()
+
+    def close(self):
+        """
+        停止接收新的 webhook，並在 DISPATCH_DRAIN_TIMEOUT 秒內轉發佇列中已接收的事件；
+        逾時仍未轉發的事件移除其 delivery ID 記錄，讓 GitHub 重送時可再次處理
+        """
+        with self._dispatch_lock:
+            if self._dispatch_closed:
+                return
+            self._dispatch_closed = True
+
+        pending = self._dispatch_queue.unfinished_tasks
+        if pending:
+            self.logger.info(f"等待 {pending} 個 webhook 轉發完成")
+
+        waiter = threading.Thread(target=self._dispatch_queue.join, daemon=True)
+        waiter.start()
+        waiter.join(self.DISPATCH_DRAIN_TIMEOUT)
+
+        dropped = 0
+        while True:
+            try:
+                _, _, _, delivery_id, done_targets = self._dispatch_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.forget_delivery(delivery_id, done_targets)
+            self._dispatch_queue.task_done()
+            dropped += 1
+
+        if dropped:
+            self.logger.warning(f"關閉前未能轉發 {dropped} 個 webhook，已移除其 delivery 記錄")
+
+    def route_webhook(self, event_type: str, payload: Dict, raw_payload: Optional[bytes] = None,
+                      delivery_id: Optional[str] = None, done_targets: Optional[List[str]] = None) -> Dict:
+        """
+        路由 webhook 到對應的微服務
+
+        Args:
+            event_type: GitHub 事件類型
+            payload: 解析後的 payload
+            raw_payload: 原始請求內容（可選；提供時直接存入資料庫，不再重新序列化）
+            delivery_id: X-GitHub-Delivery 標頭的值（可選；轉發失敗時記錄已成功的服務，讓手動重送只轉發失敗的服務）
+            done_targets: 此 delivery 先前已成功轉發的處理服務（可選，不再轉發）
+        """
+        done_targets = list(done_targets or [])
         try:
             results = {}
-            processed_by = []
             overall_status = 'processed'
             error_msgs = []
 
@@ -129,80 +330,46 @@ class WorkspaceGateway:
             pr_number = payload.get('pull_request', {}).get('number')
             issue_number = payload.get('issue', {}).get('number')
 
-            # 路由 PR 事件到 PR Reviewer
+            # 決定需要轉發的微服務：(結果鍵, 顯示名稱, 服務 URL, 處理服務標識)
+            targets = []
             if event_type == 'pull_request':
                 self.logger.info(f"路由 PR 事件到 PR Reviewer")
-                processed_by.append('pr-reviewer')
-                try:
-                    response = requests.post(
-                        f"{self.pr_reviewer_url}/webhook",
-                        json=payload,
-                        headers={'X-GitHub-Event': event_type},
-                        timeout=10
-                    )
-                    results['pr_reviewer'] = {
-                        'status': 'success' if response.status_code == 200 else 'error',
-                        'response': response.json() if response.status_code == 200 else None,
-                        'error': response.text if response.status_code != 200 else None
-                    }
-                    if response.status_code != 200:
-                        overall_status = 'failed'
-                        error_msgs.append(f"PR Reviewer: {response.text}")
-                except Exception as e:
-                    self.logger.error(f"路由到 PR Reviewer 失敗: {e}")
-                    results['pr_reviewer'] = {'status': 'error', 'error': str(e)}
-                    overall_status = 'failed'
-                    error_msgs.append(f"PR Reviewer: {str(e)}")
+                targets.append(('pr_reviewer', 'PR Reviewer', self.pr_reviewer_url, 'pr-reviewer'))
 
-            # 路由 Issue 事件到 Issue Copier
             if event_type in ['issues', 'issue_comment']:
                 self.logger.info(f"路由 {event_type} 事件到 Issue Copier")
-                processed_by.append('issue-copier')
-                try:
-                    response = requests.post(
-                        f"{self.issue_copier_url}/webhook",
-                        json=payload,
-                        headers={'X-GitHub-Event': event_type},
-                        timeout=10
-                    )
-                    results['issue_copier'] = {
-                        'status': 'success' if response.status_code == 200 else 'error',
-                        'response': response.json() if response.status_code == 200 else None,
-                        'error': response.text if response.status_code != 200 else None
-                    }
-                    if response.status_code != 200:
-                        overall_status = 'failed'
-                        error_msgs.append(f"Issue Copier: {response.text}")
-                except Exception as e:
-                    self.logger.error(f"路由到 Issue Copier 失敗: {e}")
-                    results['issue_copier'] = {'status': 'error', 'error': str(e)}
-                    overall_status = 'failed'
-                    error_msgs.append(f"Issue Copier: {str(e)}")
-
-            # 路由 Issue 事件到 Issue Scorer
-            if event_type in ['issues', 'issue_comment']:
+                targets.append(('issue_copier', 'Issue Copier', self.issue_copier_url, 'issue-copier'))
                 self.logger.info(f"路由 {event_type} 事件到 Issue Scorer")
-                processed_by.append('issue-scorer')
-                try:
-                    response = requests.post(
-                        f"{self.issue_scorer_url}/webhook",
-                        json=payload,
-                        headers={'X-GitHub-Event': event_type},
-                        timeout=10
-                    )
-                    results['issue_scorer'] = {
-                        'status': 'success' if response.status_code == 200 else 'error',
-                        'response': response.json() if response.status_code == 200 else None,
-                        'error': response.text if response.status_code != 200 else None
-                    }
-                    if response.status_code != 200:
-                        overall_status = 'failed'
-                        error_msgs.append(f"Issue Scorer: {response.text}")
-                except Exception as e:
-                    self.logger.error(f"路由到 Issue Scorer 失敗: {e}")
-                    results['issue_scorer'] = {'status': 'error', 'error': str(e)}
+                targets.append(('issue_scorer', 'Issue Scorer', self.issue_scorer_url, 'issue-scorer'))
+
+            # 重送時略過先前已成功的服務（避免重複同步評論或複製 issue）
+            if done_targets:
+                skipped = [name for _, name, _, service in targets if service in done_targets]
+                if skipped:
+                    self.logger.info(f"略過已成功處理的服務: {', '.join(skipped)}")
+                targets = [target for target in targets if target[3] not in done_targets]
+
+            # 多個目標時並行轉發
+            futures = [
+                (key, name, self._forward_pool.submit(self._forward_webhook, name, url, event_type, payload))
+                for key, name, url, _ in targets
+            ]
+            processed_by = [service for _, _, _, service in targets]
+
+            succeeded = list(done_targets)
+            for (key, name, future), (_, _, _, service) in zip(futures, targets):
+                result = future.result()
+                results[key] = result
+                if result['status'] == 'success':
+                    succeeded.append(service)
+                else:
                     overall_status = 'failed'
-                    error_msgs.append(f"Issue Scorer: {str(e)}")
+                    error_msgs.append(f"{name}: {result['error']}")
+
+            # 轉發失敗時 GitHub 不會自動重試（已返回 202），釋放記錄讓手動 Redeliver 能再次處理；
+            # 已成功的服務一併記錄，重送時只轉發失敗的服務
+            if overall_status == 'failed':
+                self.forget_delivery(delivery_id, succeeded)
 
             # 記錄 webhook 事件到資料庫
             try:
@@ -216,6 +383,7 @@ class WorkspaceGateway:
                     'action': action,
                     'sender': sender,
                     'payload': payload,
+                    'payload_raw': raw_payload,
                     'processed_by': ','.join(processed_by) if processed_by else None,
                     'status': overall_status,
                     'error_message': '; '.join(error_msgs) if error_msgs else None
@@ -232,11 +400,94 @@ class WorkspaceGateway:
 
         except Exception as e:
             self.logger.error(f"路由 webhook 失敗: {e}", exc_info=True)
+            self.forget_delivery(delivery_id, done_targets)
             return {
                 'status': 'error',
                 'error': str(e)
             }
 
+    def _forward_webhook(self, name: str, url: str, event_type: str, payload: Dict) -> Dict:
+        """
+        轉發 webhook 到單個微服務
+
+        Args:
+            name: 微服務顯示名稱
+            url: 微服務 URL
+            event_type: GitHub 事件類型
+            payload: 解析後的 payload
+
+        Returns:
+            轉發結果字典（status / response / error）
+        """
+        try:
+            response = self.http.post(
+                f"{url}/webhook",
+                json=payload,
+                headers={'X-GitHub-Event': event_type},
+                timeout=(self.CONNECT_TIMEOUT, 10)
+            )
+            return {
+                'status': 'success' if response.status_code == 200 else 'error',
+                'response': response.json() if response.status_code == 200 else None,
+                'error': response.text if response.status_code != 200 else None
+            }
+        except Exception as e:
+            self.logger.error(f"路由到 {name} 失敗: {e}")
+            return {'status': 'error', 'error': str(e)}
+
+    def _get_json(self, url: str) -> Optional[Dict]:
+        """GET 微服務 API，成功時返回 JSON，否則返回 None"""
+        response = self.http.get(url, timeout=(self.CONNECT_TIMEOUT, 5))
+        if response.status_code == 200:
+            return response.json()
+        return None
+
+    def get_dashboard_data(self, fresh: bool = False) -> Dict:
+        """
+        獲取 Dashboard 聚合數據（DASHBOARD_CACHE_TTL 秒內重用快取）
+
+        快取過期時只有一個請求實際聚合，同時到達的其他請求等待並共用其結果。
+
+        Args:
+            fresh: 是否略過快取直接聚合（用於調試）
+
+        Returns:
+            聚合數據字典
+        """
+        if fresh:
+            data = self.get_aggregated_data()
+            with self._dashboard_lock:
+                self._dashboard_cache = (time.monotonic(), data)
+            return data
+
+        with self._dashboard_lock:
+            cached = self._dashboard_cache
+            if cached is not None and time.monotonic() - cached[0] < self.DASHBOARD_CACHE_TTL:
+                return cached[1]
+
+            pending = self._dashboard_pending
+            if pending is None:
+                pending = self._dashboard_pending = Future()
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            return pending.result()
+
+        try:
+            data = self.get_aggregated_data()
+            with self._dashboard_lock:
+                self._dashboard_cache = (time.monotonic(), data)
+            pending.set_result(data)
+            return data
+        except Exception as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._dashboard_lock:
+                self._dashboard_pending = None
+
     def get_aggregated_data(self) -> Dict:
         """聚合來自各微服務的數據"""
         data = {
@@ -246,40 +497,30 @@ class WorkspaceGateway:
             'timestamp': datetime.now().isoformat()
         }
 
-        # 從 PR Reviewer 獲取數據
-        try:
-            response = requests.get(f"{self.pr_reviewer_url}/api/tasks", timeout=5)
-            if response.status_code == 200:
-                data['pr_reviewer'] = response.json()
-        except Exception as e:
-            self.logger.error(f"獲取 PR Reviewer 數據失敗: {e}")
-
-        # 從 Issue Copier 獲取數據
-        try:
-            response = requests.get(f"{self.issue_copier_url}/api/issue-copies", timeout=5)
-            if response.status_code == 200:
-                data['issue_copier'] = response.json()
-
-                # 同時獲取 comment sync 數據
-                try:
-                    comment_response = requests.get(f"{self.issue_copier_url}/api/comment-syncs", timeout=5)
-                    if comment_response.status_code == 200:
-                        comment_data = comment_response.json()
-                        data['issue_copier']['comment_syncs'] = comment_data.get('records', [])
-                        data['issue_copier']['comment_stats'] = comment_data.get('stats', {})
-                except Exception as ce:
-                    self.logger.error(f"獲取 Comment Sync 數據失敗: {ce}")
-
-        except Exception as e:
-            self.logger.error(f"獲取 Issue Copier 數據失敗: {e}")
+        # 並行請求各微服務：(顯示名稱, URL)
+        # Issue Copier 的 /api/dashboard 一次返回複製記錄與評論同步記錄（含 comment_syncs / comment_stats）
+        sources = {
+            'pr_reviewer': ('PR Reviewer', f"{self.pr_reviewer_url}/api/tasks"),
+            'issue_copier': ('Issue Copier', f"{self.issue_copier_url}/api/dashboard"),
+            'issue_scorer': ('Issue Scorer', f"{self.issue_scorer_url}/api/scores"),
+        }
+        futures = {key: self._dashboard_pool.submit(self._get_json, url) for key, (_, url) in sources.items()}
+        done, _ = wait(futures.values(), timeout=self.AGGREGATE_TIMEOUT)
+
+        results = {}
+        for key, future in futures.items():
+            name = sources[key][0]
+            if future not in done:
+                self.logger.error(f"獲取 {name} 數據逾時")
+                continue
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                self.logger.error(f"獲取 {name} 數據失敗: {e}")
 
-        # 從 Issue Scorer 獲取數據
-        try:
-            response = requests.get(f"{self.issue_scorer_url}/api/scores", timeout=5)
-            if response.status_code == 200:
-                data['issue_scorer'] = response.json()
-        except Exception as e:
-            self.logger.error(f"獲取 Issue Scorer 數據失敗: {e}")
+        data['pr_reviewer'] = results.get('pr_reviewer')
+        data['issue_copier'] = results.get('issue_copier')
+        data['issue_scorer'] = results.get('issue_scorer')
 
         return data
 
@@ -350,6 +591,13 @@ def api_webhooks():
     return get_webhooks(gateway)
 
 
+@app.route('/api/webhooks/<path:event_id>', methods=['GET'])
+@auth.login_required
+def api_webhook_detail(event_id):
+    """獲取單個 Webhook 事件（包含 payload）"""
+    return get_webhook_detail(gateway, event_id)
+
+
 @app.route('/webhook', methods=['POST'])
 @app.route('/webhook/', methods=['POST'])
 def webhook():
@@ -499,8 +747,14 @@ def main():
 
         gateway.logger.info(f"啟動 Gateway 服務器: {host}:{port}")
 
+        # SIGTERM（容器停止）時正常退出，讓佇列中的 webhook 先轉發完成
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
         # 啟動 Flask 應用
-        app.run(host=host, port=port, debug=debug)
+        try:
+            app.run(host=host, port=port, debug=debug)
+        finally:
+            gateway.close()
 
     except Exception as e:
         print(f"啟動失敗: {e}", file=sys.stderr)
@@ -4,10 +4,10 @@ Workspace Monitor Gateway - Route Handlers
 包含所有 Flask route 處理函數（不含 @app.route decorator）
 """
 
+import gzip
 from datetime import datetime
-from flask import request, jsonify
-import requests
-from typing import Dict
+from flask import Response, request, jsonify
+from typing import Dict, Tuple
 from urllib.parse import quote
 
 from gateway_templates import (
@@ -22,13 +22,45 @@ from gateway_templates import (
 )
 
 
+def _encode_page(html: str) -> Tuple[bytes, bytes]:
+    """將靜態頁面 HTML 預先編碼為 UTF-8 與 gzip 壓縮的 bytes"""
+    body = html.encode('utf-8')
+    return body, gzip.compress(body, 6)
+
+
+# 頁面模板不含任何變數，啟動時生成一次，請求時直接寫出已編碼（及壓縮）的內容
+INDEX_HTML = _encode_page(index_template())
+PR_TASKS_HTML = _encode_page(pr_tasks_template())
+ISSUE_COPIES_HTML = _encode_page(issue_copies_template())
+COMMENT_SYNCS_HTML = _encode_page(comment_syncs_template())
+HISTORY_HTML = _encode_page(history_template())
+ISSUE_SCORES_HTML = _encode_page(issue_scores_template())
+ALL_SCORES_HTML = _encode_page(all_scores_template())
+SCORER_CONFIG_HTML = _encode_page(scorer_config_template())
+
+
+def _page_response(page: Tuple[bytes, bytes]) -> Response:
+    """返回預先編碼的頁面，客戶端接受 gzip（品質值大於 0）時返回壓縮版本"""
+    body, body_gz = page
+    # accept_encodings 依 q 值解析（含 * 萬用字元），gzip;q=0 表示拒絕
+    if request.accept_encodings['gzip'] > 0:
+        response = Response(body_gz, mimetype='text/html')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(body, mimetype='text/html')
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'private, max-age=300'
+    return response
+
+
 # ============================================================================
 # API Routes
 # ============================================================================
 
 def get_dashboard(gateway) -> Dict:
-    """獲取 Dashboard 數據（聚合）"""
-    data = gateway.get_aggregated_data()
+    """獲取 Dashboard 數據（聚合，短時間快取；?fresh=1 略過快取）"""
+    fresh = request.args.get('fresh') == '1'
+    data = gateway.get_dashboard_data(fresh=fresh)
     return jsonify(data)
 
 
@@ -51,14 +83,34 @@ def get_webhooks(gateway) -> tuple:
         return jsonify({"error": str(e)}), 500
 
 
+def get_webhook_detail(gateway, event_id: str) -> tuple:
+    """獲取單個 Webhook 事件（包含 payload）"""
+    try:
+        event = gateway.db.get_webhook_event(event_id)
+        if not event:
+            return jsonify({"error": "Event not found"}), 404
+
+        return jsonify(event), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 def handle_webhook(gateway) -> tuple:
     """GitHub webhook 端點 - 路由到對應服務"""
+    done_targets = None
     try:
         # 驗證簽名
         signature = request.headers.get('X-Hub-Signature-256', '')
         if not gateway.verify_webhook_signature(request.data, signature):
             return jsonify({"error": "Invalid signature"}), 401
 
+        # GitHub 重送的事件（相同 delivery ID）直接返回，不重複轉發
+        delivery_id = request.headers.get('X-GitHub-Delivery', '')
+        done_targets = gateway.claim_delivery(delivery_id)
+        if done_targets is None:
+            gateway.logger.info(f"略過重複的 webhook: delivery={delivery_id}")
+            return jsonify({"status": "duplicate", "delivery_id": delivery_id}), 200
+
         # 獲取事件類型
         event_type = request.headers.get('X-GitHub-Event', '')
         payload = request.json
@@ -67,13 +119,17 @@ def handle_webhook(gateway) -> tuple:
         repo_name = payload.get('repository', {}).get('full_name', 'unknown')
         gateway.logger.info(f"收到 webhook: 事件類型={event_type}, repository={repo_name}")
 
-        # 路由到對應服務
-        result = gateway.route_webhook(event_type, payload)
+        # 放入轉發佇列後立即返回；佇列已滿時返回 503，GitHub 會稍後重送
+        if not gateway.dispatch_webhook(event_type, payload, raw_payload=request.data,
+                                        delivery_id=delivery_id, done_targets=done_targets):
+            gateway.forget_delivery(delivery_id, done_targets)
+            return jsonify({"error": "Webhook queue is full"}), 503
 
-        return jsonify(result), 200
+        return jsonify({"status": "accepted", "event_type": event_type}), 202
 
     except Exception as e:
         gateway.logger.error(f"Webhook 處理失敗: {e}", exc_info=True)
+        gateway.forget_delivery(request.headers.get('X-GitHub-Delivery', ''), done_targets)
         return jsonify({"error": str(e)}), 500
 
 
@@ -81,7 +137,7 @@ def proxy_issue_scorer_scores(gateway) -> tuple:
     """代理 Issue Scorer 的評分數據 API"""
     try:
         limit = request.args.get('limit', 50, type=int)
-        response = requests.get(f"{gateway.issue_scorer_url}/api/scores?limit={limit}", timeout=10)
+        response = gateway.http.get(f"{gateway.issue_scorer_url}/api/scores?limit={limit}", timeout=10)
         if response.status_code == 200:
             return jsonify(response.json()), 200
         else:
@@ -97,7 +153,7 @@ def update_score_feedback(gateway, score_id: str) -> tuple:
         data = request.json
         # URL encode the score_id for forwarding to issue-scorer
         encoded_score_id = quote(score_id, safe='')
-        response = requests.post(
+        response = gateway.http.post(
             f"{gateway.issue_scorer_url}/api/scores/{encoded_score_id}/feedback",
             json=data,
             timeout=10
@@ -117,7 +173,7 @@ def toggle_score_ignore(gateway, score_id: str) -> tuple:
         data = request.json
         # URL encode the score_id for forwarding to issue-scorer
         encoded_score_id = quote(score_id, safe='')
-        response = requests.post(
+        response = gateway.http.post(
             f"{gateway.issue_scorer_url}/api/scores/{encoded_score_id}/ignore",
             json=data,
             timeout=10
@@ -142,7 +198,7 @@ def get_all_scores(gateway) -> tuple:
 
         # 獲取 Issue 評分記錄
         try:
-            issue_response = requests.get(f"{gateway.issue_scorer_url}/api/scores?limit={limit}", timeout=10)
+            issue_response = gateway.http.get(f"{gateway.issue_scorer_url}/api/scores?limit={limit}", timeout=10)
             if issue_response.status_code == 200:
                 issue_data = issue_response.json()
                 for record in issue_data.get('scores', []):
@@ -167,7 +223,7 @@ def get_all_scores(gateway) -> tuple:
 
         # 獲取 PR 評分記錄
         try:
-            pr_response = requests.get(f"{gateway.pr_reviewer_url}/api/tasks?limit={limit}", timeout=10)
+            pr_response = gateway.http.get(f"{gateway.pr_reviewer_url}/api/tasks?limit={limit}", timeout=10)
             if pr_response.status_code == 200:
                 pr_data = pr_response.json()
                 for record in pr_data.get('tasks', []):
@@ -209,7 +265,7 @@ def delete_score_record(gateway, score_id: str) -> tuple:
     try:
         # URL encode the score_id for forwarding to issue-scorer
         encoded_score_id = quote(score_id, safe='')
-        response = requests.delete(
+        response = gateway.http.delete(
             f"{gateway.issue_scorer_url}/api/scores/{encoded_score_id}",
             timeout=10
         )
@@ -226,50 +282,50 @@ def delete_score_record(gateway, score_id: str) -> tuple:
 # Page Routes
 # ============================================================================
 
-def index() -> str:
+def index() -> Response:
     """主頁 - 統一 Dashboard"""
-    return index_template()
+    return _page_response(INDEX_HTML)
 
 
-def pr_tasks_page() -> str:
+def pr_tasks_page() -> Response:
     """PR 審查任務列表頁面"""
-    return pr_tasks_template()
+    return _page_response(PR_TASKS_HTML)
 
 
-def issue_copies_page() -> str:
+def issue_copies_page() -> Response:
     """Issue 複製記錄頁面"""
-    return issue_copies_template()
+    return _page_response(ISSUE_COPIES_HTML)
 
 
-def comment_syncs_page() -> str:
+def comment_syncs_page() -> Response:
     """評論同步記錄頁面"""
-    return comment_syncs_template()
+    return _page_response(COMMENT_SYNCS_HTML)
 
 
-def history_page() -> str:
+def history_page() -> Response:
     """Webhook 歷史記錄頁面"""
-    return history_template()
+    return _page_response(HISTORY_HTML)
 
 
-def issue_scores_page() -> str:
+def issue_scores_page() -> Response:
     """Issue 品質評分頁面"""
-    return issue_scores_template()
+    return _page_response(ISSUE_SCORES_HTML)
 
 
-def all_scores_page() -> str:
+def all_scores_page() -> Response:
     """統一評分統計頁面 - Issue 和 PR 評分"""
-    return all_scores_template()
+    return _page_response(ALL_SCORES_HTML)
 
 
-def scorer_config_page() -> str:
+def scorer_config_page() -> Response:
     """評分配置管理頁面"""
-    return scorer_config_template()
+    return _page_response(SCORER_CONFIG_HTML)
 
 
 def get_scorer_config(gateway) -> tuple:
     """獲取評分配置"""
     try:
-        response = requests.get(f"{gateway.issue_scorer_url}/api/config", timeout=10)
+        response = gateway.http.get(f"{gateway.issue_scorer_url}/api/config", timeout=10)
         if response.status_code == 200:
             return jsonify(response.json()), 200
         else:
@@ -283,7 +339,7 @@ def update_scorer_config(gateway) -> tuple:
     """更新評分配置"""
     try:
         data = request.json
-        response = requests.post(
+        response = gateway.http.post(
             f"{gateway.issue_scorer_url}/api/config",
             json=data,
             timeout=10
@@ -301,21 +357,21 @@ def get_feedback_analytics(gateway) -> str:
     """反饋分析頁面"""
     try:
         # 獲取統計數據
-        response = requests.get(
+        response = gateway.http.get(
             f"{gateway.issue_scorer_url}/api/feedback/statistics?days=30",
             timeout=10
         )
         stats = response.json().get('data', {}) if response.status_code == 200 else {}
 
         # 獲取見解
-        response = requests.get(
+        response = gateway.http.get(
             f"{gateway.issue_scorer_url}/api/feedback/insights?days=30",
             timeout=10
         )
         insights = response.json().get('data', {}) if response.status_code == 200 else {}
 
         # 獲取反饋列表
-        response = requests.get(
+        response = gateway.http.get(
             f"{gateway.issue_scorer_url}/api/feedback/list?days=30&limit=20",
             timeout=10
         )
@@ -333,7 +389,7 @@ def get_feedback_patterns_api(gateway) -> tuple:
     """獲取反饋模式 API"""
     try:
         days = request.args.get('days', 30, type=int)
-        response = requests.get(
+        response = gateway.http.get(
             f"{gateway.issue_scorer_url}/api/feedback/patterns?days={days}",
             timeout=10
         )
@@ -188,7 +188,8 @@ class IssueCopier:
                 existing_records = self.db.search_copy_records(
                     source_repo=source_repo,
                     target_repo=target_repo_name,
-                    source_issue_number=source_number
+                    source_issue_number=source_number,
+                    include_labels=False
                 )
                 # 檢查是否有成功或進行中的複製記錄（避免並發重複）
                 for record in existing_records:
@@ -267,7 +268,8 @@ class IssueCopier:
                     existing_records = self.db.search_copy_records(
                         source_repo=source_repo,
                         target_repo=target_repo_name,
-                        source_issue_number=source_number
+                        source_issue_number=source_number,
+                        include_labels=False
                     )
                     if existing_records and existing_records[0].get('status') == 'success':
                         return {
@@ -588,7 +590,8 @@ class IssueCopier:
                     # 從資料庫查詢複製記錄
                     copy_records = self.db.search_copy_records(
                         source_repo=repo_full_name,
-                        source_issue_number=issue_number
+                        source_issue_number=issue_number,
+                        include_labels=False
                     )
 
                     # 只選擇成功複製的記錄
@@ -190,6 +190,28 @@ def get_comment_syncs():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/api/dashboard', methods=['GET'])
+def get_dashboard_data():
+    """獲取 Dashboard 所需的複製記錄與評論同步記錄（單一請求，供 Gateway 聚合使用）"""
+    try:
+        copy_limit = request.args.get('limit', 100, type=int)
+        comment_limit = request.args.get('comment_limit', 50, type=int)
+
+        records = service.db.get_copy_records(limit=copy_limit)
+        comment_records = service.db.get_comment_sync_records(limit=comment_limit)
+
+        return jsonify({
+            'total': len(records),
+            'records': records,
+            'stats': service.db.get_copy_stats(),
+            'comment_syncs': comment_records,
+            'comment_stats': service.db.get_comment_sync_stats()
+        })
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
     """獲取統計數據"""
@@ -1432,7 +1432,7 @@ def get_tasks():
 def get_task(task_id):
     """获取单个任务状态（API）"""
     # 從資料庫讀取任務
-    task = reviewer.db.get_task(task_id)
+    task = reviewer.db.get_task_with_content(task_id)
 
     if not task:
         return jsonify({"error": "Task not found"}), 404
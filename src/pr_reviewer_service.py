@@ -650,7 +650,7 @@ def get_tasks():
 def get_task(task_id):
     """獲取單個任務"""
     try:
-        task = service.db.get_task(task_id)
+        task = service.db.get_task_with_content(task_id)
         if task:
             return jsonify(task)
         else: